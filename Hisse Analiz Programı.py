@@ -1,10 +1,68 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict, deque
+from contextlib import contextmanager, redirect_stdout
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import ast
+import hashlib
+import importlib.util
+import csv
+import io
+import itertools
+import json
+import platform
+import subprocess
+import os
+import random
+import re
+import pickle
+import sys
+import threading
+import time
+import zlib
 import warnings
+try:
+    import resource  # Tepe bellek ölçümü için (Windows'ta yok)
+except ImportError:
+    resource = None
 warnings.filterwarnings('ignore')
 
+def lazy_import(name):
+    """Modülü ilk öznitelik erişiminde yükle (filtreleri göstermek gibi kısa komutlar ağır kütüphaneleri yüklemez)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+_IMPORT_LOCK = threading.Lock()
+
+def require(*modules):
+    """Tembel modülleri kilit altında yükle - Python 3.12 öncesi LazyLoader eşzamanlı ilk erişimde güvenli değil,
+    bu yüzden iş parçacığı açan her yol önce bunu çağırır"""
+    with _IMPORT_LOCK:
+        for module in modules:
+            getattr(module, '__name__')
+    return modules
+
+HEAVY_MODULES = ('numpy', 'pandas', 'yfinance')  # Sadece tarama/analiz yollarında yüklenen kütüphaneler
+yf = lazy_import('yfinance')
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+asyncio = lazy_import('asyncio')                              # Sadece --serve
+shared_memory = lazy_import('multiprocessing.shared_memory')  # Sadece süreç havuzu
+futures_process = lazy_import('concurrent.futures.process')   # Sadece süreç havuzu (ProcessPoolExecutor)
+cProfile = lazy_import('cProfile')                            # Sadece --cprofile
+pstats = lazy_import('pstats')
+
 # =============================================================================
 # GÜNCELLENMIŞ FİLTRE KRİTERLERİ - İYİLEŞTİRİLMİŞ VERSİYON
 # =============================================================================
@@ -43,11 +101,24 @@ MAX_RESISTANCE_DISTANCE = 0.06  # Dirençten maksimum %6 uzakta (8%'den düşür
 
 # Destek/Direnç analiz parametreleri - 3'e çıkarıldı
 SUPPORT_RESISTANCE_COUNT = 3  # Gösterilecek destek/direnç sayısı (2'den 3'e çıkarıldı)
+SR_ENGINE = "pivot"             # "pivot" (yerel dip/tepe + dokunma gücü) veya "volume_profile" (hacim-fiyat profili)
+VOLUME_PROFILE_BINS = 50        # Hacim profilinde fiyat aralığının bölündüğü kutu sayısı
+VOLUME_PROFILE_MIN_SHARE = 0.02 # Toplam hacmin bu payından az hacimli düğümler seviye sayılmaz
 
 # Fiyat Kriterleri - Uygun, spek hisseleri hariç tutar
 MIN_PRICE = 3.0
 MAX_PRICE = 500.0
 
+# Yukarıdaki değerler varsayılandır; FILTER_CONFIG_FILE varsa başlangıçta okunup bunların yerine geçer
+FILTER_CONFIG_FILE = "filters.json"  # --save-filters ile güncel değerlerle oluşturulur
+FILTER_SETTINGS = (
+    'MIN_RSI', 'MAX_RSI', 'MACD_CROSSOVER', 'MACD_HISTOGRAM_POSITIVE', 'MIN_VOLUME', 'VOLUME_INCREASE_MIN',
+    'VOLUME_LOOKBACK_DAYS', 'EMA20_ABOVE_EMA50', 'PRICE_NEAR_EMA20', 'MAX_PRICE_EMA20_DISTANCE',
+    'MIN_ATR_PERCENT', 'MAX_ATR_PERCENT', 'NEAR_SUPPORT', 'MAX_SUPPORT_DISTANCE', 'MAX_STOP_LOSS_DISTANCE',
+    'RESISTANCE_POTENTIAL', 'MAX_RESISTANCE_DISTANCE', 'SUPPORT_RESISTANCE_COUNT', 'SR_ENGINE',
+    'VOLUME_PROFILE_BINS', 'VOLUME_PROFILE_MIN_SHARE', 'MIN_PRICE', 'MAX_PRICE',
+)
+
 # BIST 100 hisse kodları (güncellenmiş liste)
 BIST100_STOCKS = [
     'THYAO', 'AKBNK', 'ISCTR', 'GARAN', 'VAKBN', 'SASA', 'KCHOL', 'ARCLK', 
@@ -68,6 +139,868 @@ BIST100_STOCKS = [
     'BOBET', 'BOLUC', 'BOSSA', 'BRKO', 'BRKSN', 'BRKVY', 'BSOKE', 'BTCIM'
 ]
 
+# Tarama ayarları
+HISTORY_PERIOD = "6mo"  # Her hisse için çekilecek geçmiş veri süresi
+SCAN_WORKERS = 8        # Eşzamanlı veri çekme/analiz iş parçacığı sayısı (1 = sıralı tarama)
+COMPUTE_PROCESSES = 1   # Göstergeler + destek/direnç için süreç sayısı (1 = aynı süreçte, 0 = çekirdek sayısı)
+COMPUTE_CHUNK_TICKERS = 64  # Süreç havuzunda bir göreve düşen hisse sayısı (panel EMA bar döngüsü nedeniyle küçük dilim yavaş)
+
+# İki aşamalı tarama - önce tek toplu istekle son fiyat/hacim ön elemesi, tam geçmiş sadece kalanlar için
+PRESCREEN_ENABLED = True
+PRESCREEN_CRITERIA = ('price', 'volume')  # Son fiyat ve hacimle uygulanabilen (ucuz) kriterler
+UNIVERSE_FILE = "universe.json"           # CACHE_DIR altında hisse evreni ve likidite kademeleri (yoksa BIST100 listesiyle oluşur)
+UNIVERSE_MAX_TIER = 3                     # Varsayılan taramaya dahil edilen en düşük likidite kademesi (1 = en likit)
+LIQUIDITY_TIERS = (50_000_000, 5_000_000) # Günlük ort. işlem hacmi (TL) eşikleri: >= ilki kademe 1, >= ikincisi 2, altı 3
+UNIVERSE_TURNOVER_SMOOTHING = 0.2         # Ortalama işlem hacminde son günün ağırlığı (üstel ortalama)
+
+# Yerel OHLCV önbelleği - her çalıştırmada 6 aylık veriyi tekrar indirmek yerine sadece yeni barları çeker
+CACHE_ENABLED = True          # Önbellek kullanılsın mı
+CACHE_DIR = ".ohlcv_cache"    # Hisse başına bir dosya tutulan klasör
+CACHE_MAX_AGE_MINUTES = 15    # Bu süreden yeni önbellek hiç ağa gitmeden kullanılır
+CACHE_MAX_SIZE_MB = 200       # Aşılırsa en uzun süredir kullanılmayan hisseler silinir
+CACHE_FULL_REFRESH = False    # True ise önbellek yok sayılır ve tüm geçmiş yeniden indirilir
+
+# Analiz sonucu önbelleği - aynı veri ve parametrelerle hesaplanmış sonuç tekrar hesaplanmaz
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_MAX_ENTRIES = 2000        # Bellekte tutulan en fazla sonuç (en uzun süredir kullanılmayan silinir)
+RESULT_CACHE_FILE = ".result_cache.pkl"  # Sonuçların saklandığı dosya (None -> sadece bellek)
+
+# Veri çekme zamanlayıcısı - ağ isteklerini sınırlar, geçici hataları tekrar dener, takılan isteği bekletmez
+FETCH_SCHEDULER_ENABLED = True
+FETCH_RATE_PER_SECOND = 5.0     # Token bucket: saniyede ortalama istek
+FETCH_BURST = 10                # Token bucket: art arda atılabilecek en fazla istek
+FETCH_RETRIES = 3               # Geçici hatada en fazla yeniden deneme
+FETCH_BACKOFF_SECONDS = 0.5     # İlk bekleme; her denemede iki katına çıkar (+ rastgele sapma)
+FETCH_BACKOFF_MAX_SECONDS = 8.0
+FETCH_TIMEOUT_SECONDS = 15.0    # Tek istek için süre sınırı
+SCAN_DEADLINE_SECONDS = 300     # Tüm taramanın veri çekme süresi sınırı (None -> sınırsız)
+BREAKER_FAILURE_THRESHOLD = 5   # Art arda bu kadar başarısız istekten sonra devre kesici açılır
+BREAKER_COOLDOWN_SECONDS = 30   # Açık devrede istek atılmadan beklenen süre, sonra tek deneme isteği
+
+# =============================================================================
+# VERİ SAĞLAYICILARI
+# =============================================================================
+
+class YahooDataProvider:
+    """Yahoo Finance üzerinden OHLCV verisi çeken varsayılan sağlayıcı (varsayılan günlük bar)"""
+
+    def get_history(self, ticker, period=HISTORY_PERIOD, start=None, interval="1d"):
+        """Hissenin geçmiş verisini DataFrame olarak döndür (start verilirse o tarihten itibaren)"""
+        require(yf)
+        if start is not None:
+            return yf.Ticker(ticker).history(start=start.strftime('%Y-%m-%d'), interval=interval)
+        return yf.Ticker(ticker).history(period=period, interval=interval)
+
+    def get_quotes(self, tickers):
+        """Hisselerin son fiyat ve hacmini tek toplu istekle döndür (DataFrame: indeks hisse, sütunlar price/volume)"""
+        tickers = list(tickers)
+        require(yf)
+        data = yf.download(tickers, period="5d", interval="1d", group_by='ticker', progress=False, threads=True)
+        rows = {}
+        for ticker in tickers:
+            frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+            frame = frame.dropna(subset=['Close'])
+            if len(frame):
+                rows[ticker] = (frame['Close'].iloc[-1], frame['Volume'].iloc[-1])
+        return pd.DataFrame.from_dict(rows, orient='index', columns=['price', 'volume'])
+
+@lru_cache(maxsize=32)
+def _business_days(end, n_bars):
+    """Yapay veri için iş günü indeksi (bdate_range yavaş olduğundan önbelleklenir)"""
+    return pd.bdate_range(end=end, periods=n_bars, name="Date")
+
+def generate_synthetic_ohlcv(ticker="SYN", n_bars=126, seed=0, end=None, bar_minutes=None):
+    """Rastgele yürüyüş ile deterministik yapay OHLCV verisi üret (çevrimdışı test için)
+    
+    bar_minutes verilirse (örn: 60) iş günleri yerine bu aralıklı gün içi barlar üretilir.
+    """
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()) ^ seed)
+    returns = rng.normal(0.0005, 0.02, n_bars)
+    close = 50.0 * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0, 0.003, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n_bars)))
+    volume = rng.lognormal(np.log(1_000_000), 0.5, n_bars).round()
+
+    if bar_minutes:
+        step = pd.Timedelta(minutes=bar_minutes)
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().floor(step)
+        index = pd.date_range(end=end, periods=n_bars, freq=step, name="Datetime")
+    else:
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+        index = _business_days(end, n_bars)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                        index=index)
+
+class SyntheticDataProvider:
+    """Yerel yapay veri sağlayıcı - yapay gecikme ve hata enjekte ederek taramayı test etmek için"""
+
+    def __init__(self, latency=0.0, slow_tickers=None, failing_tickers=(), n_bars=126, seed=0,
+                 flaky_tickers=None, fail_rate=0.0):
+        self.latency = latency                        # Her istek için bekleme süresi (saniye)
+        self.slow_tickers = dict(slow_tickers or {})  # Hisseye özel ek gecikme {ticker: saniye}
+        self.failing_tickers = set(failing_tickers)   # Kalıcı hata fırlatacak hisseler (örn: işlemden kaldırılmış)
+        self.flaky_tickers = dict(flaky_tickers or {})  # İlk n isteği geçici hatayla düşen hisseler {ticker: n}
+        self.fail_rate = fail_rate                    # Her isteğin geçici hatayla düşme olasılığı
+        self.n_bars = n_bars
+        self.seed = seed
+        self.calls = {}
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def get_history(self, ticker, period=HISTORY_PERIOD, start=None, interval="1d"):
+        """Yapay geçmiş veriyi gecikme/hata senaryolarıyla döndür"""
+        symbol = ticker.replace('.IS', '')
+        delay = self.latency + self.slow_tickers.get(symbol, 0.0)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.calls[symbol] = attempt = self.calls.get(symbol, 0) + 1
+            transient = attempt <= self.flaky_tickers.get(symbol, 0) or \
+                (self.fail_rate > 0 and self._rng.random() < self.fail_rate)
+        if symbol in self.failing_tickers:
+            raise ValueError(f"{symbol} için veri yok (işlemden kaldırılmış olabilir)")
+        if transient:
+            raise ConnectionError(f"{symbol} için yapay geçici hata ({attempt}. istek)")
+        bar_minutes = TIMEFRAMES[interval]['minutes'] if interval != "1d" else None
+        hist = generate_synthetic_ohlcv(symbol, self.n_bars, self.seed, bar_minutes=bar_minutes)
+        if start is not None:
+            hist = hist[hist.index >= start]
+        return hist
+
+    def get_quotes(self, tickers):
+        """Tüm hisselerin son barını tek (gecikmeli) istekte döndür - kalıcı hatalı hisseler yanıtta olmaz"""
+        if self.latency:
+            time.sleep(self.latency)
+        rows = {}
+        for ticker in tickers:
+            symbol = ticker.replace('.IS', '')
+            if symbol not in self.failing_tickers:
+                last = generate_synthetic_ohlcv(symbol, self.n_bars, self.seed).iloc[-1]
+                rows[ticker] = (last['Close'], last['Volume'])
+        return pd.DataFrame.from_dict(rows, orient='index', columns=['price', 'volume'])
+
+def period_start(period, tz=None):
+    """'6mo', '2y', '30d' gibi periyot ifadesinin başlangıç zamanını hesapla ('max' için None)"""
+    now = pd.Timestamp.now(tz=tz).normalize()
+    units = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return now - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    return None
+
+def align_timestamp(ts, tz):
+    """Zaman damgasını indeksin saat dilimine getir (tz'siz ve tz'li zamanlar karşılaştırılamaz)"""
+    ts = pd.Timestamp(ts)
+    if tz is None:
+        return ts.tz_localize(None) if ts.tz is not None else ts
+    return ts.tz_localize(tz) if ts.tz is None else ts.tz_convert(tz)
+
+class CachedDataProvider:
+    """Başka bir sağlayıcıyı saran, hisse başına diskte OHLCV geçmişi tutan artımlı önbellek"""
+
+    def __init__(self, provider, cache_dir=CACHE_DIR, max_age_minutes=CACHE_MAX_AGE_MINUTES,
+                 max_size_mb=CACHE_MAX_SIZE_MB, full_refresh=CACHE_FULL_REFRESH, keep_in_memory=False):
+        self.provider = provider
+        self.cache_dir = cache_dir
+        self.max_age_minutes = max_age_minutes
+        self.max_size_mb = max_size_mb
+        self.full_refresh = full_refresh
+        self.keep_in_memory = keep_in_memory  # Uzun ömürlü süreçte geçmiş her seferinde diskten okunmaz
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.stats = {'fresh': 0, 'incremental': 0, 'full': 0}
+
+    def _path(self, ticker, interval="1d"):
+        # Günlük dışı aralıklar ayrı dosyada tutulur (örn: THYAO.IS_1h.pkl)
+        return os.path.join(self.cache_dir, f"{ticker}.pkl" if interval == "1d" else f"{ticker}_{interval}.pkl")
+
+    def _fetch(self, ticker, period, start, interval):
+        # interval desteklemeyen eski sağlayıcılar günlük veride aynen çalışmaya devam eder
+        if interval == "1d":
+            return self.provider.get_history(ticker, period=period, start=start)
+        return self.provider.get_history(ticker, period=period, start=start, interval=interval)
+
+    def get_quotes(self, tickers):
+        """Son fiyat/hacim her zaman sağlayıcıdan gelir (tek toplu istek, önbelleğe yazılmaz)"""
+        return self.provider.get_quotes(tickers)
+
+    def get_history(self, ticker, period=HISTORY_PERIOD, start=None, interval="1d"):
+        """Önbellekteki geçmişi döndür; gerekiyorsa sadece son kayıttan sonraki barları çek"""
+        path = self._path(ticker, interval)
+        memory_key = (ticker, interval)
+        cached = self._memory.get(memory_key) if self.keep_in_memory and not self.full_refresh else None
+        if cached is None and not self.full_refresh and os.path.exists(path):
+            try:
+                cached = pd.read_pickle(path)
+            except Exception:
+                cached = None  # Bozuk dosya - tam indirme ile üzerine yazılır
+        
+        wanted_start = start if start is not None else period_start(period, cached.index.tz if cached is not None else None)
+        if cached is not None and len(cached) and not self._covers(cached, wanted_start):
+            cached = None  # Önbellek istenen dönemi kapsamıyor (örn: daha kısa periyotla doldurulmuş)
+        
+        if cached is None or not len(cached):
+            hist = self._fetch(ticker, period, start, interval)
+            # Yeni listelenen hissede ilk bar dönem başından sonradır; kapsam ilk bardan değil istekten okunur
+            covers_from = 'max' if wanted_start is None else pd.Timestamp(wanted_start).isoformat()
+            kind = 'full'
+        elif time.time() - cached.attrs.get('fetched_at', 0) < self.max_age_minutes * 60:
+            hist = cached
+            covers_from = cached.attrs.get('covers_from')
+            kind = 'fresh'
+        else:
+            # Son bar gün içinde eksik kaydedilmiş olabilir, bu yüzden son bar dahil yeniden çekilir
+            last_ts = cached.index[-1]
+            new_bars = self._fetch(ticker, period, last_ts, interval)
+            hist = pd.concat([cached[cached.index < last_ts], new_bars]) if len(new_bars) else cached
+            hist = hist[~hist.index.duplicated(keep='last')]
+            covers_from = cached.attrs.get('covers_from')
+            kind = 'incremental'
+        
+        with self._lock:
+            self.stats[kind] += 1
+        if kind != 'fresh':
+            self._store(path, hist, covers_from)
+        elif os.path.exists(path):
+            os.utime(path)  # Dosya değişiklik zamanı son kullanımı gösterir - tahliye sırası için
+        if self.keep_in_memory:
+            self._memory[memory_key] = hist
+        
+        if wanted_start is not None and len(hist):
+            # Soğuk önbellekte wanted_start tz'siz hesaplanır; Yahoo indeksi Europe/Istanbul saat dilimindedir
+            hist = hist[hist.index >= align_timestamp(wanted_start, hist.index.tz)]
+        return hist
+
+    @staticmethod
+    def _covers(cached, wanted_start):
+        """Önbellek istenen dönemi kapsıyor mu - kayıtlı istek başlangıcı ('max' = tüm geçmiş) ile karşılaştırılır"""
+        covers_from = cached.attrs.get('covers_from')
+        if covers_from is None:
+            # Kapsam bilgisi olmayan eski dosya: ilk bar tarihinden tahmin edilir
+            return wanted_start is None or \
+                cached.index[0] <= align_timestamp(wanted_start, cached.index.tz) + pd.Timedelta(days=7)
+        if covers_from == 'max':
+            return True
+        return wanted_start is not None and \
+            align_timestamp(wanted_start, cached.index.tz) >= align_timestamp(covers_from, cached.index.tz)
+
+    def _store(self, path, hist, covers_from=None):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        hist.attrs['fetched_at'] = time.time()  # Tazelik kontrolü için son indirme zamanı
+        if covers_from is not None:
+            hist.attrs['covers_from'] = covers_from  # Bu dosyanın karşıladığı istek başlangıcı
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        hist.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """Önbellek boyut sınırını aşarsa en eski kullanılan hisse dosyalarını sil"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if name.endswith('.pkl'):
+                    entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+            total = sum(size for _, size, _ in entries)
+            limit = self.max_size_mb * 1024 * 1024
+            for _, size, path in sorted(entries):
+                if total <= limit:
+                    break
+                os.remove(path)
+                total -= size
+
+    def clear(self):
+        """Tüm önbelleği temizle"""
+        self._memory.clear()
+        if not os.path.isdir(self.cache_dir):
+            return
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+class FetchTimeout(Exception):
+    """Tek istek süre sınırını aştı"""
+
+class ScanDeadlineExceeded(Exception):
+    """Taramanın toplam veri çekme süresi doldu"""
+
+class CircuitOpenError(Exception):
+    """Sağlayıcı art arda hata verdiği için devre kesici açık - istek atılmadı"""
+
+class TokenBucket:
+    """Saniyede rate jeton üreten, en fazla burst jeton biriktiren iş parçacığı güvenli hız sınırlayıcı"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """Bir jeton al; jeton deadline'dan önce gelmeyecekse False döndür"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+def is_transport_error(error):
+    """Sağlayıcıya ulaşılamadığını gösteren (tüm hisseleri etkileyen) hata mı: zaman aşımı, bağlantı, HTTP 429/5xx
+    
+    Hisseye özgü kalıcı hatalar (işlemden kaldırılmış sembol, boş/bozuk veri, HTTP 404) devre kesiciyi açmaz.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    # requests/urllib3 bağlantı hataları OSError'dan türer; yfinance hız sınırı hatası ayrı bir sınıftır
+    return isinstance(error, (FetchTimeout, TimeoutError, OSError)) or \
+        type(error).__name__ in ('YFRateLimitError', 'CurlError')
+
+class CircuitBreaker:
+    """Art arda threshold taşıma hatasında (is_transport_error) açılır, cooldown sonunda tek deneme isteğine izin verir (yarı açık)"""
+
+    def __init__(self, threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        """İstek atılabilir mi (yarı açık durumda aynı anda tek deneme isteği)"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            self._trial = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()  # Yarı açıkta başarısız deneme devreyi yeniden açar
+
+class FetchScheduler:
+    """Ağ sağlayıcısını saran zamanlayıcı: hız sınırı, üstel geri çekilmeli tekrar, istek ve tarama süre
+    sınırları, devre kesici; her hisse için sonucu (tekrar/zaman aşımı/hata) tarama raporuna kaydeder"""
+
+    def __init__(self, provider, rate=FETCH_RATE_PER_SECOND, burst=FETCH_BURST, retries=FETCH_RETRIES,
+                 backoff=FETCH_BACKOFF_SECONDS, backoff_max=FETCH_BACKOFF_MAX_SECONDS,
+                 timeout=FETCH_TIMEOUT_SECONDS, breaker=None):
+        self.provider = provider
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.deadline = None
+        self._lock = threading.Lock()
+        self.begin_scan()
+
+    def begin_scan(self, deadline_seconds=None):
+        """Yeni tarama: tarama süre sınırını (None -> sınırsız) başlat ve raporu sıfırla"""
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        with self._lock:
+            self.outcomes = {}   # hisse -> 'ok' | 'retried' | 'timed_out' | 'failed' | 'circuit_open' | 'deadline'
+            self.latencies = {}  # hisse -> tekrarlar dahil toplam süre (sn)
+            self.counters = {'requests': 0, 'retries': 0, 'timeouts': 0}
+
+    def end_scan(self):
+        """Tarama bitti: süre sınırını kaldır (rapor bir sonraki taramaya kadar korunur)"""
+        self.deadline = None
+
+    def _call_with_timeout(self, timeout, func, *args, **kwargs):
+        """Sağlayıcıyı ayrı bir iş parçacığında çağır; süre dolarsa bekleme (takılan istek arka planda kalır)"""
+        require(np, pd)
+        outcome = {}
+        def target():
+            try:
+                outcome['value'] = func(*args, **kwargs)
+            except Exception as e:
+                outcome['error'] = e
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        worker.join(timeout)
+        if worker.is_alive():
+            raise FetchTimeout(f"{timeout:.1f} sn içinde yanıt gelmedi")
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['value']
+
+    def _remaining(self):
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def get_history(self, ticker, period=HISTORY_PERIOD, start=None, interval="1d"):
+        """Sağlayıcının get_history'si - sınırlar içinde tekrar dener, sonuç alınamazsa son hatayı fırlatır"""
+        # interval desteklemeyen eski sağlayıcılar günlük veride aynen çalışmaya devam eder
+        kwargs = {} if interval == "1d" else {'interval': interval}
+        return self._schedule(ticker, self.provider.get_history, ticker, period=period, start=start, **kwargs)
+
+    def get_quotes(self, tickers):
+        """Sağlayıcının toplu son fiyat/hacim isteği - aynı hız sınırı, tekrar ve süre sınırlarıyla"""
+        return self._schedule(None, self.provider.get_quotes, tickers)
+
+    def _schedule(self, ticker, func, *args, **kwargs):
+        """func'ı sınırlar içinde tekrar deneyerek çağır; ticker verilirse sonucu hisse raporuna kaydet"""
+        started = time.monotonic()
+        attempt, timed_out = 0, False
+        try:
+            while True:
+                remaining = self._remaining()
+                if remaining is not None and remaining <= 0:
+                    raise ScanDeadlineExceeded("tarama süresi doldu")
+                if not self.breaker.allow():
+                    raise CircuitOpenError("sağlayıcı art arda hata verdi, devre kesici açık")
+                if not self.bucket.acquire(self.deadline):
+                    raise ScanDeadlineExceeded("hız sınırı nedeniyle tarama süresi içinde istek atılamadı")
+                
+                timeout = self.timeout if remaining is None else min(self.timeout, self._remaining())
+                with self._lock:
+                    self.counters['requests'] += 1
+                try:
+                    value = self._call_with_timeout(max(timeout, 0), func, *args, **kwargs)
+                except Exception as e:
+                    # Sağlayıcı yanıt verdiyse (hisseye özgü hata) bağlantı sağlıklıdır; sadece taşıma hataları sayılır
+                    self.breaker.record(not is_transport_error(e))
+                    timed_out = isinstance(e, FetchTimeout)
+                    if timed_out:
+                        with self._lock:
+                            self.counters['timeouts'] += 1
+                    if attempt >= self.retries:
+                        raise
+                    delay = min(self.backoff_max, self.backoff * 2 ** attempt) * (1 + random.random())
+                    remaining = self._remaining()
+                    if remaining is not None and delay >= remaining:
+                        raise
+                    attempt += 1
+                    with self._lock:
+                        self.counters['retries'] += 1
+                    time.sleep(delay)
+                    continue
+                self.breaker.record(True)
+                self._record(ticker, 'retried' if attempt else 'ok', started)
+                return value
+        except ScanDeadlineExceeded:
+            self._record(ticker, 'deadline', started)
+            raise
+        except CircuitOpenError:
+            self._record(ticker, 'circuit_open', started)
+            raise
+        except Exception:
+            self._record(ticker, 'timed_out' if timed_out else 'failed', started)
+            raise
+
+    def _record(self, ticker, outcome, started):
+        if ticker is None:
+            return
+        symbol = ticker.replace('.IS', '')
+        with self._lock:
+            self.outcomes[symbol] = outcome
+            self.latencies[symbol] = time.monotonic() - started
+
+    def report(self):
+        """Son taramanın veri çekme özeti (sonuç türü -> hisseler, sayaçlar, gecikme yüzdelikleri)"""
+        with self._lock:
+            by_outcome = {}
+            for ticker, outcome in self.outcomes.items():
+                by_outcome.setdefault(outcome, []).append(ticker)
+            latencies = np.array(list(self.latencies.values()))
+            return {
+                'outcomes': by_outcome,
+                'counters': dict(self.counters),
+                'latency': {name: float(np.percentile(latencies, q)) if len(latencies) else 0.0
+                            for name, q in (('p50', 50), ('p95', 95), ('max', 100))},
+                'breaker': self.breaker.state,
+            }
+
+    def print_report(self):
+        """Tekrar denenen, zaman aşımına uğrayan ve başarısız hisseleri yazdır"""
+        data = self.report()
+        counters, latency = data['counters'], data['latency']
+        print(f"📡 Veri çekme: {counters['requests']} istek, {counters['retries']} tekrar, "
+              f"{counters['timeouts']} zaman aşımı | hisse başına süre p50 {latency['p50']:.2f} sn, "
+              f"p95 {latency['p95']:.2f} sn, en fazla {latency['max']:.2f} sn")
+        labels = {'retried': "🔁 Tekrar denenip alınan", 'timed_out': "⏳ Zaman aşımı", 'failed': "❌ Başarısız",
+                  'circuit_open': "🔌 Devre kesici açık (atlandı)", 'deadline': "⌛ Tarama süresi doldu (atlandı)"}
+        for outcome, label in labels.items():
+            tickers = data['outcomes'].get(outcome)
+            if tickers:
+                print(f"   {label} ({len(tickers)}): {', '.join(sorted(tickers))}")
+        if data['breaker'] != 'closed':
+            print(f"   ⚠️ Devre kesici durumu: {data['breaker']}")
+
+def find_fetch_scheduler(provider):
+    """Sağlayıcı zincirindeki (örn: önbellek -> zamanlayıcı -> Yahoo) FetchScheduler'ı bul"""
+    while provider is not None:
+        if isinstance(provider, FetchScheduler):
+            return provider
+        provider = getattr(provider, 'provider', None)
+    return None
+
+def run_fetch_fault_test_cli(args):
+    """--fetch-test: hata ve gecikme enjekte eden yapay sağlayıcıyla zamanlayıcılı tarama yap ve raporla"""
+    names = [f"SYN{i:03d}" for i in range(args.synthetic or 40)]
+    provider = SyntheticDataProvider(
+        latency=0.02,
+        slow_tickers={names[0]: 3600},     # Takılan istek: süre sınırıyla kesilmeli
+        failing_tickers={names[1]},        # Kalıcı hata: tekrarlar tükenince başarısız
+        flaky_tickers={names[2]: 2},       # İlk iki istek geçici hata: tekrar ile alınmalı
+        fail_rate=args.fail_rate,
+    )
+    scheduler = FetchScheduler(provider, rate=50, burst=10, backoff=0.05, backoff_max=0.5, timeout=1.0)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        _, all_results = scan_and_filter_stocks(names, provider=scheduler, cache=False)
+    print(f"\n🧪 HATA ENJEKSİYONLU VERİ ÇEKME TESTİ: {len(names)} hisse, geçici hata oranı %{args.fail_rate * 100:.0f}")
+    print(f"{'='*80}")
+    print(f"✅ {len(all_results)}/{len(names)} hisse analiz edildi ({time.perf_counter() - start:.2f} sn)")
+    scheduler.print_report()
+
+# Varsayılan veri sağlayıcı (test için SyntheticDataProvider ile değiştirilebilir)
+# Zamanlayıcı önbelleğin altındadır: diskten gelen hisseler hız sınırına takılmaz
+_NETWORK_PROVIDER = FetchScheduler(YahooDataProvider()) if FETCH_SCHEDULER_ENABLED else YahooDataProvider()
+DATA_PROVIDER = CachedDataProvider(_NETWORK_PROVIDER) if CACHE_ENABLED else _NETWORK_PROVIDER
+
+# =============================================================================
+# HİSSE EVRENİ VE İKİ AŞAMALI TARAMA (ÖN ELEME)
+# =============================================================================
+
+def liquidity_tier(turnover):
+    """Günlük ortalama işlem hacmine (TL) göre likidite kademesi (1 = en likit)"""
+    for tier, threshold in enumerate(LIQUIDITY_TIERS, 1):
+        if turnover >= threshold:
+            return tier
+    return len(LIQUIDITY_TIERS) + 1
+
+class UniverseIndex:
+    """Taranan hisse evreni: son bilinen fiyat/hacim, ortalama günlük işlem hacmi (TL) ve likidite kademesi
+    
+    CACHE_DIR/UNIVERSE_FILE yoksa BIST100 listesiyle başlar; her ön elemede toplu fiyat/hacimle güncellenir.
+    Kademe gün başına bir kez (önceki günün ortalamasıyla) belirlenir, böylece gün içinde taranan evren
+    değişmez; dosyaya sadece kademe ya da evren değiştiğinde (veya --universe ile) yazılır.
+    """
+
+    def __init__(self, path=None, seed=BIST100_STOCKS):
+        self.path = os.path.join(CACHE_DIR, UNIVERSE_FILE) if path is None else path
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.entries = {ticker: {} for ticker in seed}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                pass  # Bozuk dosya - BIST100 listesiyle yeniden başlanır
+
+    def add(self, tickers):
+        with self._lock:
+            for ticker in tickers:
+                if ticker.upper() not in self.entries:
+                    self.entries[ticker.upper()] = {}
+                    self.dirty = True
+
+    def remove(self, tickers):
+        with self._lock:
+            for ticker in tickers:
+                if self.entries.pop(ticker.upper(), None) is not None:
+                    self.dirty = True
+
+    def observe(self, ticker, price, volume):
+        """Son fiyat/hacmi kaydet; ortalama işlem hacmi gün başına bir kez güncellenir (gün içi tekrarlar son değeri değiştirir)
+        
+        Kademe değiştiyse True döner (sadece gün değişiminde ya da kademesi olmayan hissede).
+        """
+        if price is None or volume is None or np.isnan(price) or np.isnan(volume):
+            return False
+        today = datetime.now().strftime('%Y-%m-%d')
+        turnover = float(price) * float(volume)
+        with self._lock:
+            entry = self.entries.setdefault(ticker.upper(), {})
+            new_day = entry.get('day') != today
+            if new_day:
+                entry['day'], entry['base'] = today, entry.get('turnover')
+            base = entry['base']
+            entry['turnover'] = turnover if base is None else \
+                base * (1 - UNIVERSE_TURNOVER_SMOOTHING) + turnover * UNIVERSE_TURNOVER_SMOOTHING
+            entry.update(price=float(price), volume=float(volume))
+            if 'tier' in entry and not new_day:
+                return False
+            tier = liquidity_tier(entry['turnover'] if base is None else base)
+            changed = entry.get('tier') != tier
+            entry['tier'] = tier
+            self.dirty = self.dirty or changed
+            return changed
+
+    def last_known(self, ticker):
+        """Son bilinen (fiyat, hacim) ya da None"""
+        entry = self.entries.get(ticker.upper(), {})
+        return (entry['price'], entry['volume']) if 'price' in entry else None
+
+    def tickers(self, max_tier=None):
+        """Evrendeki hisseler; max_tier verilirse daha az likit kademeler hariç (kademesi bilinmeyenler dahil)"""
+        return [ticker for ticker, entry in self.entries.items()
+                if max_tier is None or entry.get('tier', 1) <= max_tier]
+
+    def save(self, force=False):
+        """Evreni diske yaz (force=False ise sadece kademe ya da evren değiştiyse)"""
+        if not self.path or not (force or self.dirty):
+            return
+        with self._lock:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            # Daemon ve API aynı dosyaya yazabilir: her yazıcı kendi geçici dosyasını kullanır
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+UNIVERSE_INDEX = UniverseIndex()
+
+def default_universe():
+    """Hisse seçilmediğinde taranan evren (UNIVERSE_MAX_TIER kademesine kadar)"""
+    return UNIVERSE_INDEX.tickers(UNIVERSE_MAX_TIER) or list(BIST100_STOCKS)
+
+def describe_universe(tickers, selected=False):
+    """Taranan listenin başlıkta gösterilecek adı (örn: "BIST100 (128 hisse)", "Evren, kademe ≤ 3 (412 hisse)")"""
+    if selected:
+        name = "Seçilen"
+    elif set(tickers) == set(BIST100_STOCKS):
+        name = "BIST100"
+    else:
+        name = f"Evren, kademe ≤ {UNIVERSE_MAX_TIER}"
+    return f"{name} ({len(tickers)} hisse)"
+
+def prescreen_universe(tickers, provider=None):
+    """Aşama 1: tek toplu istekle son fiyat/hacmi al, PRESCREEN_CRITERIA ile ele -> (kalanlar, rapor)
+    
+    Toplu istek başarısız olursa evrendeki son bilinen değerler kullanılır; değeri bilinmeyen hisse elenmez.
+    """
+    provider = provider or DATA_PROVIDER
+    start = time.perf_counter()
+    quotes, source = {}, 'batch'
+    try:
+        with PROFILER.stage('prescreen'):
+            frame = provider.get_quotes([to_bist_ticker(ticker) for ticker in tickers])
+        for ticker in tickers:
+            bist_ticker = to_bist_ticker(ticker)
+            if bist_ticker in frame.index:
+                quotes[ticker] = (frame.at[bist_ticker, 'price'], frame.at[bist_ticker, 'volume'])
+                UNIVERSE_INDEX.observe(ticker, *quotes[ticker])
+        UNIVERSE_INDEX.save()  # Sadece kademe değiştiyse yazılır
+    except Exception as e:
+        print(f"⚠️ Toplu fiyat isteği başarısız ({e}), son bilinen değerler kullanılıyor.")
+        source = 'cached'
+        quotes = {ticker: UNIVERSE_INDEX.last_known(ticker) for ticker in tickers
+                  if UNIVERSE_INDEX.last_known(ticker)}
+    
+    known = [ticker for ticker in tickers if ticker in quotes]
+    columns = {field: np.full(len(known), np.nan) for field in RESULT_SCALAR_FIELDS}
+    columns['price'] = np.array([quotes[ticker][0] for ticker in known], dtype=float)
+    columns['volume'] = np.array([quotes[ticker][1] for ticker in known], dtype=float)
+    columns = filter_columns(columns)
+    pruned = {}
+    with np.errstate(invalid='ignore'):
+        for name in PRESCREEN_CRITERIA:
+            if name in active_filter_criteria():
+                for ticker, ok in zip(known, FILTER_CRITERIA[name](columns)):
+                    if not ok:
+                        pruned.setdefault(ticker, name)
+    PROFILER.count('pruned', len(pruned))
+    survivors = [ticker for ticker in tickers if ticker not in pruned]
+    return survivors, {'pruned': pruned, 'seconds': time.perf_counter() - start, 'source': source,
+                       'quoted': len(known), 'total': len(tickers)}
+
+def print_prescreen_report(report, deep_seconds, deep_count):
+    """Elenen hisse sayısını ve tahmini kazanılan süreyi yazdır (elenenler kalanların ortalama süresini alırdı)"""
+    pruned = report['pruned']
+    per_ticker = deep_seconds / deep_count if deep_count else 0.0
+    saved = per_ticker * len(pruned) - report['seconds']
+    by_criterion = {}
+    for name in pruned.values():
+        by_criterion[name] = by_criterion.get(name, 0) + 1
+    details = ", ".join(f"{name}: {count}" for name, count in by_criterion.items())
+    source = "toplu istek" if report['source'] == 'batch' else "son bilinen değerler"
+    print(f"⏭️  Ön eleme ({source}): {report['total']} hissenin {len(pruned)} tanesi elendi"
+          f"{f' ({details})' if details else ''} - ön eleme {report['seconds']:.2f} sn, "
+          f"tahmini kazanç ~{max(saved, 0):.1f} sn")
+
+def run_universe_cli(args):
+    """--universe: evreni (isteğe göre ekle/çıkar) güncel toplu fiyat/hacimle yenile ve kademeleriyle listele"""
+    if args.universe_add:
+        UNIVERSE_INDEX.add(ticker.strip() for ticker in args.universe_add.split(',') if ticker.strip())
+    if args.universe_remove:
+        UNIVERSE_INDEX.remove(ticker.strip() for ticker in args.universe_remove.split(',') if ticker.strip())
+    prescreen_universe(UNIVERSE_INDEX.tickers())
+    UNIVERSE_INDEX.save(force=True)  # Açık yenileme: güncel fiyat/hacim ve ortalamalar da kaydedilir
+    rows = []
+    for ticker, entry in sorted(UNIVERSE_INDEX.entries.items(), key=lambda item: -item[1].get('turnover', 0)):
+        rows.append({
+            "Hisse": ticker,
+            "Kademe": entry.get('tier', '-'),
+            "Ort. İşlem Hacmi (TL)": f"{entry['turnover']:,.0f}" if 'turnover' in entry else "-",
+            "Son Fiyat": f"{entry['price']:.2f}" if 'price' in entry else "-",
+            "Son Hacim": f"{entry['volume']:,.0f}" if 'volume' in entry else "-",
+            "Güncelleme": entry.get('day', '-'),
+        })
+    tiers = [entry.get('tier') for entry in UNIVERSE_INDEX.entries.values()]
+    print(f"\n🗂️  HİSSE EVRENİ ({len(rows)} hisse, {UNIVERSE_INDEX.path})")
+    print(f"{'='*100}")
+    print(pd.DataFrame(rows).to_string(index=False))
+    print("\n" + " | ".join(f"Kademe {tier}: {tiers.count(tier)}" for tier in range(1, len(LIQUIDITY_TIERS) + 2)) +
+          f" | Varsayılan taramaya dahil: kademe ≤ {UNIVERSE_MAX_TIER}")
+
+# =============================================================================
+# TARAMA ÖLÇÜMLERİ (AŞAMA SÜRELERİ VE SAYAÇLAR)
+# =============================================================================
+
+PROFILING_ENABLED = True  # Aşama süreleri ve sayaçlar toplanır (hisse başına birkaç mikrosaniye maliyet)
+PROFILE_REPORT = None     # Tarama sonunda yazılacak rapor (.prom -> Prometheus textfile, diğerleri -> JSON satırı)
+
+class ScanProfiler:
+    """Aşama ve hisse bazında duvar saati süresi ile sayaçları iş parçacığı güvenli şekilde toplar"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Yeni tarama için tüm ölçümleri sıfırla"""
+        with self._lock:
+            self.stages = {}    # aşama -> [çağrı, toplam sn, maksimum sn]
+            self.tickers = {}   # hisse -> {aşama: toplam sn}
+            self.counters = {}  # sayaç -> değer
+            self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, ticker=None):
+        """Bloğun süresini name aşamasına (ve verildiyse hisseye) ekle"""
+        if not PROFILING_ENABLED:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, ticker)
+
+    def record(self, name, elapsed, ticker=None):
+        with self._lock:
+            stats = self.stages.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            if ticker is not None:
+                per_ticker = self.tickers.setdefault(ticker, {})
+                per_ticker[name] = per_ticker.get(name, 0.0) + elapsed
+
+    def count(self, name, value=1):
+        """name sayacını value kadar artır (işlenen bar, bulunan pivot vb.)"""
+        if PROFILING_ENABLED:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """Ölçümlerin makine tarafından okunabilir kopyası"""
+        with self._lock:
+            return {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'wall_seconds': time.perf_counter() - self.started,
+                'stages': {name: {'calls': calls, 'total_seconds': total, 'max_seconds': longest}
+                           for name, (calls, total, longest) in self.stages.items()},
+                'counters': dict(self.counters),
+                'tickers': {ticker: dict(stages) for ticker, stages in self.tickers.items()},
+                'peak_rss_bytes': peak_rss_bytes(),
+            }
+
+    def print_summary(self, slowest=5):
+        """Aşama süreleri, sayaçlar ve en yavaş hisseleri yazdır"""
+        data = self.snapshot()
+        if not data['stages']:
+            return
+        print(f"\n⏱️  AŞAMA SÜRELERİ (toplam {data['wall_seconds']:.2f} sn)")
+        print(f"{'Aşama':<22} {'Çağrı':>7} {'Toplam (sn)':>12} {'Ort. (ms)':>10} {'Maks. (ms)':>11}")
+        for name, stats in sorted(data['stages'].items(), key=lambda item: -item[1]['total_seconds']):
+            average = stats['total_seconds'] / stats['calls'] * 1000
+            print(f"{name:<22} {stats['calls']:>7} {stats['total_seconds']:>12.3f} {average:>10.2f} "
+                  f"{stats['max_seconds']*1000:>11.2f}")
+        if data['counters']:
+            print("📈 Sayaçlar: " + ", ".join(f"{name}={value:,}" for name, value in data['counters'].items()))
+        if data['peak_rss_bytes']:
+            print(f"🧠 Tepe bellek (RSS, süreç başından beri): {data['peak_rss_bytes'] / 2**20:,.0f} MB")
+        totals = sorted(((sum(stages.values()), ticker) for ticker, stages in data['tickers'].items()), reverse=True)
+        if totals:
+            print(f"🐢 En yavaş {min(slowest, len(totals))} hisse: " +
+                  ", ".join(f"{ticker} {total:.2f} sn" for total, ticker in totals[:slowest]))
+
+    def write_report(self, path):
+        """Raporu .prom uzantısında Prometheus textfile, aksi halde JSON satırı olarak yaz"""
+        data = self.snapshot()
+        if path.endswith('.prom'):
+            lines = [
+                "# HELP bist_scan_stage_seconds Son taramada aşama bazında toplam süre (sn)",
+                "# TYPE bist_scan_stage_seconds gauge",
+            ]
+            lines += [f'bist_scan_stage_seconds{{stage="{name}"}} {stats["total_seconds"]:.6f}'
+                      for name, stats in data['stages'].items()]
+            lines += ["# HELP bist_scan_stage_calls Son taramada aşama bazında çağrı sayısı",
+                      "# TYPE bist_scan_stage_calls gauge"]
+            lines += [f'bist_scan_stage_calls{{stage="{name}"}} {stats["calls"]}'
+                      for name, stats in data['stages'].items()]
+            lines += ["# HELP bist_scan_events Son taramanın sayaçları", "# TYPE bist_scan_events gauge"]
+            lines += [f'bist_scan_events{{name="{name}"}} {value}' for name, value in data['counters'].items()]
+            lines += ["# HELP bist_scan_wall_seconds Son taramanın toplam süresi (sn)",
+                      "# TYPE bist_scan_wall_seconds gauge", f"bist_scan_wall_seconds {data['wall_seconds']:.6f}"]
+            if data['peak_rss_bytes']:
+                lines += ["# HELP bist_process_peak_rss_bytes Süreç başından beri en yüksek yerleşik bellek (bayt)",
+                          "# TYPE bist_process_peak_rss_bytes gauge", f"bist_process_peak_rss_bytes {data['peak_rss_bytes']}"]
+            # Textfile toplayıcı yarım dosya okumasın diye önce geçici dosyaya yazılır
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, path)
+        else:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+def peak_rss_bytes():
+    """Sürecin şimdiye kadarki en yüksek yerleşik bellek kullanımı (ölçülemiyorsa None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux'ta KB, macOS'ta bayt
+
+PROFILER = ScanProfiler()
+
 def calculate_rsi(prices, period=14):
     """RSI hesaplama fonksiyonu"""
     delta = prices.diff()
@@ -123,8 +1056,113 @@ def calculate_support_strength(prices, support_level, window=20):
     strength = (bounces / touches) * min(touches, 5)  # Max 5 puan
     return min(strength, 5)  # 0-5 arası güç skoru
 
+def calculate_support_strengths(prices, levels, window=20):
+    """calculate_support_strength ile aynı skoru tüm seviyeler için tek seferde (vektörel) hesapla"""
+    values = np.asarray(prices, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    n = len(values)
+    
+    # Son `window` bar (i > 0 koşulu korunarak) ve her barda bir sonraki güne yukarı sıçrama
+    idx = np.arange(max(n - window, 1), n)
+    recent = values[idx]
+    bounced = np.zeros(len(idx), dtype=bool)
+    bounced[:-1] = values[idx[:-1] + 1] > recent[:-1]
+    
+    # Seviye x bar dokunma matrisi (%2 tolerans)
+    touched = np.abs(recent[None, :] - levels[:, None]) <= (levels * 0.02)[:, None]
+    touches = touched.sum(axis=1)
+    bounces = (touched & bounced[None, :]).sum(axis=1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strengths = np.minimum((bounces / touches) * np.minimum(touches, 5), 5)
+    return np.where(touches == 0, 0.0, strengths)
+
 def find_support_resistance_levels(prices, window=20):
-    """Geliştirilmiş destek ve direnç seviyelerini bul - 3 seviye + güç analizi"""
+    """Geliştirilmiş destek ve direnç seviyelerini bul - 3 seviye + güç analizi (NumPy ile vektörel)"""
+    values = np.asarray(prices, dtype=float)
+    n = len(values)
+    supports = []
+    resistances = []
+    
+    if n > 2 * window:
+        # i merkezli [i-window, i+window) penceresinin min/max değerleri tek geçişte
+        centers = np.arange(window, n - window)
+        windows = np.lib.stride_tricks.sliding_window_view(values, 2 * window)[:len(centers)]
+        center_values = values[centers]
+        
+        # Yerel minimum (destek) ve yerel maksimum (direnç); NaN'lar pandas min/max gibi atlanır
+        support_values = center_values[center_values == np.fmin.reduce(windows, axis=1)]
+        resistance_values = center_values[center_values == np.fmax.reduce(windows, axis=1)]
+        PROFILER.count('pivots', len(support_values) + len(resistance_values))
+        
+        support_strengths = calculate_support_strengths(values, support_values, window)
+        resistance_strengths = calculate_support_strengths(values, resistance_values, window)
+        supports = list(zip(support_values, support_strengths.tolist()))
+        resistances = list(zip(resistance_values, resistance_strengths.tolist()))
+    
+    # Güçlü seviyeler öncelikli olmak üzere sırala
+    supports = sorted(supports, key=lambda x: (-x[1], -x[0]))  # Güce göre, sonra fiyata göre
+    resistances = sorted(resistances, key=lambda x: (-x[1], x[0]))  # Güce göre, sonra fiyata göre
+    
+    # En güçlü 3 seviyeyi al
+    top_supports = supports[:SUPPORT_RESISTANCE_COUNT]
+    top_resistances = resistances[:SUPPORT_RESISTANCE_COUNT]
+    
+    return top_supports, top_resistances
+
+def find_volume_profile_levels(prices, volume, current_price=None, bins=None):
+    """Hacim-fiyat profilinden destek/direnç: yüksek hacimli düğümler (np.bincount ile tek geçiş)
+    
+    Seviye fiyatı kutudaki hacim ağırlıklı ortalama fiyattır, güç (0-5) düğüm hacminin en yüksek düğüme
+    oranıdır. Güncel fiyatın altındaki düğümler destek, üstündekiler direnç sayılır.
+    """
+    values = np.asarray(prices, dtype=float)
+    weights = np.nan_to_num(np.asarray(volume, dtype=float))
+    priced = values[~np.isnan(values)]
+    if current_price is None and len(priced):
+        current_price = priced[-1]  # Son kapanış NaN olabilir (örn. seans içi eksik bar) - son geçerli fiyat
+    valid = ~np.isnan(values) & (weights > 0)
+    values, weights = values[valid], weights[valid]
+    if len(values) < 2 or values.max() <= values.min():
+        return [], []
+    
+    bins = bins or VOLUME_PROFILE_BINS
+    low, high = values.min(), values.max()
+    index = np.minimum(((values - low) / (high - low) * bins).astype(np.int64), bins - 1)
+    profile = np.bincount(index, weights=weights, minlength=bins)
+    price_volume = np.bincount(index, weights=values * weights, minlength=bins)
+    
+    # Yüksek hacim düğümü: komşu kutulardan büyük (düzlükte en sağdaki) ve yeterli paya sahip kutu
+    padded = np.concatenate(([-1.0], profile, [-1.0]))
+    nodes = np.flatnonzero((profile >= padded[:-2]) & (profile > padded[2:]) &
+                           (profile >= VOLUME_PROFILE_MIN_SHARE * profile.sum()))
+    PROFILER.count('pivots', len(nodes))
+    levels = price_volume[nodes] / profile[nodes]
+    strengths = 5.0 * profile[nodes] / profile.max()
+    
+    supports = [(level, strength) for level, strength in zip(levels.tolist(), strengths.tolist())
+                if level <= current_price]
+    resistances = [(level, strength) for level, strength in zip(levels.tolist(), strengths.tolist())
+                   if level > current_price]
+    supports = sorted(supports, key=lambda x: (-x[1], -x[0]))
+    resistances = sorted(resistances, key=lambda x: (-x[1], x[0]))
+    return supports[:SUPPORT_RESISTANCE_COUNT], resistances[:SUPPORT_RESISTANCE_COUNT]
+
+# Destek/direnç motoru adı -> (kapanış, hacim, güncel fiyat) alan arama fonksiyonu
+SR_ENGINES = {
+    'pivot': lambda close, volume, current_price: find_support_resistance_levels(close),
+    'volume_profile': find_volume_profile_levels,
+}
+
+def support_resistance_levels(close, volume=None, current_price=None):
+    """SR_ENGINE ayarındaki motorla destek/direnç seviyeleri (hacim yoksa pivot araması kullanılır)"""
+    if SR_ENGINE not in SR_ENGINES:
+        raise ValueError(f"Bilinmeyen destek/direnç motoru: {SR_ENGINE} (seçenekler: {', '.join(SR_ENGINES)})")
+    engine = SR_ENGINES[SR_ENGINE] if volume is not None else SR_ENGINES['pivot']
+    return engine(close, volume, current_price)
+
+def _find_support_resistance_levels_loop(prices, window=20):
+    """Eski döngü tabanlı destek/direnç araması - karşılaştırma ve benchmark referansı"""
     supports = []
     resistances = []
     
@@ -139,15 +1177,33 @@ def find_support_resistance_levels(prices, window=20):
             strength = calculate_support_strength(prices, prices.iloc[i], window)
             resistances.append((prices.iloc[i], strength))
     
-    # Güçlü seviyeler öncelikli olmak üzere sırala
-    supports = sorted(supports, key=lambda x: (-x[1], -x[0]))  # Güce göre, sonra fiyata göre
-    resistances = sorted(resistances, key=lambda x: (-x[1], x[0]))  # Güce göre, sonra fiyata göre
-    
-    # En güçlü 3 seviyeyi al
-    top_supports = supports[:SUPPORT_RESISTANCE_COUNT]
-    top_resistances = resistances[:SUPPORT_RESISTANCE_COUNT]
+    supports = sorted(supports, key=lambda x: (-x[1], -x[0]))
+    resistances = sorted(resistances, key=lambda x: (-x[1], x[0]))
     
-    return top_supports, top_resistances
+    return supports[:SUPPORT_RESISTANCE_COUNT], resistances[:SUPPORT_RESISTANCE_COUNT]
+
+def benchmark_support_resistance(lengths=None, repeats=3):
+    """Döngü ve vektörel destek/direnç aramasını ve hacim profilini 6 ay, 2 yıl ve 10 yıllık serilerde karşılaştır"""
+    lengths = lengths or {'6 ay': 126, '2 yıl': 504, '10 yıl': 2520}
+    print(f"{'Seri':<8} {'Bar':>6} {'Döngü (ms)':>12} {'Vektörel (ms)':>14} {'Hızlanma':>10} {'Aynı':>6} "
+          f"{'Hacim profili (ms)':>19}")
+    for label, n_bars in lengths.items():
+        hist = generate_synthetic_ohlcv("BENCH", n_bars)
+        close = hist['Close']
+        timings = {}
+        outputs = {}
+        for name, func in (('loop', _find_support_resistance_levels_loop), ('vector', find_support_resistance_levels),
+                           ('volume_profile', lambda close: find_volume_profile_levels(close, hist['Volume']))):
+            best = float('inf')
+            for _ in range(repeats):
+                start = time.perf_counter()
+                outputs[name] = func(close)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best * 1000
+        same = outputs['loop'] == outputs['vector']
+        print(f"{label:<8} {n_bars:>6} {timings['loop']:>12.2f} {timings['vector']:>14.2f} "
+              f"{timings['loop'] / timings['vector']:>9.1f}x {'✅' if same else '❌':>5} "
+              f"{timings['volume_profile']:>19.2f}")
 
 def check_volume_increase(volume, days=VOLUME_LOOKBACK_DAYS):
     """Geliştirilmiş hacim artış kontrolü - son N günlük ortalama ile karşılaştır"""
@@ -176,219 +1232,647 @@ def check_macd_crossover(macd_line, signal_line, lookback=5):
                 return True
     return False
 
-def analyze_stock_comprehensive(ticker):
-    """Kapsamlı hisse analizi"""
-    try:
-        bist_ticker = ticker.strip().upper()
-        if not bist_ticker.endswith('.IS'):
-            bist_ticker += '.IS'
-        
-        stock = yf.Ticker(bist_ticker)
-        hist = stock.history(period="6mo")
-        
-        if len(hist) < 50:
-            return None
-        
-        close = hist['Close']
-        high = hist['High']
-        low = hist['Low']
-        volume = hist['Volume']
-        
-        # Temel veriler
-        current_price = close.iloc[-1]
-        current_volume = volume.iloc[-1]
-        
-        # Geliştirilmiş hacim artış kontrolü
-        volume_increase = check_volume_increase(volume)
-        
-        # EMA hesaplamaları
-        ema_20 = calculate_ema(close, 20).iloc[-1]
-        ema_50 = calculate_ema(close, 50).iloc[-1] if len(close) >= 50 else None
-        
-        # RSI
-        rsi = calculate_rsi(close).iloc[-1]
-        
-        # MACD
-        macd_line, signal_line, histogram = calculate_macd(close)
-        current_macd = macd_line.iloc[-1]
-        current_signal = signal_line.iloc[-1]
-        current_histogram = histogram.iloc[-1]
-        macd_crossover = check_macd_crossover(macd_line, signal_line)
-        
-        # ATR
-        atr = calculate_atr(high, low, close).iloc[-1]
-        atr_percent = (atr / current_price) * 100
-        
-        # Geliştirilmiş destek ve direnç seviyeleri (güç analizi ile)
-        supports_with_strength, resistances_with_strength = find_support_resistance_levels(close)
-        
-        # Destek ve direnç uzaklıkları
-        support_distances = []
-        resistance_distances = []
-        
-        for support_price, strength in supports_with_strength:
-            distance = ((current_price - support_price) / support_price) * 100
-            support_distances.append(distance)
-        
-        for resistance_price, strength in resistances_with_strength:
-            distance = ((resistance_price - current_price) / current_price) * 100
-            resistance_distances.append(distance)
-        
-        # En yakın destek ve direnç
-        nearest_support = supports_with_strength[0][0] if supports_with_strength else None
-        nearest_resistance = resistances_with_strength[0][0] if resistances_with_strength else None
+# =============================================================================
+# PANEL (HİSSE x BAR) GÖSTERGE ÇEKİRDEKLERİ
+# =============================================================================
+
+PANEL_INDICATORS = False  # True ise tarama göstergeleri tüm evren için tek bir NumPy panelinde hesaplar
+
+def build_price_panel(histories, align='bars'):
+    """{hisse: DataFrame} sözlüğünü (hisse x bar) hizalı NumPy paneline çevir
+    
+    align='bars': Seriler sağdan (son bara göre) hizalanır, kısa seriler soldan NaN ile doldurulur.
+                  Her satır tek hisse hesaplamasıyla birebir aynı sonucu verir.
+    align='dates': Seriler tarih birleşimine göre hizalanır, eksik günler NaN olur (backtest için).
+    """
+    tickers = list(histories)
+    columns = ('Open', 'High', 'Low', 'Close', 'Volume')
+    if align == 'dates':
+        index = pd.DatetimeIndex([])
+        for hist in histories.values():
+            index = index.union(hist.index)
+        frames = [histories[t].reindex(index) for t in tickers]
+        lengths = np.array([len(histories[t]) for t in tickers])
+    else:
+        index = None
+        lengths = np.array([len(histories[t]) for t in tickers], dtype=int)
+        frames = [histories[t] for t in tickers]
+    
+    width = len(index) if index is not None else (lengths.max() if len(lengths) else 0)
+    panel = {'tickers': tickers, 'index': index, 'lengths': lengths}
+    for column in columns:
+        data = np.full((len(tickers), width), np.nan)
+        for row, frame in enumerate(frames):
+            values = frame[column].to_numpy(dtype=float)
+            data[row, width - len(values):] = values
+        panel[column] = data
+    return panel
+
+def ema_panel(values, span):
+    """pandas ewm(span=span).mean() (adjust=True, ignore_na=False) ile birebir aynı EMA - her satır bir hisse"""
+    values = np.asarray(values, dtype=float)
+    alpha = 2.0 / (span + 1.0)
+    old_wt_factor = 1.0 - alpha
+    out = np.empty_like(values)
+    
+    weighted = values[:, 0].copy()
+    old_wt = np.ones(len(values))
+    out[:, 0] = weighted
+    for i in range(1, values.shape[1]):
+        current = values[:, i]
+        observed = ~np.isnan(current)
+        started = ~np.isnan(weighted)
         
-        return {
-            'ticker': ticker.upper(),
-            'price': current_price,
-            'volume': current_volume,
-            'volume_increase': volume_increase,
-            'rsi': rsi,
-            'ema_20': ema_20,
-            'ema_50': ema_50,
-            'macd': current_macd,
-            'signal': current_signal,
-            'histogram': current_histogram,
-            'macd_crossover': macd_crossover,
-            'atr_percent': atr_percent,
-            'supports_with_strength': supports_with_strength,
-            'resistances_with_strength': resistances_with_strength,
-            'support_distances': support_distances,
-            'resistance_distances': resistance_distances,
-            'nearest_support': nearest_support,
-            'nearest_resistance': nearest_resistance
-        }
+        # Seri başladıktan sonra NaN günlerde de ağırlık azalır (ignore_na=False)
+        old_wt = np.where(started, old_wt * old_wt_factor, old_wt)
+        update = started & observed
+        blended = (old_wt * weighted + current) / (old_wt + 1.0)
+        weighted = np.where(update & (weighted != current), blended, weighted)
+        old_wt = np.where(update, old_wt + 1.0, old_wt)
         
+        # İlk gözlem: ağırlıklı değer doğrudan gözlem olur
+        first = ~started & observed
+        weighted = np.where(first, current, weighted)
+        old_wt = np.where(first, 1.0, old_wt)
+        out[:, i] = weighted
+    return out
+
+def rolling_mean_panel(values, window):
+    """pandas rolling(window).mean() karşılığı - pencerede NaN varsa sonuç NaN"""
+    values = np.asarray(values, dtype=float)
+    out = np.full_like(values, np.nan)
+    if values.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+        out[:, window - 1:] = windows.mean(axis=2)
+    return out
+
+def rsi_panel(close, period=14):
+    """calculate_rsi'nin panel karşılığı (her satır kendi ilk geçerli barından başlar, bar bar aynı sonuç)"""
+    delta = np.diff(close, axis=1, prepend=np.nan)
+    # Soldaki dolgu NaN kalır (ortalama dolguda "ısınmasın"); ilk geçerli barın NaN farkı pandas'taki gibi 0 sayılır
+    padding = np.logical_and.accumulate(np.isnan(close), axis=1)
+    gain = rolling_mean_panel(np.where(padding, np.nan, np.where(delta > 0, delta, 0.0)), period)
+    loss = rolling_mean_panel(np.where(padding, np.nan, np.where(delta < 0, -delta, 0.0)), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
+
+def macd_panel(close, fast=12, slow=26, signal=9):
+    """calculate_macd'nin panel karşılığı"""
+    macd_line = ema_panel(close, fast) - ema_panel(close, slow)
+    signal_line = ema_panel(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+def atr_panel(high, low, close, period=14):
+    """calculate_atr'nin panel karşılığı (ara DataFrame oluşturmadan)"""
+    prev_close = np.concatenate((np.full((len(close), 1), np.nan), close[:, :-1]), axis=1)
+    true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    return rolling_mean_panel(true_range, period)
+
+def compute_indicator_panel(panel):
+    """Tüm evren için RSI, EMA20/50, MACD ve ATR'yi tek vektörel geçişte hesapla"""
+    close = panel['Close']
+    macd_line, signal_line, histogram = macd_panel(close)
+    return {
+        'rsi': rsi_panel(close),
+        'ema_20': ema_panel(close, 20),
+        'ema_50': ema_panel(close, 50),
+        'macd': macd_line,
+        'signal': signal_line,
+        'histogram': histogram,
+        'atr': atr_panel(panel['High'], panel['Low'], close),
+    }
+
+def macd_crossover_panel(macd_line, signal_line, lookback=5):
+    """check_macd_crossover'ın panel karşılığı - son lookback bar içinde yukarı kesişim"""
+    cross = (macd_line[:, :-1] < signal_line[:, :-1]) & (macd_line[:, 1:] > signal_line[:, 1:])
+    return cross[:, -lookback:].any(axis=1)
+
+def volume_increase_panel(volume, days=VOLUME_LOOKBACK_DAYS):
+    """check_volume_increase'in panel karşılığı - son gün / önceki N gün ortalaması"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_volume = np.nanmean(volume[:, -(days + 1):-1], axis=1)
+        ratio = volume[:, -1] / avg_volume
+    return np.where(avg_volume == 0, 1.0, ratio)
+
+# =============================================================================
+# ANALİZ SONUCU ÖNBELLEĞİ
+# =============================================================================
+
+class ResultCache:
+    """Hisse, son bar, veri özeti ve parametrelerle anahtarlanan, boyutu sınırlı LRU sonuç önbelleği"""
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, path=RESULT_CACHE_FILE):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = path is None
+        self._dirty = False
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(ticker, hist, full_diagnostics):
+        """Sonucu belirleyen her şey: hisse, son bar zamanı, OHLCV özeti ve ilgili parametreler"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(hist.index.asi8).tobytes())
+        digest.update(np.ascontiguousarray(hist[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(float)).tobytes())
+        return (ticker.upper(), hist.index[-1] if len(hist) else None, digest.hexdigest(),
+                full_diagnostics) + result_parameters(full_diagnostics)
+
+    def get(self, key):
+        self._load()
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+        return dict(result)  # Çağıran sonucu değiştirse bile önbellekteki kopya bozulmasın
+
+    def put(self, key, result):
+        self._load()
+        with self._lock:
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+            self._dirty = True
+
+    def _load(self):
+        """Dosyadaki sonuçları ilk kullanımda yükle (bozuk veya uyumsuz dosya yok sayılır)"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, 'rb') as f:
+                    entries = pickle.load(f)
+            except Exception:
+                return
+            for key, result in list(entries.items())[-self.max_entries:]:
+                self._entries[key] = result
+
+    def save(self):
+        """Değişiklik varsa sonuçları dosyaya atomik olarak yaz"""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self._entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def clear(self):
+        """Bellekteki ve dosyadaki tüm sonuçları sil"""
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._dirty = False
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def print_stats(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        if lookups:
+            print(f"🗃️  Sonuç önbelleği: {self.stats['hits']} isabet, {self.stats['misses']} ıskalama "
+                  f"(%{self.stats['hits'] / lookups * 100:.0f}), {len(self._entries)} kayıt, "
+                  f"{self.stats['evictions']} tahliye")
+
+def result_parameters(full_diagnostics):
+    """Sonucu etkileyen parametreler: gösterge periyotları (fonksiyon varsayılanları), destek/direnç sayısı
+    ve kısmi sonuçlarda filtre eşikleri (hat ilk elenen kriterde durduğu için)"""
+    params = (SUPPORT_RESISTANCE_COUNT, VOLUME_LOOKBACK_DAYS) + tuple(
+        func.__defaults__ for func in (calculate_rsi, calculate_macd, calculate_atr, check_volume_increase,
+                                       check_macd_crossover, find_support_resistance_levels)) + (
+        SR_ENGINE, VOLUME_PROFILE_BINS, VOLUME_PROFILE_MIN_SHARE)
+    if not full_diagnostics:
+        params += tuple(globals()[name] for name in tuple(FILTER_THRESHOLDS) + tuple(FILTER_TOGGLES.values()))
+    return params
+
+RESULT_CACHE = ResultCache() if RESULT_CACHE_ENABLED else None
+
+def to_bist_ticker(ticker):
+    """Hisse kodunu Yahoo Finance BIST formatına çevir (örn: THYAO -> THYAO.IS)"""
+    bist_ticker = ticker.strip().upper()
+    if not bist_ticker.endswith('.IS'):
+        bist_ticker += '.IS'
+    return bist_ticker
+
+def fetch_history(ticker, provider=None, period=None, interval="1d"):
+    """Hissenin geçmiş verisini sağlayıcıdan çek (hata durumunda None)"""
+    provider = provider or DATA_PROVIDER
+    period = period or HISTORY_PERIOD
+    try:
+        with PROFILER.stage('fetch', ticker):
+            if interval == "1d":
+                hist = provider.get_history(to_bist_ticker(ticker), period=period)
+            else:
+                hist = provider.get_history(to_bist_ticker(ticker), period=period, interval=interval)
+        PROFILER.count('bars', len(hist))
+        return hist
     except Exception as e:
         print(f"Hata {ticker}: {e}")
         return None
 
-def check_new_filters(stock):
-    """Yeni filtrelere göre hisse kontrolü"""
-    if not stock:
-        return False
-    
-    # Fiyat filtreleri
-    if not (MIN_PRICE <= stock['price'] <= MAX_PRICE):
-        return False
-    
-    # Minimum hacim kontrolü
-    if stock['volume'] < MIN_VOLUME:
-        return False
+def analyze_stock_comprehensive(ticker, provider=None, full_diagnostics=True, cache=None):
+    """Kapsamlı hisse analizi (aynı veri ve parametrelerle önceden hesaplanmışsa sonuç önbellekten gelir)
     
-    # RSI filtreleri (40-60 arası, >60 ise alma)
-    if not (MIN_RSI <= stock['rsi'] <= MAX_RSI):
-        return False
-    
-    # MACD crossover kontrolü
-    if MACD_CROSSOVER and not stock['macd_crossover']:
-        return False
+    cache=None varsayılan RESULT_CACHE'i, cache=False önbelleksiz hesaplamayı seçer.
+    """
+    hist = fetch_history(ticker, provider)
+    if hist is None:
+        return None
+    return analyze_cached(ticker, hist, full_diagnostics, cache)
+
+def analyze_cached(ticker, hist, full_diagnostics=True, cache=None):
+    """analyze_history'yi sonuç önbelleği üzerinden çalıştır (hata durumunda None)"""
+    cache = RESULT_CACHE if cache is None else cache
+    if cache:
+        key = cache.key(ticker, hist, full_diagnostics)
+        result = cache.get(key)
+        PROFILER.count('cache_hits' if result is not None else 'cache_misses')
+        if result is not None:
+            return result
+    try:
+        result = analyze_history(ticker, hist, full_diagnostics)
+    except Exception as e:
+        print(f"Hata {ticker}: {e}")
+        return None
+    if cache and result is not None:
+        cache.put(key, result)
+    return result
+
+def analyze_history(ticker, hist, full_diagnostics=True):
+    """Önceden çekilmiş OHLCV verisi üzerinde göstergeleri hesapla
     
-    # MACD histogram pozitif kontrolü
-    if MACD_HISTOGRAM_POSITIVE and stock['histogram'] <= 0:
-        return False
+    full_diagnostics=False ise filtreler ucuzdan pahalıya sırayla çalışır, ilk elenen kriterde
+    durulur ve göstergeler sadece hayatta kalan hisse için gerektiğinde hesaplanır.
+    """
+    if len(hist) < 50:
+        return None
     
+    result = {'ticker': ticker.upper()}
+    if full_diagnostics:
+        compute_indicators(hist, result, INDICATORS)
+        return result
+    return run_filter_pipeline(hist, result)
+
+def _indicator_quote(hist, result):
+    # Temel veriler
+    return {'price': hist['Close'].iloc[-1], 'volume': hist['Volume'].iloc[-1]}
+
+def _indicator_volume_increase(hist, result):
     # Geliştirilmiş hacim artış kontrolü
-    if stock['volume_increase'] < VOLUME_INCREASE_MIN:
-        return False
-    
-    # EMA20 > EMA50 kontrolü
-    if EMA20_ABOVE_EMA50 and stock['ema_50']:
-        if stock['ema_20'] <= stock['ema_50']:
-            return False
+    return {'volume_increase': check_volume_increase(hist['Volume'])}
+
+def _indicator_rsi(hist, result):
+    # RSI
+    return {'rsi': calculate_rsi(hist['Close']).iloc[-1]}
+
+def _indicator_ema(hist, result):
+    # EMA hesaplamaları
+    close = hist['Close']
+    return {
+        'ema_20': calculate_ema(close, 20).iloc[-1],
+        'ema_50': calculate_ema(close, 50).iloc[-1] if len(close) >= 50 else None,
+    }
+
+def _indicator_macd(hist, result):
+    # MACD
+    macd_line, signal_line, histogram = calculate_macd(hist['Close'])
+    return {
+        'macd': macd_line.iloc[-1],
+        'signal': signal_line.iloc[-1],
+        'histogram': histogram.iloc[-1],
+        'macd_crossover': check_macd_crossover(macd_line, signal_line),
+    }
+
+def _indicator_atr(hist, result):
+    # ATR
+    atr = calculate_atr(hist['High'], hist['Low'], hist['Close']).iloc[-1]
+    return {'atr_percent': (atr / result['price']) * 100}
+
+def _indicator_levels(hist, result):
+    return analyze_levels(hist['Close'], result['price'], hist['Volume'])
+
+# Gösterge adı -> hesaplama fonksiyonu, önce hesaplanması gereken göstergeler ve ürettiği sonuç alanları
+INDICATORS = {
+    'quote': {'compute': _indicator_quote, 'requires': (), 'fields': ('price', 'volume')},
+    'volume_increase': {'compute': _indicator_volume_increase, 'requires': (), 'fields': ('volume_increase',)},
+    'rsi': {'compute': _indicator_rsi, 'requires': (), 'fields': ('rsi',)},
+    'ema': {'compute': _indicator_ema, 'requires': (), 'fields': ('ema_20', 'ema_50')},
+    'macd': {'compute': _indicator_macd, 'requires': (),
+             'fields': ('macd', 'signal', 'histogram', 'macd_crossover')},
+    'atr': {'compute': _indicator_atr, 'requires': ('quote',), 'fields': ('atr_percent',)},
+    'levels': {'compute': _indicator_levels, 'requires': ('quote',),
+               'fields': ('supports_with_strength', 'resistances_with_strength', 'support_distances',
+                          'resistance_distances', 'nearest_support', 'nearest_resistance')},
+}
+
+def compute_indicators(hist, result, names, computed=None):
+    """İstenen göstergeleri (ve bağımlılıklarını) henüz hesaplanmamışsa hesaplayıp sonuca ekle"""
+    computed = computed if computed is not None else set()
+    for name in names:
+        if name in computed:
+            continue
+        compute_indicators(hist, result, INDICATORS[name]['requires'], computed)
+        with PROFILER.stage('support_resistance' if name == 'levels' else 'indicators', result['ticker']):
+            result.update(INDICATORS[name]['compute'](hist, result))
+        computed.add(name)
+    return computed
+
+def panel_last_values(panel):
+    """Panelin son barındaki skaler sonuç alanları (alan -> hisse başına değer dizisi)"""
+    indicators = compute_indicator_panel(panel)
+    current_price = panel['Close'][:, -1]
+    return {
+        'price': current_price,
+        'volume': panel['Volume'][:, -1],
+        'volume_increase': volume_increase_panel(panel['Volume']),
+        'rsi': indicators['rsi'][:, -1],
+        'ema_20': indicators['ema_20'][:, -1],
+        'ema_50': indicators['ema_50'][:, -1],
+        'macd': indicators['macd'][:, -1],
+        'signal': indicators['signal'][:, -1],
+        'histogram': indicators['histogram'][:, -1],
+        'macd_crossover': macd_crossover_panel(indicators['macd'], indicators['signal']),
+        'atr_percent': (indicators['atr'][:, -1] / current_price) * 100,
+    }
+
+def analyze_panel(panel):
+    """Panel göstergeleriyle tüm hisseleri tek seferde analiz et (align='bars' panelde analyze_history ile aynı sonuç)"""
+    values = panel_last_values(panel)
+    close = panel['Close']
     
-    # Fiyat EMA20'ye yakın kontrolü (daha sıkı %3)
-    if PRICE_NEAR_EMA20:
-        price_ema20_distance = abs(stock['price'] - stock['ema_20']) / stock['ema_20']
-        if price_ema20_distance > MAX_PRICE_EMA20_DISTANCE:
-            return False
+    results = []
+    for row, ticker in enumerate(panel['tickers']):
+        length = panel['lengths'][row]
+        if length < 50:
+            continue
+        result = {'ticker': ticker.upper()}
+        result.update({field: column[row] for field, column in values.items()})
+        result['macd_crossover'] = bool(result['macd_crossover'])
+        start = close.shape[1] - length
+        result.update(analyze_levels(close[row, start:], result['price'], panel['Volume'][row, start:]))
+        results.append(result)
+    return results
+
+def analyze_levels(close, current_price, volume=None):
+    """Destek/direnç seviyelerini, uzaklıklarını ve en yakın seviyeleri hesapla"""
+    # Geliştirilmiş destek ve direnç seviyeleri (güç analizi ile, SR_ENGINE motoruyla)
+    supports_with_strength, resistances_with_strength = support_resistance_levels(close, volume, current_price)
     
-    # ATR kontrolü
-    if not (MIN_ATR_PERCENT <= stock['atr_percent'] <= MAX_ATR_PERCENT):
-        return False
+    # Destek ve direnç uzaklıkları
+    support_distances = []
+    resistance_distances = []
     
-    # Destek yakınlığı kontrolü
-    if NEAR_SUPPORT and stock['nearest_support']:
-        support_distance = abs(stock['price'] - stock['nearest_support']) / stock['nearest_support']
-        if support_distance > MAX_SUPPORT_DISTANCE:
-            return False
+    for support_price, strength in supports_with_strength:
+        distance = ((current_price - support_price) / support_price) * 100
+        support_distances.append(distance)
     
-    # Stop-loss mesafesi kontrolü (gerçekçi %4)
-    if stock['nearest_support']:
-        stop_loss_distance = (stock['price'] - stock['nearest_support']) / stock['price']
-        if stop_loss_distance > MAX_STOP_LOSS_DISTANCE:
-            return False
+    for resistance_price, strength in resistances_with_strength:
+        distance = ((resistance_price - current_price) / current_price) * 100
+        resistance_distances.append(distance)
     
-    # Direnç potansiyeli kontrolü (daha gerçekçi %6)
-    if RESISTANCE_POTENTIAL and stock['nearest_resistance']:
-        resistance_distance = (stock['nearest_resistance'] - stock['price']) / stock['price']
-        if resistance_distance > MAX_RESISTANCE_DISTANCE:
-            return False
+    # En yakın destek ve direnç
+    nearest_support = supports_with_strength[0][0] if supports_with_strength else None
+    nearest_resistance = resistances_with_strength[0][0] if resistances_with_strength else None
     
-    return True
-
-def calculate_proximity_score(stock):
-    """Hissenin kriterlere ne kadar yakın olduğunu hesapla"""
-    score = 0
-    max_score = 0
-    
-    # RSI skoru
-    max_score += 1
-    if MIN_RSI <= stock['rsi'] <= MAX_RSI:
-        score += 1
-    else:
-        if stock['rsi'] < MIN_RSI:
-            distance = MIN_RSI - stock['rsi']
-            score += max(0, 1 - distance/20)
-        else:
-            distance = stock['rsi'] - MAX_RSI
-            score += max(0, 1 - distance/20)
-    
-    # MACD crossover skoru
-    max_score += 1
-    if stock['macd_crossover']:
-        score += 1
-    else:
-        score += 0.3
-    
-    # MACD histogram skoru
-    max_score += 1
-    if stock['histogram'] > 0:
-        score += 1
-    else:
-        score += 0.3
-    
-    # Hacim artış skoru
-    max_score += 1
-    if stock['volume_increase'] >= VOLUME_INCREASE_MIN:
-        score += 1
-    else:
-        score += max(0, stock['volume_increase'] / VOLUME_INCREASE_MIN)
-    
-    # EMA skoru
-    if stock['ema_50']:
-        max_score += 1
-        if stock['ema_20'] > stock['ema_50']:
-            score += 1
+    return {
+        'supports_with_strength': supports_with_strength,
+        'resistances_with_strength': resistances_with_strength,
+        'support_distances': support_distances,
+        'resistance_distances': resistance_distances,
+        'nearest_support': nearest_support,
+        'nearest_resistance': nearest_resistance
+    }
+
+# =============================================================================
+# SÜTUNSAL SONUÇ TABLOSU VE FİLTRE MATRİSİ
+# =============================================================================
+
+# Sütunsal tabloda sayısal olarak tutulan sonuç alanları
+RESULT_SCALAR_FIELDS = ('price', 'volume', 'volume_increase', 'rsi', 'ema_20', 'ema_50', 'macd', 'signal',
+                        'histogram', 'macd_crossover', 'atr_percent', 'nearest_support', 'nearest_resistance')
+
+def _has_value(values):
+    """Sütunda değer var mı (orijinal 'if stock[...]' kontrolü: None/NaN ve 0 yok sayılır)"""
+    return ~np.isnan(values) & (values != 0)
+
+# Kriter adı -> tüm hisseler için geçti/kaldı dizisi üreten vektörel kontrol (tablo sırası = kontrol sırası)
+FILTER_CRITERIA = {
+    'price': lambda c: (MIN_PRICE <= c['price']) & (c['price'] <= MAX_PRICE),
+    'volume': lambda c: ~(c['volume'] < MIN_VOLUME),
+    'rsi': lambda c: (MIN_RSI <= c['rsi']) & (c['rsi'] <= MAX_RSI),
+    'macd_crossover': lambda c: c['macd_crossover'] == 1,
+    'macd_histogram': lambda c: ~(c['histogram'] <= 0),
+    'volume_increase': lambda c: ~(c['volume_increase'] < VOLUME_INCREASE_MIN),
+    'ema_trend': lambda c: ~(_has_value(c['ema_50']) & (c['ema_20'] <= c['ema_50'])),
+    'ema20_distance': lambda c: ~(c['ema20_distance'] > MAX_PRICE_EMA20_DISTANCE),
+    'atr': lambda c: (MIN_ATR_PERCENT <= c['atr_percent']) & (c['atr_percent'] <= MAX_ATR_PERCENT),
+    'support_distance': lambda c: ~(_has_value(c['nearest_support']) & (c['support_distance'] > MAX_SUPPORT_DISTANCE)),
+    'stop_loss': lambda c: ~(_has_value(c['nearest_support']) & (c['stop_loss_distance'] > MAX_STOP_LOSS_DISTANCE)),
+    'resistance_distance': lambda c: ~(_has_value(c['nearest_resistance']) &
+                                       (c['resistance_distance'] > MAX_RESISTANCE_DISTANCE)),
+}
+
+# Açılıp kapatılabilen kriterler ve bağlı oldukları global anahtar
+FILTER_TOGGLES = {
+    'macd_crossover': 'MACD_CROSSOVER',
+    'macd_histogram': 'MACD_HISTOGRAM_POSITIVE',
+    'ema_trend': 'EMA20_ABOVE_EMA50',
+    'ema20_distance': 'PRICE_NEAR_EMA20',
+    'support_distance': 'NEAR_SUPPORT',
+    'resistance_distance': 'RESISTANCE_POTENTIAL',
+}
+
+# Kriterlerin okuduğu sayısal eşikler ve etkiledikleri kriterler (eşik değişince sadece bu sütunlar yeniden hesaplanır)
+FILTER_THRESHOLDS = {
+    'MIN_PRICE': ('price',),
+    'MAX_PRICE': ('price',),
+    'MIN_VOLUME': ('volume',),
+    'MIN_RSI': ('rsi',),
+    'MAX_RSI': ('rsi',),
+    'VOLUME_INCREASE_MIN': ('volume_increase',),
+    'MAX_PRICE_EMA20_DISTANCE': ('ema20_distance',),
+    'MIN_ATR_PERCENT': ('atr',),
+    'MAX_ATR_PERCENT': ('atr',),
+    'MAX_SUPPORT_DISTANCE': ('support_distance',),
+    'MAX_STOP_LOSS_DISTANCE': ('stop_loss',),
+    'MAX_RESISTANCE_DISTANCE': ('resistance_distance',),
+}
+
+# Kriter kaldığında gösterilecek Türkçe açıklama (c: sütunlar, i: satır)
+FILTER_REASONS = {
+    'price': lambda c, i: f"Fiyat {c['price'][i]:.2f} TL, aralık dışında ({MIN_PRICE}-{MAX_PRICE} TL)",
+    'volume': lambda c, i: f"Günlük hacim yetersiz ({c['volume'][i]:,.0f} < {MIN_VOLUME:,})",
+    'rsi': lambda c, i: f"RSI {c['rsi'][i]:.1f}, aralık dışında ({MIN_RSI}-{MAX_RSI})",
+    'macd_crossover': lambda c, i: "MACD çizgisi sinyal çizgisini aşağıdan yukarı kesmemiş",
+    'macd_histogram': lambda c, i: "MACD histogram pozitif değil",
+    'volume_increase': lambda c, i: (f"Hacim artışı yetersiz (%{(c['volume_increase'][i]-1)*100:.1f} < "
+                                     f"%{(VOLUME_INCREASE_MIN-1)*100:.0f})"),
+    'ema_trend': lambda c, i: "EMA20 EMA50'nin üstünde değil",
+    'ema20_distance': lambda c, i: (f"Fiyat EMA20'den çok uzak (%{c['ema20_distance'][i]*100:.1f} > "
+                                    f"%{MAX_PRICE_EMA20_DISTANCE*100:.0f})"),
+    'atr': lambda c, i: f"ATR aralık dışında (%{c['atr_percent'][i]:.1f})",
+    'support_distance': lambda c, i: (f"En yakın destekten çok uzak (%{c['support_distance'][i]*100:.1f} > "
+                                      f"%{MAX_SUPPORT_DISTANCE*100:.0f})"),
+}
+
+def results_to_frame(results):
+    """Sonuç sözlüklerini hisse başına bir satırlık sütunsal tabloya (DataFrame) çevir"""
+    frame = pd.DataFrame(list(results))
+    for field in RESULT_SCALAR_FIELDS:
+        if field in frame:
+            frame[field] = pd.to_numeric(frame[field], errors='coerce').astype(float)
         else:
-            score += 0.3
-    
-    # Fiyat EMA20 yakınlık skoru
-    max_score += 1
-    price_ema20_distance = abs(stock['price'] - stock['ema_20']) / stock['ema_20']
-    if price_ema20_distance <= MAX_PRICE_EMA20_DISTANCE:
-        score += 1
-    else:
-        score += max(0, 1 - price_ema20_distance/0.1)
+            frame[field] = np.nan
+    return frame
+
+def filter_columns(frame):
+    """Kriterlerin kullandığı sayısal sütunları ve türetilmiş uzaklıkları NumPy dizileri olarak hazırla"""
+    c = {field: np.asarray(frame[field], dtype=float) for field in RESULT_SCALAR_FIELDS}
+    price = c['price']
+    support = c['nearest_support']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c['ema20_distance'] = np.abs(price - c['ema_20']) / c['ema_20']
+        c['support_distance'] = np.abs(price - support) / support
+        c['stop_loss_distance'] = (price - support) / price
+        c['resistance_distance'] = (c['nearest_resistance'] - price) / price
+    return c
+
+def evaluate_filter_matrix(frame, columns=None):
+    """Her kriter için bir sütun içeren geçti/kaldı (bool) matrisini tek vektörel geçişte hesapla"""
+    c = columns if columns is not None else filter_columns(frame)
+    with np.errstate(invalid='ignore'):
+        # Yapılandırılmış NumPy dizilerinin (kompakt sonuçlar) indeksi yoktur
+        return pd.DataFrame({name: check(c) for name, check in FILTER_CRITERIA.items()},
+                            index=getattr(frame, 'index', None))
+
+def active_filter_criteria():
+    """Global anahtarlara göre şu an etkin olan kriter adları"""
+    return [name for name in FILTER_CRITERIA
+            if name not in FILTER_TOGGLES or globals()[FILTER_TOGGLES[name]]]
+
+def filter_pass_mask(matrix):
+    """Etkin kriterlerin hepsini geçen satırlar için True dizisi"""
+    return matrix[active_filter_criteria()].all(axis=1).to_numpy()
+
+def explain_from_matrix(frame, matrix, columns=None):
+    """Matristen her satır için kriterlere uymama sebeplerinin listesini üret"""
+    c = columns if columns is not None else filter_columns(frame)
+    failed = {name: ~matrix[name].to_numpy() for name in FILTER_REASONS}
+    return [[FILTER_REASONS[name](c, i) for name in FILTER_REASONS if failed[name][i]]
+            for i in range(len(frame))]
+
+def proximity_scores(frame, columns=None):
+    """calculate_proximity_score'un tüm tablo için vektörel hali (0-1 arası)"""
+    c = columns if columns is not None else filter_columns(frame)
+    rsi = c['rsi']
+    has_ema_50 = _has_value(c['ema_50'])
+    with np.errstate(invalid='ignore'):
+        # RSI skoru - aralık dışındaysa uzaklığa göre azalır
+        rsi_distance = np.where(rsi < MIN_RSI, MIN_RSI - rsi, rsi - MAX_RSI)
+        score = np.where((MIN_RSI <= rsi) & (rsi <= MAX_RSI), 1.0, np.fmax(0, 1 - rsi_distance/20))
+        # MACD crossover ve histogram skorları
+        score = score + np.where(c['macd_crossover'] == 1, 1.0, 0.3)
+        score = score + np.where(c['histogram'] > 0, 1.0, 0.3)
+        # Hacim artış skoru
+        score = score + np.where(c['volume_increase'] >= VOLUME_INCREASE_MIN, 1.0,
+                                 np.fmax(0, c['volume_increase'] / VOLUME_INCREASE_MIN))
+        # EMA skoru (EMA50 varsa)
+        score = score + np.where(has_ema_50, np.where(c['ema_20'] > c['ema_50'], 1.0, 0.3), 0.0)
+        # Fiyat EMA20 yakınlık skoru
+        score = score + np.where(c['ema20_distance'] <= MAX_PRICE_EMA20_DISTANCE, 1.0,
+                                 np.fmax(0, 1 - c['ema20_distance']/0.1))
+        # ATR skoru
+        score = score + np.where((MIN_ATR_PERCENT <= c['atr_percent']) & (c['atr_percent'] <= MAX_ATR_PERCENT),
+                                 1.0, 0.3)
+    max_score = np.where(has_ema_50, 7, 6)
+    return score / max_score
+
+def check_new_filters(stock):
+    """Yeni filtrelere göre hisse kontrolü"""
+    if not stock:
+        return False
     
-    # ATR skoru
-    max_score += 1
-    if MIN_ATR_PERCENT <= stock['atr_percent'] <= MAX_ATR_PERCENT:
-        score += 1
-    else:
-        score += 0.3
+    c = filter_columns(stock_columns(stock))
+    with np.errstate(invalid='ignore'):
+        return all(FILTER_CRITERIA[name](c)[0] for name in active_filter_criteria())
+
+def calculate_proximity_score(stock):
+    """Hissenin kriterlere ne kadar yakın olduğunu hesapla"""
+    return float(proximity_scores(results_to_frame([stock]))[0])
+
+def explain_why_not_matching(stock):
+    """Hissenin neden filtrelere uymadığını açıklar"""
+    frame = results_to_frame([stock])
+    return explain_from_matrix(frame, evaluate_filter_matrix(frame))[0]
+
+# Filtre hattı: her aşama bir kriter, ihtiyaç duyduğu göstergeler ve tahmini göreli maliyeti
+# Ucuz aşamalar önce çalışır; destek/direnç araması sadece diğer tüm kontrolleri geçen hisseler için yapılır
+FILTER_STAGES = [
+    {'criterion': 'price', 'needs': ('quote',), 'cost': 1},
+    {'criterion': 'volume', 'needs': ('quote',), 'cost': 1},
+    {'criterion': 'volume_increase', 'needs': ('volume_increase',), 'cost': 2},
+    {'criterion': 'rsi', 'needs': ('rsi',), 'cost': 3},
+    {'criterion': 'ema_trend', 'needs': ('ema',), 'cost': 4},
+    {'criterion': 'ema20_distance', 'needs': ('quote', 'ema'), 'cost': 4},
+    {'criterion': 'atr', 'needs': ('quote', 'atr'), 'cost': 4},
+    {'criterion': 'macd_histogram', 'needs': ('macd',), 'cost': 5},
+    {'criterion': 'macd_crossover', 'needs': ('macd',), 'cost': 5},
+    {'criterion': 'support_distance', 'needs': ('quote', 'levels'), 'cost': 20},
+    {'criterion': 'stop_loss', 'needs': ('quote', 'levels'), 'cost': 20},
+    {'criterion': 'resistance_distance', 'needs': ('quote', 'levels'), 'cost': 20},
+]
+
+# Tam teşhis modu: True ise her hisse için tüm göstergeler hesaplanır (uymama sebepleri için gerekli)
+FULL_DIAGNOSTICS = False
+
+def full_rows_required():
+    """Tarama her hissenin tüm gösterge değerlerini üretmeli mi (anlık görüntü veya benzerlik indeksi açıksa evet)"""
+    return SNAPSHOT_ENABLED or SIMILARITY_ENABLED
+
+def stock_columns(stock):
+    """Tek hisse sonucunu filter_columns'un beklediği 1 elemanlı sütunlara çevir (None -> NaN)"""
+    return {field: np.array([np.nan if stock.get(field) is None else stock[field]], dtype=float)
+            for field in RESULT_SCALAR_FIELDS}
+
+def run_filter_pipeline(hist, result):
+    """Etkin kriterleri maliyet sırasıyla uygula; ilk elenen aşamada dur ve kısmi sonuç döndür"""
+    active = set(active_filter_criteria())
+    computed = set()
+    for stage in sorted(FILTER_STAGES, key=lambda stage: stage['cost']):
+        if stage['criterion'] not in active:
+            continue
+        compute_indicators(hist, result, stage['needs'], computed)
+        with np.errstate(invalid='ignore'):
+            passed = FILTER_CRITERIA[stage['criterion']](filter_columns(stock_columns(result)))[0]
+        if not passed:
+            # Hesaplanmayan alanlar boş bırakılır; tam teşhis gerekirse ensure_full_diagnostics doldurur
+            for name in INDICATORS:
+                if name not in computed:
+                    result.update(dict.fromkeys(INDICATORS[name]['fields']))
+            result['partial'] = True
+            return result
     
-    return score / max_score if max_score > 0 else 0
+    # Tüm aşamaları geçen hisse gösterim için eksiksiz hesaplanır
+    compute_indicators(hist, result, INDICATORS, computed)
+    return result
+
+def ensure_full_diagnostics(stock, provider=None):
+    """Kısmi (erken elenmiş) sonucu tüm göstergelerle yeniden hesapla - veri önbellekten gelir"""
+    if not stock.get('partial'):
+        return stock
+    return analyze_stock_comprehensive(stock['ticker'], provider, full_diagnostics=True) or stock
 
 def format_support_strength(strength):
     """Destek gücünü formatla"""
@@ -451,97 +1935,157 @@ def format_stock_summary(stock):
         "ATR": f"%{stock['atr_percent']:.1f}"
     }
 
-def explain_why_not_matching(stock):
-    """Hissenin neden filtrelere uymadığını açıklar"""
-    reasons = []
-    
-    if not (MIN_PRICE <= stock['price'] <= MAX_PRICE):
-        reasons.append(f"Fiyat {stock['price']:.2f} TL, aralık dışında ({MIN_PRICE}-{MAX_PRICE} TL)")
+def scan_and_filter_stocks(selected_stocks=None, workers=None, provider=None, panel=None, full_diagnostics=None,
+                           cache=None, processes=None, prescreen=None):
+    """Hisseleri tara ve filtrele (workers > 1 ise eşzamanlı, panel=True ise toplu gösterge hesabı,
+    processes > 1 ise göstergeler ve destek/direnç süreç havuzunda, prescreen=True ise önce toplu ön eleme)
     
-    if stock['volume'] < MIN_VOLUME:
-        reasons.append(f"Günlük hacim yetersiz ({stock['volume']:,.0f} < {MIN_VOLUME:,})")
+    Ön eleme varsayılan olarak sadece evren taramasında (hisse seçilmediğinde) yapılır; belirli hisse
+    aramasında her hissenin uymama sebepleri gösterildiği için tüm hisseler analiz edilir.
+    """
+    require(np, pd)
+    stocks_to_scan = selected_stocks if selected_stocks else default_universe()
+    scan_type = describe_universe(stocks_to_scan, selected=bool(selected_stocks))
+    workers = SCAN_WORKERS if workers is None else workers
+    processes = COMPUTE_PROCESSES if processes is None else processes
+    in_processes = (processes or os.cpu_count() or 1) > 1
+    panel = (PANEL_INDICATORS if panel is None else panel) or in_processes
+    full_diagnostics = FULL_DIAGNOSTICS if full_diagnostics is None else full_diagnostics
+    full_diagnostics = full_diagnostics or full_rows_required()  # Erken eleme sadece satırlar saklanmıyorsa
     
-    if not (MIN_RSI <= stock['rsi'] <= MAX_RSI):
-        reasons.append(f"RSI {stock['rsi']:.1f}, aralık dışında ({MIN_RSI}-{MAX_RSI})")
+    print(f"🔍 {scan_type} taranıyor...")
+    print("Bu işlem birkaç dakika sürebilir...\n")
+    PROFILER.reset()
+    scheduler = find_fetch_scheduler(provider or DATA_PROVIDER)
+    if scheduler:
+        scheduler.begin_scan(SCAN_DEADLINE_SECONDS)
+    prescreen = (PRESCREEN_ENABLED and not selected_stocks) if prescreen is None else prescreen
+    if prescreen:
+        stocks_to_scan, prescreen_report = prescreen_universe(stocks_to_scan, provider)
+    deep_start = time.perf_counter()
     
-    if not stock['macd_crossover']:
-        reasons.append("MACD çizgisi sinyal çizgisini aşağıdan yukarı kesmemiş")
+    def task(ticker):
+        # Panel modunda iş parçacıkları sadece veri çeker, göstergeler sonda tek geçişte hesaplanır
+        hist = fetch_history(ticker, provider)
+        if hist is not None and CORRELATION_ENABLED:
+            CORRELATION_ENGINE.observe(ticker, hist['Close'])
+        if panel or hist is None:
+            return hist
+        return analyze_cached(ticker, hist, full_diagnostics, cache)
     
-    if stock['histogram'] <= 0:
-        reasons.append("MACD histogram pozitif değil")
+    total = len(stocks_to_scan)
+    results = [None] * total  # Giriş sırasını korumak için indeks bazlı sonuç listesi
+    progress_lock = threading.Lock()
+    processed = 0
     
-    if stock['volume_increase'] < VOLUME_INCREASE_MIN:
-        reasons.append(f"Hacim artışı yetersiz (%{(stock['volume_increase']-1)*100:.1f} < %{(VOLUME_INCREASE_MIN-1)*100:.0f})")
+    def report_progress(ticker):
+        nonlocal processed
+        with progress_lock:
+            processed += 1
+            print(f"İşleniyor: {ticker} ({processed}/{total})", end='\r')
     
-    if stock['ema_50'] and stock['ema_20'] <= stock['ema_50']:
-        reasons.append("EMA20 EMA50'nin üstünde değil")
+    if workers <= 1:
+        for i, ticker in enumerate(stocks_to_scan):
+            report_progress(ticker)
+            results[i] = task(ticker)
+            if not panel and SIMILARITY_ENABLED:
+                SIMILARITY_INDEX.update(results[i])
+    else:
+        # Her hisse bağımsız bir görev; yavaş veya hatalı hisse diğerlerini bekletmez
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(task, ticker): i
+                       for i, ticker in enumerate(stocks_to_scan)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if not panel and SIMILARITY_ENABLED:
+                    SIMILARITY_INDEX.update(results[i])  # Benzerlik indeksi her hisse bittikçe güncellenir
+                report_progress(stocks_to_scan[i])
     
-    price_ema20_distance = abs(stock['price'] - stock['ema_20']) / stock['ema_20']
-    if price_ema20_distance > MAX_PRICE_EMA20_DISTANCE:
-        reasons.append(f"Fiyat EMA20'den çok uzak (%{price_ema20_distance*100:.1f} > %{MAX_PRICE_EMA20_DISTANCE*100:.0f})")
+    if panel:
+        histories = {ticker: hist for ticker, hist in zip(stocks_to_scan, results) if hist is not None}
+        if in_processes:
+            # Fiyatlar float32 kompakt depoya alınıp paylaşımlı bellekle çalışan süreçlere dağıtılır
+            with PROFILER.stage('process_analysis'):
+                records = analyze_store_parallel(OHLCVStore.from_histories(histories), processes) if histories else []
+                results = records_to_results(records)
+        else:
+            with PROFILER.stage('panel_analysis'):
+                results = analyze_panel(build_price_panel(histories)) if histories else []
+        if SIMILARITY_ENABLED:
+            for result in results:
+                SIMILARITY_INDEX.update(result)
     
-    if not (MIN_ATR_PERCENT <= stock['atr_percent'] <= MAX_ATR_PERCENT):
-        reasons.append(f"ATR aralık dışında (%{stock['atr_percent']:.1f})")
+    all_results = [result for result in results if result]
+    if CORRELATION_ENABLED:
+        with PROFILER.stage('correlation'):
+            CORRELATION_ENGINE.sync()
+    with PROFILER.stage('filter'):
+        passed = filter_pass_mask(evaluate_filter_matrix(results_to_frame(all_results))) if all_results else []
+        filtered_results = [result for result, ok in zip(all_results, passed) if ok]
     
-    if stock['nearest_support']:
-        support_distance = abs(stock['price'] - stock['nearest_support']) / stock['nearest_support']
-        if support_distance > MAX_SUPPORT_DISTANCE:
-            reasons.append(f"En yakın destekten çok uzak (%{support_distance*100:.1f} > %{MAX_SUPPORT_DISTANCE*100:.0f})")
+    print(f"\n✅ Toplam {len(all_results)} hisse analiz edildi.")
+    if prescreen:
+        print_prescreen_report(prescreen_report, time.perf_counter() - deep_start, len(stocks_to_scan))
+    if scheduler:
+        scheduler.end_scan()
+        scheduler.print_report()
+        for name, value in scheduler.report()['counters'].items():
+            PROFILER.count(f'fetch_{name}', value)
+    print(f"🎯 {len(filtered_results)} hisse kriterlere uygun bulundu.\n")
     
-    return reasons
+    return filtered_results, all_results
 
-def scan_and_filter_stocks(selected_stocks=None):
-    """Hisseleri tara ve filtrele"""
-    stocks_to_scan = selected_stocks if selected_stocks else BIST100_STOCKS
-    scan_type = "Seçilen" if selected_stocks else "BIST100"
-    
-    print(f"🔍 {scan_type} hisseler taranıyor...")
-    print("Bu işlem birkaç dakika sürebilir...\n")
-    
-    all_results = []
-    filtered_results = []
-    processed = 0
+def print_matching_table(filtered_results):
+    """Uygun hisse tablosu ve birlikte hareket eden (yüksek korelasyonlu) eşleşme grupları"""
+    groups = correlated_groups(filtered_results)
+    shown = filtered_results
+    if CORRELATION_DEDUPLICATE and groups:
+        hidden = {ticker for group, _ in groups for ticker in group[1:]}
+        shown = [stock for stock in filtered_results if stock['ticker'] not in hidden]
     
-    for ticker in stocks_to_scan:
-        processed += 1
-        print(f"İşleniyor: {ticker} ({processed}/{len(stocks_to_scan)})", end='\r')
-        
-        result = analyze_stock_comprehensive(ticker)
-        if result:
-            all_results.append(result)
-            if check_new_filters(result):
-                filtered_results.append(result)
+    print(f"{'='*100}")
+    print(f"KRİTERLERE UYGUN HİSSELER ({len(filtered_results)} adet)")
+    print(f"{'='*100}")
     
-    print(f"\n✅ Toplam {len(all_results)} hisse analiz edildi.")
-    print(f"🎯 {len(filtered_results)} hisse kriterlere uygun bulundu.\n")
+    table_data = []
+    for stock in shown:
+        table_data.append(format_stock_summary(stock))
     
-    return filtered_results, all_results
+    df = pd.DataFrame(table_data)
+    print(df.to_string(index=False))
+    print_correlated_groups(groups)
+    if len(shown) < len(filtered_results):
+        print(f"   ({len(filtered_results) - len(shown)} benzer hisse tabloda gizlendi - CORRELATION_DEDUPLICATE)")
 
-def display_results(filtered_results, all_results, is_specific_search=False):
-    """Sonuçları göster"""
+def display_results(filtered_results, all_results, is_specific_search=False, provider=None,
+                    frame=None, columns=None, matrix=None):
+    """Sonuçları göster (frame/columns/matrix verilirse yeniden hesaplanmaz)"""
+    # Uymama sebepleri ve yakınlık skorları için erken elenmiş hisselerin tüm göstergeleri gerekir
+    if frame is None and (is_specific_search or not filtered_results):
+        all_results = [ensure_full_diagnostics(stock, provider) for stock in all_results]
+    
+    # Geçti/kaldı, sebepler ve yakınlık skorları tek bir kriter matrisinden türetilir
+    frame = results_to_frame(all_results) if frame is None else frame
+    columns = filter_columns(frame) if columns is None else columns
+    matrix = evaluate_filter_matrix(frame, columns) if matrix is None else matrix
+    passed = filter_pass_mask(matrix)
+    all_reasons = explain_from_matrix(frame, matrix, columns)
     
     if is_specific_search:
         # Belirli hisse araması - hem uygun hem uymayanları göster
         if filtered_results:
-            print(f"{'='*100}")
-            print(f"KRİTERLERE UYGUN HİSSELER ({len(filtered_results)} adet)")
-            print(f"{'='*100}")
-            
-            table_data = []
-            for stock in filtered_results:
-                table_data.append(format_stock_summary(stock))
-            
-            df = pd.DataFrame(table_data)
-            print(df.to_string(index=False))
+            print_matching_table(filtered_results)
         
         # Kriterlere uymayanlar
-        non_matching = [s for s in all_results if s not in filtered_results]
+        non_matching = [i for i in range(len(all_results)) if not passed[i]]
         if non_matching:
             print(f"\n{'='*100}")
             print(f"KRİTERLERE UYGUN OLMAYAN HİSSELER ({len(non_matching)} adet)")
             print(f"{'='*100}")
             
-            for stock in non_matching:
+            for row in non_matching:
+                stock = all_results[row]
                 print(f"\n📊 {stock['ticker']} - Güncel Fiyat: {stock['price']:.2f}TL - Hacim: {stock['volume']:,.0f}")
                 
                 # Güçlü destek ve direnç bilgileri detaylı göster
@@ -562,50 +2106,2275 @@ def display_results(filtered_results, all_results, is_specific_search=False):
                 print(f"   Hacim Artışı: %{(stock['volume_increase']-1)*100:.1f}")
                 print(f"   ATR: %{stock['atr_percent']:.1f}")
                 
-                reasons = explain_why_not_matching(stock)
+                reasons = all_reasons[row]
                 print("   Uyumsuzluk Sebepleri:")
                 for reason in reasons:
                     print(f"     • {reason}")
     
     else:
-        # BIST100 araması - sadece uygun olanları göster
+        # Evren araması - sadece uygun olanları göster
         if filtered_results:
-            print(f"{'='*100}")
-            print(f"KRİTERLERE UYGUN HİSSELER ({len(filtered_results)} adet)")
-            print(f"{'='*100}")
-            
-            table_data = []
-            for stock in filtered_results:
-                table_data.append(format_stock_summary(stock))
-            
-            df = pd.DataFrame(table_data)
-            print(df.to_string(index=False))
+            print_matching_table(filtered_results)
         
         else:
             # Hiç uygun hisse yok - en yakın 5'i göster
             print("❌ Kriterlere uygun hisse bulunamadı!")
             print("\n🔍 Kriterlere en yakın 5 hisse:\n")
             
-            scored_stocks = []
-            for stock in all_results:
-                score = calculate_proximity_score(stock)
-                scored_stocks.append((score, stock))
+            scores = proximity_scores(frame, columns)
+            ranked = sorted(range(len(all_results)), reverse=True, key=lambda row: scores[row])
             
-            scored_stocks.sort(reverse=True, key=lambda x: x[0])
-            
-            for i, (score, stock) in enumerate(scored_stocks[:5], 1):
+            for i, row in enumerate(ranked[:5], 1):
+                score, stock = scores[row], all_results[row]
                 print(f"{i}. 📊 {stock['ticker']} (Yakınlık Skoru: {score:.2f})")
                 summary = format_stock_summary(stock)
                 for key, value in summary.items():
                     if key != "Hisse":
                         print(f"   {key}: {value}")
                 
-                reasons = explain_why_not_matching(stock)
+                reasons = all_reasons[row]
                 print("   Kriterlere Uymama Sebepleri:")
                 for reason in reasons:
                     print(f"     • {reason}")
                 print()
 
+# =============================================================================
+# GEÇMİŞE DÖNÜK TEST (BACKTEST)
+# =============================================================================
+
+BACKTEST_HORIZONS = (1, 5, 10, 20)  # İleriye dönük getiri vadeleri (bar)
+BACKTEST_MIN_BARS = 50              # Sinyal üretmek için gereken minimum geçmiş (analyze_history ile aynı)
+
+def generate_synthetic_universe(n_tickers=100, n_bars=126, seed=0):
+    """n_tickers hisselik deterministik yapay evren üret {hisse: DataFrame}"""
+    return {f"SYN{i:03d}": generate_synthetic_ohlcv(f"SYN{i:03d}", n_bars, seed) for i in range(n_tickers)}
+
+def read_ohlcv_file(path):
+    """Tek bir .pkl/.csv/.parquet OHLCV dosyasını oku (desteklenmeyen uzantıda None, saat dilimi kaldırılır)"""
+    if path.endswith('.pkl'):
+        hist = pd.read_pickle(path)
+    elif path.endswith('.csv'):
+        hist = pd.read_csv(path, index_col=0, parse_dates=True)
+    elif path.endswith('.parquet'):
+        hist = pd.read_parquet(path)  # pyarrow veya fastparquet kurulu olmalı
+        for column in ('Datetime', 'Date'):
+            if column in hist.columns and not isinstance(hist.index, pd.DatetimeIndex):
+                hist = hist.set_index(pd.to_datetime(hist.pop(column)))
+    else:
+        return None
+    if hist.index.tz is not None:
+        hist.index = hist.index.tz_localize(None)
+    return hist
+
+def ticker_from_filename(name):
+    """Dosya adından hisse kodu (örn: THYAO.IS.pkl -> THYAO)"""
+    return os.path.basename(name).rsplit('.', 1)[0].replace('.IS', '')
+
+def load_local_histories(data_dir=CACHE_DIR):
+    """Yerel klasördeki hisse dosyalarını (.pkl önbellek, .csv veya .parquet) ağa gitmeden yükle"""
+    histories = {}
+    for name in sorted(os.listdir(data_dir)):
+        if '_' in name:
+            continue  # Gün içi önbellek dosyaları (örn: THYAO.IS_1h.pkl) günlük seriye karışmasın
+        hist = read_ohlcv_file(os.path.join(data_dir, name))
+        if hist is None:
+            continue
+        hist.index = hist.index.normalize()  # Farklı kaynaklardaki günlük barlar aynı tarihte hizalansın
+        histories[ticker_from_filename(name)] = hist
+    return histories
+
+def rolling_window_extreme(values, window, reducer):
+    """Son eksende [t, t+window) pencerelerinin min/max'ı - ikiye katlama ile O(T log window) bellek dostu"""
+    result = values
+    span = 1
+    while span * 2 <= window:
+        result = reducer(result[..., :-span], result[..., span:])
+        span *= 2
+    if span < window:
+        result = reducer(result[..., :-(window - span)], result[..., window - span:])
+    return result
+
+def _forward_fill_levels(levels, mask):
+    """Her bar için maske True olan son barın seviyesini taşı (yoksa NaN)"""
+    positions = np.where(mask, np.arange(mask.shape[1])[None, :], -1)
+    positions = np.maximum.accumulate(positions, axis=1)
+    filled = np.take_along_axis(levels, np.maximum(positions, 0), axis=1)
+    return np.where(positions >= 0, filled, np.nan)
+
+def compute_backtest_features(panel, window=20):
+    """Her hisse ve her bar için filtre sütunlarını sadece o bara kadarki veriyle (ileriye bakmadan) hesapla"""
+    close, high, low, volume = panel['Close'], panel['High'], panel['Low'], panel['Volume']
+    indicators = compute_indicator_panel(panel)
+    n_tickers, n_bars = close.shape
+    
+    # MACD kesişimi: son 5 bar içinde (bugün dahil) aşağıdan yukarı kesişim var mı
+    cross = np.zeros_like(close, dtype=bool)
+    cross[:, 1:] = ((indicators['macd'][:, :-1] < indicators['signal'][:, :-1]) &
+                    (indicators['macd'][:, 1:] > indicators['signal'][:, 1:]))
+    crossover = np.zeros_like(cross)
+    crossover[:, 4:] = rolling_window_extreme(cross, 5, np.logical_or)
+    
+    # Hacim artışı: bugünkü hacim / önceki VOLUME_LOOKBACK_DAYS günün ortalaması
+    days = VOLUME_LOOKBACK_DAYS
+    avg_volume = np.full_like(volume, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_volume[:, days:] = np.nanmean(np.lib.stride_tricks.sliding_window_view(volume, days, axis=1)[:, :-1], axis=2)
+        volume_increase = np.where(avg_volume == 0, 1.0, volume / avg_volume)
+        atr_percent = indicators['atr'] / close * 100
+    
+    # Destek/direnç: find_support_resistance_levels i merkezli pivotu ancak i+window barından itibaren görür;
+    # her barda o ana kadar kesinleşmiş en son pivot kullanılır
+    nearest_support = np.full_like(close, np.nan)
+    nearest_resistance = np.full_like(close, np.nan)
+    if n_bars > 2 * window:
+        lows = rolling_window_extreme(close, 2 * window, np.fmin)[:, :n_bars - 2 * window]
+        highs = rolling_window_extreme(close, 2 * window, np.fmax)[:, :n_bars - 2 * window]
+        centers = close[:, window:n_bars - window]
+        confirmed = np.zeros_like(close, dtype=bool), np.zeros_like(close, dtype=bool)
+        confirmed[0][:, 2 * window:] = centers == lows
+        confirmed[1][:, 2 * window:] = centers == highs
+        pivot_values = np.full_like(close, np.nan)
+        pivot_values[:, 2 * window:] = centers
+        nearest_support = _forward_fill_levels(pivot_values, confirmed[0])
+        nearest_resistance = _forward_fill_levels(pivot_values, confirmed[1])
+    
+    # Yeterli geçmişi olmayan barlar sinyal üretmez
+    history_length = np.cumsum(~np.isnan(close), axis=1)
+    return {
+        'price': close,
+        'volume': volume,
+        'volume_increase': volume_increase,
+        'rsi': indicators['rsi'],
+        'ema_20': indicators['ema_20'],
+        'ema_50': indicators['ema_50'],
+        'macd': indicators['macd'],
+        'signal': indicators['signal'],
+        'histogram': indicators['histogram'],
+        'macd_crossover': crossover.astype(float),
+        'atr_percent': atr_percent,
+        'nearest_support': nearest_support,
+        'nearest_resistance': nearest_resistance,
+        'valid': (history_length >= BACKTEST_MIN_BARS) & ~np.isnan(close),
+        'low': low,
+    }
+
+def backtest_signals(features):
+    """Etkin filtre kriterlerini tüm hisse x bar matrisine uygula (check_new_filters ile aynı kurallar)"""
+    c = filter_columns(features)
+    signals = features['valid'].copy()
+    with np.errstate(invalid='ignore'):
+        for name in active_filter_criteria():
+            signals &= FILTER_CRITERIA[name](c)
+    return signals
+
+def forward_returns(close, low, horizon):
+    """Her bar için horizon bar sonraki getiri ve bu süredeki en kötü düşüş (maksimum ters hareket)"""
+    n_bars = close.shape[1]
+    returns = np.full_like(close, np.nan)
+    drawdowns = np.full_like(close, np.nan)
+    if n_bars > horizon:
+        returns[:, :-horizon] = close[:, horizon:] / close[:, :-horizon] - 1
+        worst_low = rolling_window_extreme(low[:, 1:], horizon, np.fmin)
+        drawdowns[:, :-horizon] = np.minimum(worst_low / close[:, :-horizon] - 1, 0)
+    return returns, drawdowns
+
+def run_backtest(histories, horizons=BACKTEST_HORIZONS):
+    """Mevcut filtre setini tüm evrenin geçmişinde vektörel olarak test et ve vade bazlı özet döndür"""
+    panel = build_price_panel(histories, align='dates')
+    features = compute_backtest_features(panel)
+    signals = backtest_signals(features)
+    close = panel['Close']
+    
+    rows = []
+    with np.errstate(invalid='ignore'):
+        for horizon in horizons:
+            returns, drawdowns = forward_returns(close, features['low'], horizon)
+            hits = signals & ~np.isnan(returns)
+            baseline = features['valid'] & ~np.isnan(returns)
+            signal_returns = returns[hits]
+            rows.append({
+                'Vade': horizon,
+                'Sinyal': int(hits.sum()),
+                'Ort. Getiri %': signal_returns.mean() * 100 if len(signal_returns) else np.nan,
+                'Medyan %': np.median(signal_returns) * 100 if len(signal_returns) else np.nan,
+                'İsabet %': (signal_returns > 0).mean() * 100 if len(signal_returns) else np.nan,
+                'Ort. Düşüş %': drawdowns[hits].mean() * 100 if len(signal_returns) else np.nan,
+                'En Kötü Düşüş %': drawdowns[hits].min() * 100 if len(signal_returns) else np.nan,
+                'Tüm Barlar Ort. %': returns[baseline].mean() * 100 if baseline.any() else np.nan,
+            })
+    
+    report = pd.DataFrame(rows)
+    report.attrs['signals'] = signals
+    report.attrs['tickers'] = panel['tickers']
+    report.attrs['index'] = panel['index']
+    return report
+
+def run_backtest_cli(args):
+    """Komut satırından backtest çalıştır ve özeti yazdır"""
+    if args.synthetic:
+        histories = generate_synthetic_universe(args.synthetic, args.bars)
+        source = f"yapay evren ({args.synthetic} hisse)"
+    else:
+        histories = load_local_histories(args.data_dir)
+        source = args.data_dir
+    if not histories:
+        print(f"❌ {source} içinde veri bulunamadı. Önce bir tarama çalıştırın veya --synthetic kullanın.")
+        return
+    
+    horizons = tuple(int(h) for h in args.horizons.split(','))
+    start = time.perf_counter()
+    report = run_backtest(histories, horizons)
+    elapsed = time.perf_counter() - start
+    
+    n_bars = len(report.attrs['index'])
+    print(f"\n📈 BACKTEST: {len(histories)} hisse x {n_bars} bar ({source}) - {elapsed:.2f} sn")
+    print(f"{'='*100}")
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    print("\nNot: Destek/direnç her barda o ana kadar kesinleşmiş en son pivot ile yaklaşık olarak alınır.")
+
+# =============================================================================
+# PARAMETRE TARAMASI (EŞİK OPTİMİZASYONU)
+# =============================================================================
+
+# Denenecek eşik değerleri (ızgara veya rastgele arama bu listelerden seçer)
+SWEEP_SPACE = {
+    'MIN_RSI': [35, 40, 45],
+    'MAX_RSI': [55, 60, 65, 70],
+    'VOLUME_INCREASE_MIN': [1.0, 1.2, 1.5],
+    'MAX_PRICE_EMA20_DISTANCE': [0.02, 0.03, 0.05],
+    'MIN_ATR_PERCENT': [2.0, 3.0],
+    'MAX_RESISTANCE_DISTANCE': [0.04, 0.06, 0.08],
+}
+SWEEP_HORIZON = 10      # Değerlendirmede kullanılan ileriye dönük getiri vadesi (bar)
+SWEEP_MIN_SIGNALS = 20  # Bundan az sinyal üreten parametre setleri sıralamada sona kalır
+
+@contextmanager
+def override_filters(**params):
+    """Filtre eşiklerini geçici olarak değiştir, blok bitince eski değerlere döndür"""
+    unknown = [name for name in params if name not in globals()]
+    if unknown:
+        raise KeyError(f"Bilinmeyen filtre parametresi: {', '.join(unknown)}")
+    previous = {name: globals()[name] for name in params}
+    globals().update(params)
+    try:
+        yield
+    finally:
+        globals().update(previous)
+
+def sweep_candidates(space=None, samples=None, seed=0):
+    """Arama uzayından parametre setleri üret (samples verilirse rastgele arama, yoksa tam ızgara)"""
+    space = space or SWEEP_SPACE
+    names = list(space)
+    if samples is None:
+        return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+    rng = np.random.default_rng(seed)
+    return [{name: space[name][rng.integers(len(space[name]))] for name in names} for _ in range(samples)]
+
+# Çalışan süreçlerde paylaşımlı bellekten okunan önceden hesaplanmış panel
+_SWEEP_STATE = {}
+
+def _bind_sweep_panel(shm, names, shape):
+    """Paylaşımlı bellekteki gösterge panelini kopyalamadan görünüm olarak bağla"""
+    block = np.ndarray((len(names),) + shape, dtype=np.float64, buffer=shm.buf)
+    _SWEEP_STATE.clear()
+    _SWEEP_STATE.update({'shm': shm, 'columns': {name: block[i] for i, name in enumerate(names)}})
+
+def _attach_sweep_panel(shm_name, names, shape, settings=None):
+    """Süreç başlatıcı: ana süreçteki eşik/anahtar değerlerini uygula (taranmayan kriterler için), paylaşımlı
+    bellekteki gösterge panelini bağla"""
+    apply_settings(settings)
+    _bind_sweep_panel(shared_memory.SharedMemory(name=shm_name), names, shape)
+
+def _evaluate_sweep_candidate(params):
+    """Tek parametre setini paylaşılan panel üzerinde değerlendir (gösterge tekrar hesaplanmaz)"""
+    c = _SWEEP_STATE['columns']
+    with override_filters(**params), np.errstate(invalid='ignore'):
+        signals = c['valid'] == 1
+        for name in active_filter_criteria():
+            signals &= FILTER_CRITERIA[name](c)
+    returns = c['forward_return'][signals]
+    returns = returns[~np.isnan(returns)]
+    drawdowns = c['forward_drawdown'][signals]
+    return {
+        **params,
+        'Sinyal': len(returns),
+        'Ort. Getiri %': returns.mean() * 100 if len(returns) else np.nan,
+        'İsabet %': (returns > 0).mean() * 100 if len(returns) else np.nan,
+        'Ort. Düşüş %': np.nanmean(drawdowns) * 100 if len(returns) else np.nan,
+    }
+
+def run_parameter_sweep(histories, candidates, horizon=SWEEP_HORIZON, workers=None):
+    """Göstergeleri bir kez hesapla, aday eşik setlerini süreç havuzunda değerlendir ve sıralı tablo döndür"""
+    panel = build_price_panel(histories, align='dates')
+    features = compute_backtest_features(panel)
+    columns = filter_columns(features)
+    columns['valid'] = features['valid'].astype(float)
+    columns['forward_return'], columns['forward_drawdown'] = forward_returns(panel['Close'], features['low'], horizon)
+    
+    # Tüm sütunlar tek bir paylaşımlı bellek bloğuna kopyalanır; çalışanlar veriyi yeniden yüklemez
+    names = list(columns)
+    shape = panel['Close'].shape
+    shm = shared_memory.SharedMemory(create=True, size=max(8 * len(names) * int(np.prod(shape)), 1))
+    try:
+        block = np.ndarray((len(names),) + shape, dtype=np.float64, buffer=shm.buf)
+        for i, name in enumerate(names):
+            block[i] = columns[name]
+        del block
+        
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            # Ana süreç oluşturduğu bloğu doğrudan kullanır: kapatılmadan kalacak ikinci bir tanıtıcı açılmaz
+            _bind_sweep_panel(shm, names, shape)
+            try:
+                rows = [_evaluate_sweep_candidate(params) for params in candidates]
+            finally:
+                _SWEEP_STATE.clear()  # Görünümler bırakılmadan shm.close() çağrılamaz
+        else:
+            chunksize = max(1, len(candidates) // (workers * 4))
+            with futures_process.ProcessPoolExecutor(max_workers=workers, initializer=_attach_sweep_panel,
+                                     initargs=(shm.name, names, shape, settings_snapshot())) as executor:
+                rows = list(executor.map(_evaluate_sweep_candidate, candidates, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+    
+    table = pd.DataFrame(rows)
+    table['_yeterli'] = table['Sinyal'] >= SWEEP_MIN_SIGNALS
+    table = table.sort_values(['_yeterli', 'Ort. Getiri %'], ascending=[False, False], kind='stable')
+    return table.drop(columns='_yeterli').reset_index(drop=True)
+
+def run_sweep_cli(args):
+    """Komut satırından parametre taraması çalıştır ve en iyi setleri yazdır"""
+    if args.synthetic:
+        histories = generate_synthetic_universe(args.synthetic, args.bars)
+    else:
+        histories = load_local_histories(args.data_dir)
+    if not histories:
+        print(f"❌ {args.data_dir} içinde veri bulunamadı. Önce bir tarama çalıştırın veya --synthetic kullanın.")
+        return
+    
+    candidates = sweep_candidates(samples=args.samples)
+    start = time.perf_counter()
+    table = run_parameter_sweep(histories, candidates, horizon=args.horizon, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    
+    print(f"\n🧪 PARAMETRE TARAMASI: {len(candidates)} aday, {len(histories)} hisse, "
+          f"{args.horizon} bar vade - {elapsed:.2f} sn")
+    print(f"{'='*100}")
+    print(table.head(args.top).to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+# =============================================================================
+# PERFORMANS ÖLÇÜM PAKETİ (BENCHMARK)
+# =============================================================================
+
+BENCHMARK_OUTPUT = "benchmark_results.json"  # Sonuçların yazılacağı JSON dosyası
+BENCHMARK_REGRESSION_TOLERANCE = 0.20        # En iyi süre referansın %20'sinden fazla artarsa gerileme sayılır
+STARTUP_BUDGET_MS = 600                      # --benchmark-startup: --filters için üst sınır (yeni süreç, yorumlayıcı dahil)
+
+def _time_call(func, repeats, number=1):
+    """Fonksiyonu her tekrarda number kez çalıştırıp çağrı başına süreleri (sn) döndür"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+@contextmanager
+def isolated_scan_state():
+    """Taramanın güncellediği benzerlik indeksi, korelasyon motoru ve sonuç önbelleğini geçici olarak boş
+    örneklerle değiştir; blok bitince kullanıcının durumu geri gelir"""
+    previous = {name: globals()[name] for name in ('SIMILARITY_INDEX', 'CORRELATION_ENGINE', 'RESULT_CACHE')}
+    globals().update(SIMILARITY_INDEX=SimilarityIndex(), CORRELATION_ENGINE=RollingCorrelation(),
+                     RESULT_CACHE=ResultCache(path=None) if previous['RESULT_CACHE'] is not None else None)
+    try:
+        yield
+    finally:
+        globals().update(previous)
+
+def run_benchmark_suite(n_tickers=50, n_bars=126, repeats=5):
+    """Gösterge fonksiyonlarını, destek/direnç aramasını, filtreyi ve uçtan uca taramayı yapay veriyle ölç"""
+    universe = generate_synthetic_universe(n_tickers, n_bars)
+    sample = next(iter(universe.values()))
+    close, high, low, volume = sample['Close'], sample['High'], sample['Low'], sample['Volume']
+    # Ölçüm taramaları kullanıcının indeks/önbelleğini şişirmesin ve önceki durumdan etkilenmesin
+    with redirect_stdout(io.StringIO()), isolated_scan_state():
+        _, results = scan_and_filter_stocks(list(universe), workers=1, provider=SyntheticDataProvider(n_bars=n_bars),
+                                            full_diagnostics=True, cache=False)
+    provider = SyntheticDataProvider(n_bars=n_bars)
+    replay_source = BarReplaySource(universe)
+    
+    def scan():
+        with redirect_stdout(io.StringIO()):
+            scan_and_filter_stocks(list(universe), provider=provider, cache=False)
+    
+    # Ölçüm adı -> (fonksiyon, tekrar başına çağrı sayısı); kısa süren ölçümler zamanlayıcı gürültüsünü aşmak için döngüde
+    cases = {
+        'calculate_rsi': (lambda: calculate_rsi(close), 50),
+        'calculate_ema': (lambda: calculate_ema(close, 20), 50),
+        'calculate_macd': (lambda: calculate_macd(close), 50),
+        'calculate_atr': (lambda: calculate_atr(high, low, close), 50),
+        'check_volume_increase': (lambda: check_volume_increase(volume), 50),
+        'calculate_support_strength': (lambda: calculate_support_strength(close, close.iloc[-1]), 50),
+        'find_support_resistance_levels': (lambda: find_support_resistance_levels(close), 50),
+        'find_volume_profile_levels': (lambda: find_volume_profile_levels(close, volume), 50),
+        'check_new_filters': (lambda: [check_new_filters(result) for result in results], 1),
+        'stream_replay': (lambda: run_replay(replay_source), 1),
+        'scan_and_filter_stocks': (scan, 1),
+        # Yeni süreçte --filters; pandas/numpy/yfinance'ın tekrar en başta yüklenmesi burada gerileme olarak görünür
+        'startup_filters': (lambda: measure_startup(repeats=1), 1),
+    }
+    
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'n_tickers': n_tickers, 'n_bars': n_bars, 'repeats': repeats},
+        'results': {},
+    }
+    with isolated_scan_state():
+        for name, (func, number) in cases.items():
+            timings = _time_call(func, repeats, number)
+            report['results'][name] = {
+                'best_ms': min(timings) * 1000,
+                'median_ms': float(np.median(timings)) * 1000,
+                'repeats': repeats,
+            }
+    return report
+
+def compare_benchmarks(current, baseline, tolerance=BENCHMARK_REGRESSION_TOLERANCE):
+    """İki benchmark raporunu karşılaştır, en iyi süresi tolerans üstünde artan ölçümleri döndür"""
+    # En iyi süre paylaşımlı makinelerdeki anlık yük dalgalanmalarına medyandan daha az duyarlıdır
+    regressions = []
+    for name, result in current['results'].items():
+        reference = baseline.get('results', {}).get(name)
+        if reference and result['best_ms'] > reference['best_ms'] * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+def measure_startup(argv=('--filters',), repeats=5):
+    """Betiği her tekrarda yeni bir Python sürecinde -X importtime ile çalıştır
+    
+    Dönüş: {'best_ms', 'median_ms', 'import_ms', 'heavy': yüklenen ağır modüller, 'top': [(modül, ms), ...]}
+    """
+    command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), *argv]
+    timings, stderr = [], ""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', errors='replace')
+        timings.append(time.perf_counter() - start)
+        stderr = completed.stderr
+        if completed.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} başarısız: {stderr.strip().splitlines()[-1:]}")
+    # "import time: kendi | kümülatif | modül" satırları; girintisiz modüller en üst düzey importlardır
+    imports = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if line.startswith('import time:') and len(parts) == 3 and parts[1].strip().isdigit():
+            imports.append((parts[2].rstrip(), int(parts[1]) / 1000))
+    loaded = {name.strip() for name, _ in imports}
+    top_level = [(name.strip(), ms) for name, ms in imports if not name.startswith('  ')]
+    return {
+        'best_ms': min(timings) * 1000,
+        'median_ms': sorted(timings)[len(timings) // 2] * 1000,
+        'import_ms': sum(ms for _, ms in top_level),
+        # Tembel yüklenen paketin kendisi importtime'da görünmez, alt modülleri görünür
+        'heavy': [name for name in HEAVY_MODULES
+                  if any(module == name or module.startswith(f"{name}.") for module in loaded)],
+        'top': sorted(top_level, key=lambda item: -item[1])[:10],
+    }
+
+def run_benchmark_startup_cli(args):
+    """--benchmark-startup: kısa komutların başlangıç süresini ölç; ağır modül yüklenirse veya bütçe aşılırsa çıkış kodu 1"""
+    light = measure_startup(('--filters',), args.repeats)
+    heavy = measure_startup(('--filters', '--eager-imports'), args.repeats)
+    print(f"\n🚀 BAŞLANGIÇ SÜRESİ ({args.repeats} tekrar, en iyi / medyan)")
+    print(f"{'='*80}")
+    print(f"--filters                     {light['best_ms']:>8.0f} / {light['median_ms']:.0f} ms "
+          f"(import {light['import_ms']:.0f} ms)")
+    print(f"--filters + ağır kütüphaneler {heavy['best_ms']:>8.0f} / {heavy['median_ms']:.0f} ms "
+          f"(import {heavy['import_ms']:.0f} ms)")
+    print("\nEn pahalı üst düzey importlar (--filters):")
+    for name, ms in light['top']:
+        print(f"   {name:<40} {ms:>8.1f} ms")
+    
+    failures = []
+    if light['heavy']:
+        failures.append(f"kısa komut ağır modül yükledi: {', '.join(light['heavy'])}")
+    if light['best_ms'] > STARTUP_BUDGET_MS:
+        failures.append(f"başlangıç {light['best_ms']:.0f} ms > bütçe {STARTUP_BUDGET_MS} ms")
+    if failures:
+        print(f"\n❌ Gerileme: {'; '.join(failures)}")
+        sys.exit(1)
+    print(f"\n✅ Ağır modül yüklenmedi, bütçe ({STARTUP_BUDGET_MS} ms) içinde.")
+
+def run_benchmark_cli(args):
+    """Benchmark paketini çalıştır, JSON olarak kaydet ve istenirse referansla karşılaştır"""
+    report = run_benchmark_suite(args.bench_tickers, args.bench_bars, args.repeats)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    
+    params = report['params']
+    print(f"\n⏱️  BENCHMARK: {params['n_tickers']} hisse x {params['n_bars']} bar, {params['repeats']} tekrar")
+    print(f"{'='*80}")
+    print(f"{'Ölçüm':<32} {'En iyi (ms)':>12} {'Medyan (ms)':>12} {'Ref. en iyi':>14} {'Değişim':>8}")
+    regressions = compare_benchmarks(report, baseline, args.tolerance) if baseline else []
+    for name, result in report['results'].items():
+        reference = (baseline or {}).get('results', {}).get(name)
+        ref_text, change_text = "-", ""
+        if reference:
+            change = result['best_ms'] / reference['best_ms'] - 1
+            ref_text = f"{reference['best_ms']:.3f}"
+            change_text = f"{change*100:+.0f}%" + (" ⚠️" if name in regressions else "")
+        print(f"{name:<32} {result['best_ms']:>12.3f} {result['median_ms']:>12.3f} {ref_text:>14} {change_text:>8}")
+    
+    with open(args.benchmark_output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Sonuçlar {args.benchmark_output} dosyasına yazıldı.")
+    
+    if regressions:
+        print(f"❌ Gerileme tespit edildi: {', '.join(regressions)}")
+        sys.exit(1)
+
+# =============================================================================
+# ARTIMLI GÖSTERGELER VE BAR TEKRARI (AKIŞ MODU)
+# =============================================================================
+
+STREAM_LEVELS_WINDOW = 126  # Akış modunda destek/direnç aramasında kullanılan son bar sayısı (≈ 6 ay)
+
+class IncrementalEMA:
+    """calculate_ema (pandas ewm(span=...), adjust=True) ile aynı değeri bar başına O(1) güncelleyen EMA"""
+
+    def __init__(self, span):
+        self.factor = 1.0 - 2.0 / (span + 1.0)
+        self.value = np.nan
+        self.old_wt = 1.0
+
+    def update(self, x):
+        if self.value == self.value:
+            # Seri başladıktan sonra NaN barlarda da ağırlık azalır (ignore_na=False) - ema_panel ile aynı
+            self.old_wt *= self.factor
+            if x == x:
+                if self.value != x:
+                    self.value = (self.old_wt * self.value + x) / (self.old_wt + 1.0)
+                self.old_wt += 1.0
+        elif x == x:
+            self.value = x
+            self.old_wt = 1.0
+        return self.value
+
+class RollingMean:
+    """rolling(window).mean() ile aynı değeri veren, bar başına O(1) kayan toplamlı ortalama (pencere dolana kadar NaN)
+    
+    Toplam Kahan telafisiyle tutulur (pandas roll_mean gibi). Penceredeki NaN ve sıfır olmayan değerler sayılır:
+    NaN varsa sonuç NaN, hepsi sıfırsa yuvarlama artığı yerine tam 0 olur (RSI'da kayıp = 0 kontrolü için).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.compensation = 0.0
+        self.nan_count = 0
+        self.nonzero_count = 0
+        self.value = np.nan
+
+    def _accumulate(self, x, sign):
+        if x != x:
+            self.nan_count += sign
+            return
+        if x != 0:
+            self.nonzero_count += sign
+        y = sign * x - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self._accumulate(self.values[0], -1)
+        self.values.append(x)
+        self._accumulate(x, 1)
+        if len(self.values) < self.window or self.nan_count:
+            self.value = np.nan
+        elif not self.nonzero_count:
+            self.total = self.compensation = 0.0  # Birikmiş yuvarlama artığını sıfırla
+            self.value = 0.0
+        else:
+            self.value = self.total / self.window
+        return self.value
+
+class IncrementalRSI:
+    """calculate_rsi ile aynı sonucu veren artımlı RSI"""
+
+    def __init__(self, period=14):
+        self.gain = RollingMean(period)
+        self.loss = RollingMean(period)
+        self.prev = np.nan
+        self.value = np.nan
+
+    def update(self, close):
+        delta = close - self.prev
+        self.prev = close
+        # delta.where(delta > 0, 0) gibi: ilk bardaki NaN fark 0 kazanç/kayıp sayılır
+        gain = self.gain.update(delta if delta > 0 else 0.0)
+        loss = self.loss.update(-delta if delta < 0 else 0.0)
+        if loss == 0:
+            rs = np.inf if gain > 0 else np.nan
+        else:
+            rs = gain / loss
+        self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+class IncrementalMACD:
+    """calculate_macd ve check_macd_crossover ile aynı sonucu veren artımlı MACD"""
+
+    def __init__(self, fast=12, slow=26, signal=9, lookback=5):
+        self.fast = IncrementalEMA(fast)
+        self.slow = IncrementalEMA(slow)
+        self.signal_ema = IncrementalEMA(signal)
+        self.recent = deque(maxlen=lookback + 1)  # Kesişim kontrolü için son (macd, sinyal) çiftleri
+        self.macd = self.signal = self.histogram = np.nan
+
+    def update(self, close):
+        self.macd = self.fast.update(close) - self.slow.update(close)
+        self.signal = self.signal_ema.update(self.macd)
+        self.histogram = self.macd - self.signal
+        self.recent.append((self.macd, self.signal))
+        return self.macd, self.signal, self.histogram
+
+    @property
+    def crossover(self):
+        if len(self.recent) < self.recent.maxlen:
+            return False
+        pairs = list(self.recent)
+        return any(prev_macd < prev_signal and macd > signal
+                   for (prev_macd, prev_signal), (macd, signal) in zip(pairs, pairs[1:]))
+
+class IncrementalATR:
+    """calculate_atr ile aynı sonucu veren artımlı ATR"""
+
+    def __init__(self, period=14):
+        self.mean = RollingMean(period)
+        self.prev_close = np.nan
+        self.value = np.nan
+
+    def update(self, high, low, close):
+        # Gerçek aralık: NaN bileşenler pandas max(axis=1) gibi atlanır
+        ranges = [value for value in (high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+                  if value == value]
+        self.prev_close = close
+        self.value = self.mean.update(max(ranges) if ranges else np.nan)
+        return self.value
+
+class IncrementalVolumeIncrease:
+    """check_volume_increase ile aynı oranı veren artımlı hacim karşılaştırması"""
+
+    def __init__(self, days=VOLUME_LOOKBACK_DAYS):
+        self.days = days
+        self.volumes = deque(maxlen=days + 1)
+        self.value = 1.0
+
+    def update(self, volume):
+        self.volumes.append(volume)
+        if len(self.volumes) < self.days + 1:
+            self.value = 1.0
+            return self.value
+        avg_volume = (sum(self.volumes) - volume) / self.days  # Son N günün ortalaması (bugün hariç)
+        self.value = 1.0 if avg_volume == 0 else volume / avg_volume
+        return self.value
+
+class IncrementalIndicators:
+    """Bir hissenin tüm gösterge durumunu tutar; her yeni bar sabit sürede işlenir"""
+
+    def __init__(self, ticker, levels_window=STREAM_LEVELS_WINDOW):
+        self.ticker = ticker.upper()
+        self.bars = 0
+        self.rsi = IncrementalRSI()
+        self.ema_20 = IncrementalEMA(20)
+        self.ema_50 = IncrementalEMA(50)
+        self.macd = IncrementalMACD()
+        self.atr = IncrementalATR()
+        self.volume_increase = IncrementalVolumeIncrease()
+        self.closes = deque(maxlen=levels_window)  # Destek/direnç araması için son kapanışlar
+        self.volumes = deque(maxlen=levels_window)  # Hacim profili motoru için son hacimler
+        self.price = self.volume = np.nan
+
+    def update(self, open_, high, low, close, volume):
+        """Yeni barı tüm göstergelere uygula"""
+        self.bars += 1
+        self.price, self.volume = close, volume
+        self.rsi.update(close)
+        self.ema_20.update(close)
+        self.ema_50.update(close)
+        self.macd.update(close)
+        self.atr.update(high, low, close)
+        self.volume_increase.update(volume)
+        self.closes.append(close)
+        self.volumes.append(volume)
+
+    def result(self):
+        """analyze_history ile aynı alanlara sahip sonuç (destek/direnç alanları hariç)"""
+        return {
+            'ticker': self.ticker,
+            'price': self.price,
+            'volume': self.volume,
+            'volume_increase': self.volume_increase.value,
+            'rsi': self.rsi.value,
+            'ema_20': self.ema_20.value,
+            'ema_50': self.ema_50.value if self.bars >= 50 else None,
+            'macd': self.macd.macd,
+            'signal': self.macd.signal,
+            'histogram': self.macd.histogram,
+            'macd_crossover': self.macd.crossover,
+            'atr_percent': (self.atr.value / self.price) * 100,
+        }
+
+def check_stream_filters(state):
+    """Artımlı göstergelerle filtre kontrolü; destek/direnç sadece diğer etkin kriterler geçerse aranır
+    
+    (sonuç, uygun_mu) döndürür. 50 bardan kısa geçmişte analyze_history gibi sonuç None olur.
+    """
+    if state.bars < 50:
+        return None, False
+    result = state.result()
+    level_criteria = {stage['criterion'] for stage in FILTER_STAGES if 'levels' in stage['needs']}
+    columns = filter_columns(stock_columns(result))
+    with np.errstate(invalid='ignore'):
+        for name in active_filter_criteria():
+            if name not in level_criteria and not FILTER_CRITERIA[name](columns)[0]:
+                result.update(dict.fromkeys(INDICATORS['levels']['fields']))
+                result['partial'] = True
+                return result, False
+    with PROFILER.stage('support_resistance', state.ticker):
+        result.update(analyze_levels(np.fromiter(state.closes, dtype=float), result['price'],
+                                     np.fromiter(state.volumes, dtype=float)))
+    return result, check_new_filters(result)
+
+class BarReplaySource:
+    """Hisse geçmişlerini zaman sırasıyla (ticker, zaman, açılış, yüksek, düşük, kapanış, hacim) olarak oynatır"""
+
+    def __init__(self, histories):
+        frames = [hist[['Open', 'High', 'Low', 'Close', 'Volume']].assign(Ticker=ticker)
+                  for ticker, hist in histories.items() if len(hist)]
+        bars = pd.concat(frames) if frames else pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume', 'Ticker'])
+        # Aynı zamandaki barlar hisse sırasıyla; kararlı sıralama dosyadaki sırayı korur
+        self.bars = bars.rename_axis('Time').reset_index().sort_values(['Time', 'Ticker'], kind='mergesort')
+
+    @classmethod
+    def from_path(cls, path, ticker=None):
+        """CSV/Parquet/pickle dosyası veya klasöründen kaynak oluştur
+        
+        Dosyada 'Ticker' sütunu varsa birden fazla hisse içerebilir; yoksa kod dosya adından (veya ticker'dan) alınır.
+        """
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        histories = {}
+        for file_path in paths:
+            hist = read_ohlcv_file(file_path)
+            if hist is None:
+                continue
+            if 'Ticker' in hist.columns:
+                histories.update({name: group.drop(columns='Ticker') for name, group in hist.groupby('Ticker')})
+            else:
+                histories[ticker or ticker_from_filename(file_path)] = hist
+        return cls(histories)
+
+    def __len__(self):
+        return len(self.bars)
+
+    def __iter__(self):
+        columns = ['Ticker', 'Time', 'Open', 'High', 'Low', 'Close', 'Volume']
+        return self.bars[columns].itertuples(index=False, name=None)
+
+def run_replay(source, levels_window=STREAM_LEVELS_WINDOW):
+    """Kaynaktaki her barı artımlı göstergelere uygula ve filtreleri bar bar değerlendir"""
+    states = {}
+    signals = []
+    start = time.perf_counter()
+    for ticker, timestamp, open_, high, low, close, volume in source:
+        state = states.get(ticker)
+        if state is None:
+            state = states[ticker] = IncrementalIndicators(ticker, levels_window)
+        state.update(float(open_), float(high), float(low), float(close), float(volume))
+        result, passed = check_stream_filters(state)
+        if passed:
+            signals.append((timestamp, result))
+    return {'bars': len(source), 'seconds': time.perf_counter() - start, 'signals': signals, 'states': states}
+
+def run_replay_cli(args):
+    """Komut satırından bar tekrarı çalıştır ve hızı/sinyalleri yazdır"""
+    if args.synthetic:
+        source = BarReplaySource(generate_synthetic_universe(args.synthetic, args.bars))
+        name = f"yapay evren ({args.synthetic} hisse)"
+    else:
+        name = args.data_dir if args.replay is True else args.replay
+        source = BarReplaySource.from_path(name)
+    if not len(source):
+        print(f"❌ {name} içinde bar bulunamadı.")
+        return
+    
+    PROFILER.reset()
+    replay = run_replay(source)
+    rate = replay['bars'] / replay['seconds'] if replay['seconds'] else float('inf')
+    print(f"\n▶️  BAR TEKRARI: {name} - {replay['bars']:,} bar, {len(replay['states'])} hisse")
+    print(f"⚡ {replay['seconds']:.2f} sn ({rate:,.0f} bar/sn), {len(replay['signals'])} sinyal")
+    for timestamp, result in replay['signals'][-args.top:]:
+        print(f"   {timestamp}  {result['ticker']:<8} {result['price']:>10.2f} TL  RSI {result['rsi']:.1f}")
+
+# =============================================================================
+# KOMPAKT DEPOLAMA (TÜM BIST / GÜN İÇİ ÖLÇEK)
+# =============================================================================
+
+COMPACT_ANALYSIS_BARS = 2000   # Kompakt taramada hisse başına analiz edilen son bar sayısı (None -> tümü)
+COMPACT_CHUNK_TICKERS = 64     # Panel hesabında aynı anda işlenen hisse sayısı (bellek / hız dengesi)
+
+# Sütun -> disk/bellek veri tipi (fiyatlar float32, zaman damgası ve hacim int64)
+COMPACT_COLUMNS = {'Time': 'int64', 'Open': 'float32', 'High': 'float32', 'Low': 'float32',
+                   'Close': 'float32', 'Volume': 'int64'}
+
+def _compact_arrays(hist):
+    """DataFrame'i depo sütunlarına çevir (zaman UTC nanosaniye)"""
+    index = hist.index.tz_convert(None) if hist.index.tz is not None else hist.index
+    arrays = {'Time': index.to_numpy(dtype='datetime64[ns]').view(np.int64)}
+    for column in ('Open', 'High', 'Low', 'Close'):
+        arrays[column] = hist[column].to_numpy(dtype=np.float32)
+    arrays['Volume'] = np.nan_to_num(hist['Volume'].to_numpy(dtype=float)).astype(np.int64)
+    return arrays
+
+class OHLCVStore:
+    """Tüm evrenin OHLCV verisini bitişik float32/int64 dizilerde tutan depo
+    
+    Hisse i'nin barları her sütunda offsets[i]:offsets[i+1] aralığındadır. Diskten açıldığında
+    sütunlar memmap olur; sadece okunan hisselerin sayfaları belleğe gelir.
+    """
+
+    def __init__(self, tickers, offsets, columns, interval="1d", directory=None):
+        self.tickers = list(tickers)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.columns = columns
+        self.interval = interval
+        self.directory = directory  # Diskten açıldıysa klasör (çalışan süreçler depoyu buradan yeniden bağlar)
+        self._rows = {ticker: row for row, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def from_histories(cls, histories, interval="1d"):
+        """{hisse: DataFrame} sözlüğünden bellek içi depo oluştur"""
+        parts = {column: [] for column in COMPACT_COLUMNS}
+        offsets = [0]
+        for hist in histories.values():
+            for column, values in _compact_arrays(hist).items():
+                parts[column].append(values)
+            offsets.append(offsets[-1] + len(hist))
+        columns = {column: np.concatenate(values) if values else np.zeros(0, dtype)
+                   for (column, values), dtype in zip(parts.items(), COMPACT_COLUMNS.values())}
+        return cls(histories, offsets, columns, interval)
+
+    @classmethod
+    def open(cls, directory, mmap=True):
+        """write_ohlcv_store ile yazılmış depoyu aç (mmap=True ise diskten sayfa sayfa okunur)"""
+        with open(os.path.join(directory, 'index.json'), encoding='utf-8') as f:
+            index = json.load(f)
+        total = index['offsets'][-1]
+        columns = {}
+        for column, dtype in COMPACT_COLUMNS.items():
+            path = os.path.join(directory, f"{column.lower()}.bin")
+            if mmap and total:
+                columns[column] = np.memmap(path, dtype=dtype, mode='r', shape=(total,))
+            else:
+                columns[column] = np.fromfile(path, dtype=dtype, count=total)
+        return cls(index['tickers'], index['offsets'], columns, index.get('interval', "1d"), directory)
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.columns.values()) + self.offsets.nbytes
+
+    def bar_count(self, ticker=None):
+        if ticker is None:
+            return int(self.offsets[-1])
+        row = self._rows[ticker]
+        return int(self.offsets[row + 1] - self.offsets[row])
+
+    def series(self, ticker):
+        """Hissenin sütunları (kopyasız görünümler)"""
+        row = self._rows[ticker]
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return {column: values[start:end] for column, values in self.columns.items()}
+
+    def history(self, ticker):
+        """Hissenin geçmişini mevcut fonksiyonlarla kullanmak için DataFrame olarak döndür"""
+        series = self.series(ticker)
+        index = pd.DatetimeIndex(np.asarray(series['Time']).view('datetime64[ns]'), name="Date")
+        return pd.DataFrame({column: np.asarray(series[column], dtype=float)
+                             for column in ('Open', 'High', 'Low', 'Close', 'Volume')}, index=index)
+
+    def panel(self, tickers=None, window=None):
+        """build_price_panel(align='bars') biçiminde (hisse x bar) panel - her hissenin son window barı"""
+        tickers = self.tickers if tickers is None else list(tickers)
+        rows = np.array([self._rows[ticker] for ticker in tickers], dtype=np.int64)
+        ends = self.offsets[rows + 1]
+        lengths = ends - self.offsets[rows]
+        if window:
+            lengths = np.minimum(lengths, window)
+        width = int(lengths.max()) if len(lengths) else 0
+        panel = {'tickers': tickers, 'index': None, 'lengths': lengths}
+        for column in ('Open', 'High', 'Low', 'Close', 'Volume'):
+            data = np.full((len(tickers), width), np.nan)
+            values = self.columns[column]
+            for row, (end, length) in enumerate(zip(ends, lengths)):
+                data[row, width - length:] = values[end - length:end]
+            panel[column] = data
+        return panel
+
+def write_ohlcv_store(directory, items, interval="1d"):
+    """(hisse, DataFrame) çiftlerini sırayla diske ekleyerek depo oluştur - evrenin tamamı bellekte tutulmaz"""
+    os.makedirs(directory, exist_ok=True)
+    files = {column: open(os.path.join(directory, f"{column.lower()}.bin"), 'wb') for column in COMPACT_COLUMNS}
+    tickers, offsets = [], [0]
+    try:
+        for ticker, hist in items:
+            if hist is None or not len(hist):
+                continue
+            for column, values in _compact_arrays(hist).items():
+                files[column].write(values.tobytes())
+            tickers.append(ticker)
+            offsets.append(offsets[-1] + len(hist))
+    finally:
+        for f in files.values():
+            f.close()
+    tmp_path = os.path.join(directory, 'index.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'tickers': tickers, 'offsets': offsets, 'interval': interval}, f)
+    os.replace(tmp_path, os.path.join(directory, 'index.json'))
+    return OHLCVStore.open(directory)
+
+def compact_result_dtype(levels=None):
+    """Kompakt sonuç kaydının yapılandırılmış NumPy tipi (destek/direnç seviyeleri sabit boyutlu float32)"""
+    levels = levels or SUPPORT_RESISTANCE_COUNT
+    fields = [('ticker', 'U16')]
+    fields += [(field, '?' if field == 'macd_crossover' else 'f8') for field in RESULT_SCALAR_FIELDS]
+    fields += [(name, 'f4', (levels,)) for name in ('support_price', 'support_strength',
+                                                    'resistance_price', 'resistance_strength')]
+    return np.dtype(fields)
+
+def analyze_store(store, window=None, chunk=None, tickers=None):
+    """Depodaki hisseleri panel çekirdekleriyle parça parça analiz et, sonuçları yapılandırılmış dizi olarak döndür"""
+    window = COMPACT_ANALYSIS_BARS if window is None else window
+    chunk = chunk or COMPACT_CHUNK_TICKERS
+    all_tickers = store.tickers if tickers is None else list(tickers)
+    records = np.zeros(len(all_tickers), dtype=compact_result_dtype())
+    for name in records.dtype.names:
+        if records.dtype[name].base.kind == 'f':
+            records[name] = np.nan
+    valid = np.zeros(len(all_tickers), dtype=bool)
+    
+    for start in range(0, len(all_tickers), chunk):
+        tickers = all_tickers[start:start + chunk]
+        block = records[start:start + len(tickers)]
+        with PROFILER.stage('indicators'):
+            panel = store.panel(tickers, window)
+            for field, values in panel_last_values(panel).items():
+                block[field] = values
+        block['ticker'] = [ticker.upper() for ticker in tickers]
+        PROFILER.count('bars', int(panel['lengths'].sum()))
+        
+        with PROFILER.stage('support_resistance'):
+            for row, length in enumerate(panel['lengths']):
+                if length < 50:
+                    continue
+                start_bar = panel['Close'].shape[1] - length
+                supports, resistances = support_resistance_levels(
+                    panel['Close'][row, start_bar:], panel['Volume'][row, start_bar:], block['price'][row])
+                for prefix, levels in (('support', supports), ('resistance', resistances)):
+                    if levels:
+                        block[f'{prefix}_price'][row, :len(levels)] = [price for price, _ in levels]
+                        block[f'{prefix}_strength'][row, :len(levels)] = [strength for _, strength in levels]
+                        block[f'nearest_{prefix}'][row] = levels[0][0]
+        valid[start:start + len(tickers)] = panel['lengths'] >= 50
+    return records[valid]
+
+COMPUTE_BENCHMARK_PROCESSES = (1, 2, 4, 8)   # --benchmark-compute ile ölçülen süreç sayıları
+
+def records_equal(a, b):
+    """İki kompakt sonuç dizisi alan alan aynı mı (NaN'lar eşit sayılır)"""
+    return a.dtype == b.dtype and len(a) == len(b) and all(
+        np.array_equal(a[name], b[name], equal_nan=a.dtype[name].base.kind == 'f') for name in a.dtype.names)
+
+# Çalışan süreçlerde memmap klasöründen veya paylaşımlı bellekten bağlanan depo
+_COMPUTE_STATE = {}
+
+def share_store(store):
+    """Bellek içi deponun sütunlarını tek bir paylaşımlı bellek bloğuna kopyala -> (shm, çalışan bağlama bilgisi)"""
+    layout, size = [], 0
+    for column, values in store.columns.items():
+        layout.append((column, values.dtype.str, size, len(values)))
+        size += values.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for column, dtype, offset, count in layout:
+        np.ndarray((count,), dtype=dtype, buffer=shm.buf, offset=offset)[:] = store.columns[column]
+    return shm, {'shm': shm.name, 'layout': layout, 'tickers': store.tickers,
+                 'offsets': store.offsets, 'interval': store.interval}
+
+def _attach_compute_store(source, settings=None):
+    """Süreç başlatıcı: ana süreçteki ayarları uygula, depoyu memmap klasöründen veya paylaşımlı bellekten
+    kopyalamadan bağla"""
+    apply_settings(settings)
+    _COMPUTE_STATE.clear()
+    if isinstance(source, str):
+        _COMPUTE_STATE['store'] = OHLCVStore.open(source)
+        return
+    shm = shared_memory.SharedMemory(name=source['shm'])
+    columns = {column: np.ndarray((count,), dtype=dtype, buffer=shm.buf, offset=offset)
+               for column, dtype, offset, count in source['layout']}
+    _COMPUTE_STATE.update({'shm': shm, 'store': OHLCVStore(source['tickers'], source['offsets'], columns,
+                                                           source['interval'])})
+
+def _analyze_compute_chunk(task):
+    """Çalışan: bir hisse dilimini analiz et ve kompakt kayıtları döndür (DataFrame taşınmaz)"""
+    start, stop, window = task
+    store = _COMPUTE_STATE['store']
+    return analyze_store(store, window, tickers=store.tickers[start:stop])
+
+def analyze_store_parallel(store, processes=None, chunk=None, window=None):
+    """Depoyu süreç havuzunda hisse dilimleri halinde analiz et (analyze_store ile aynı sonuç ve sıra)"""
+    processes = COMPUTE_PROCESSES if processes is None else processes
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1:
+        return analyze_store(store, window)
+    chunk = chunk or COMPUTE_CHUNK_TICKERS
+    total = len(store.tickers)
+    tasks = [(start, min(start + chunk, total), window) for start in range(0, total, chunk)]
+    
+    # Diskteki depo çalışanlarda memmap ile açılır, bellek içi depo paylaşımlı belleğe bir kez kopyalanır
+    shm = None
+    if store.directory:
+        source = store.directory
+    else:
+        shm, source = share_store(store)
+    try:
+        with futures_process.ProcessPoolExecutor(max_workers=processes, initializer=_attach_compute_store,
+                                 initargs=(source, settings_snapshot())) as executor:
+            parts = list(executor.map(_analyze_compute_chunk, tasks))
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    
+    lengths = np.diff(store.offsets)
+    window = COMPACT_ANALYSIS_BARS if window is None else window
+    PROFILER.count('bars', int((np.minimum(lengths, window) if window else lengths).sum()))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=compact_result_dtype())
+
+def benchmark_compute_scaling(n_tickers=200, n_bars=2000, processes=None, repeats=3):
+    """Hesaplama aşamasının 1, 2, 4, 8 süreçteki verimini yapay evrende ölç (havuz başlatma süresi dahil)"""
+    store = OHLCVStore.from_histories(generate_synthetic_universe(n_tickers, n_bars))
+    reference = analyze_store(store)
+    rows = []
+    for count in processes or COMPUTE_BENCHMARK_PROCESSES:
+        timings = _time_call(lambda: analyze_store_parallel(store, count), repeats)
+        records = analyze_store_parallel(store, count)
+        best = min(timings)
+        rows.append({
+            'Süreç': count,
+            'En iyi (sn)': best,
+            'Hisse/sn': n_tickers / best,
+            'Bar/sn': store.bar_count() / best,
+            'Hızlanma': (rows[0]['En iyi (sn)'] if rows else best) / best,
+            'Aynı sonuç': records_equal(records, reference),
+        })
+    return pd.DataFrame(rows)
+
+def run_benchmark_compute_cli(args):
+    """--benchmark-compute: hesaplama aşamasının süreç sayısına göre ölçeklenmesini yazdır"""
+    n_tickers, n_bars = args.synthetic or 200, args.bars
+    processes = [int(p) for p in args.processes.split(',')] if args.processes else None
+    print(f"\n⏱️  HESAPLAMA ÖLÇEKLENMESİ: {n_tickers} hisse x {n_bars} bar, {args.repeats} tekrar, "
+          f"{os.cpu_count()} çekirdek")
+    print(f"{'='*80}")
+    table = benchmark_compute_scaling(n_tickers, n_bars, processes, args.repeats)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+
+def records_to_results(records):
+    """Kompakt sonuç kayıtlarını display_results'un beklediği sözlüklere çevir (sadece gösterim için)"""
+    results = []
+    for record in records:
+        result = {'ticker': str(record['ticker'])}
+        for field in RESULT_SCALAR_FIELDS:
+            value = record[field].item()
+            result[field] = None if isinstance(value, float) and np.isnan(value) else value
+        price = result['price']
+        for prefix, key in (('support', 'supports_with_strength'), ('resistance', 'resistances_with_strength')):
+            prices, strengths = record[f'{prefix}_price'], record[f'{prefix}_strength']
+            result[key] = [(float(p), float(s)) for p, s in zip(prices, strengths) if not np.isnan(p)]
+        result['support_distances'] = [(price - p) / p * 100 for p, _ in result['supports_with_strength']]
+        result['resistance_distances'] = [(p - price) / price * 100 for p, _ in result['resistances_with_strength']]
+        results.append(result)
+    return results
+
+def run_compact_cli(args):
+    """--compact-build / --compact-scan: kompakt depoyu oluştur ve/veya üzerinde tarama yap"""
+    if args.compact_build:
+        if args.synthetic:
+            names = [f"SYN{i:04d}" for i in range(args.synthetic)]
+            items = ((name, generate_synthetic_ohlcv(name, args.bars, bar_minutes=args.bar_minutes)) for name in names)
+            source = f"yapay evren ({args.synthetic} hisse x {args.bars} bar)"
+        else:
+            items = ((ticker_from_filename(name), read_ohlcv_file(os.path.join(args.data_dir, name)))
+                     for name in sorted(os.listdir(args.data_dir)) if '_' not in name)
+            source = args.data_dir
+        interval = f"{args.bar_minutes}m" if args.bar_minutes else "1d"
+        start = time.perf_counter()
+        store = write_ohlcv_store(args.compact_build, items, interval)
+        print(f"💾 {source} -> {args.compact_build}: {len(store.tickers)} hisse, {store.bar_count():,} bar, "
+              f"{store.nbytes / 2**20:,.1f} MB ({time.perf_counter() - start:.1f} sn)")
+    
+    directory = args.compact_scan or args.compact_build
+    if not args.compact_scan:
+        return
+    store = OHLCVStore.open(directory)
+    PROFILER.reset()
+    with PROFILER.stage('compute'):
+        records = analyze_store_parallel(store, args.workers, args.chunk)
+    with PROFILER.stage('filter'):
+        passed = filter_pass_mask(evaluate_filter_matrix(records)) if len(records) else np.zeros(0, dtype=bool)
+    print(f"\n✅ {len(records)} hisse analiz edildi ({store.bar_count():,} bar, depo {store.nbytes / 2**20:,.1f} MB, "
+          f"sonuçlar {records.nbytes / 2**10:,.1f} KB).")
+    print(f"🎯 {int(passed.sum())} hisse kriterlere uygun bulundu.\n")
+    with PROFILER.stage('display'):
+        all_results = records_to_results(records)
+        display_results([result for result, ok in zip(all_results, passed) if ok], all_results)
+    report_scan_profile()
+
+# =============================================================================
+# TARAMA ANLIK GÖRÜNTÜLERİ (SNAPSHOT) VE FARK
+# =============================================================================
+
+SNAPSHOT_ENABLED = True       # Her taramanın sonuçları sütunsal bir dosyaya kaydedilir
+SNAPSHOT_DIR = "snapshots"    # Anlık görüntü klasörü (scan_YYYYAAGG_SSDDss.npz)
+SNAPSHOT_KEEP = 200           # Saklanan en fazla anlık görüntü (eskiler silinir)
+SNAPSHOT_EXPORT = None        # Verilirse her taramanın satırları bu .jsonl/.csv dosyasının sonuna eklenir
+
+# Kriter değişiminde gösterilecek sütun (kriter adıyla aynı değilse)
+CRITERION_VALUE_FIELDS = {'macd_histogram': 'histogram', 'ema_trend': 'ema_20', 'atr': 'atr_percent',
+                          'stop_loss': 'stop_loss_distance'}
+
+def _padded_levels(results, key, index):
+    """Destek/direnç listelerini (hisse x SUPPORT_RESISTANCE_COUNT) NaN dolgulu diziye çevir"""
+    out = np.full((len(results), SUPPORT_RESISTANCE_COUNT), np.nan)
+    for row, result in enumerate(results):
+        for col, level in enumerate((result.get(key) or [])[:SUPPORT_RESISTANCE_COUNT]):
+            out[row, col] = level[index]
+    return out
+
+def save_snapshot(all_results, path=None):
+    """Tarama sonuçlarını tüm gösterge değerleri ve kriter matrisiyle sıkıştırılmış .npz dosyasına yaz
+    (sonuçlar tam olmalı - record_scan_snapshot kısmi sonuçları önce tamamlar)"""
+    if path is None:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        path = os.path.join(SNAPSHOT_DIR, f"scan_{datetime.now():%Y%m%d_%H%M%S_%f}.npz")
+    frame = results_to_frame(all_results)
+    columns = filter_columns(frame)
+    matrix = evaluate_filter_matrix(frame, columns)
+    meta = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'criteria': list(FILTER_CRITERIA),
+        'active': active_filter_criteria(),
+        'thresholds': {name: globals()[name] for name in FILTER_THRESHOLDS},
+    }
+    arrays = {f"field_{field}": columns[field] for field in RESULT_SCALAR_FIELDS}
+    for key in ('supports_with_strength', 'resistances_with_strength'):
+        arrays[f"{key}_price"] = _padded_levels(all_results, key, 0)
+        arrays[f"{key}_strength"] = _padded_levels(all_results, key, 1)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        tickers=np.array([result['ticker'] for result in all_results], dtype=str),
+        matrix=matrix.to_numpy(dtype=bool).reshape(len(all_results), len(FILTER_CRITERIA)),
+        passed=filter_pass_mask(matrix) if all_results else np.zeros(0, dtype=bool),
+        meta=np.array(json.dumps(meta, ensure_ascii=False)),
+        **arrays,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+def list_snapshots(directory=None):
+    """Klasördeki anlık görüntüler, eskiden yeniye"""
+    directory = directory or SNAPSHOT_DIR
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.startswith('scan_') and name.endswith('.npz')]
+
+def prune_snapshots(keep=None):
+    """En yeni keep anlık görüntü dışındakileri sil"""
+    keep = SNAPSHOT_KEEP if keep is None else keep
+    paths = list_snapshots()
+    for path in paths[:max(0, len(paths) - keep)]:
+        os.remove(path)
+
+def load_snapshot(path):
+    """Anlık görüntüyü hiçbir gösterge yeniden hesaplanmadan yükle"""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        frame = pd.DataFrame({field: data[f"field_{field}"] for field in RESULT_SCALAR_FIELDS})
+        frame.insert(0, 'ticker', data['tickers'])
+        levels = {key: data[key] for key in data.files if key.endswith(('_price', '_strength'))}
+        return {
+            'path': path,
+            'meta': meta,
+            'frame': frame,
+            'matrix': pd.DataFrame(data['matrix'], columns=meta['criteria']),
+            'passed': data['passed'],
+            'levels': levels,
+        }
+
+def snapshot_results(snapshot):
+    """Anlık görüntüden display_results ile kullanılabilecek sonuç sözlüklerini geri oluştur"""
+    frame, levels = snapshot['frame'], snapshot['levels']
+    results = []
+    for row in range(len(frame)):
+        result = {'ticker': frame['ticker'].iat[row]}
+        for field in RESULT_SCALAR_FIELDS:
+            value = frame[field].iat[row]
+            result[field] = None if np.isnan(value) else float(value)
+        if result['macd_crossover'] is not None:
+            result['macd_crossover'] = bool(result['macd_crossover'])
+        price = result['price']
+        for key in ('supports_with_strength', 'resistances_with_strength'):
+            prices, strengths = levels[f"{key}_price"][row], levels[f"{key}_strength"][row]
+            result[key] = [(p, s) for p, s in zip(prices.tolist(), strengths.tolist()) if not np.isnan(p)]
+        result['support_distances'] = [(price - p) / p * 100 for p, _ in result['supports_with_strength']]
+        result['resistance_distances'] = [(p - price) / price * 100 for p, _ in result['resistances_with_strength']]
+        results.append(result)
+    return results
+
+def diff_snapshots(old, new):
+    """İki anlık görüntü arasında yeni giren/çıkan hisseler ve kriter eşiği geçişleri"""
+    old_rows = {ticker: row for row, ticker in enumerate(old['frame']['ticker'])}
+    new_rows = {ticker: row for row, ticker in enumerate(new['frame']['ticker'])}
+    old_passed = {ticker for ticker, row in old_rows.items() if old['passed'][row]}
+    new_passed = {ticker for ticker, row in new_rows.items() if new['passed'][row]}
+    old_columns = filter_columns(old['frame'])
+    new_columns = filter_columns(new['frame'])
+    
+    crossings = []
+    criteria = [name for name in new['meta']['criteria'] if name in old['meta']['criteria']]
+    for ticker, new_row in new_rows.items():
+        old_row = old_rows.get(ticker)
+        if old_row is None:
+            continue
+        for name in criteria:
+            before, after = bool(old['matrix'][name].iat[old_row]), bool(new['matrix'][name].iat[new_row])
+            if before != after:
+                field = CRITERION_VALUE_FIELDS.get(name, name)
+                crossings.append({'ticker': ticker, 'criterion': name, 'passed': after,
+                                  'old_value': float(old_columns[field][old_row]),
+                                  'new_value': float(new_columns[field][new_row])})
+    
+    changed = {name: (old['meta']['thresholds'].get(name), value)
+               for name, value in new['meta']['thresholds'].items()
+               if old['meta']['thresholds'].get(name) != value}
+    return {
+        'new_matches': [ticker for ticker in new_rows if ticker in new_passed and ticker not in old_passed],
+        'dropped_matches': [ticker for ticker in old_rows if ticker in old_passed and ticker not in new_passed],
+        'crossings': crossings,
+        'threshold_changes': changed,
+    }
+
+def print_snapshot_diff(diff, old, new, details=True):
+    """Fark özetini yazdır"""
+    print(f"\n🔀 {old['meta']['timestamp']} -> {new['meta']['timestamp']} karşılaştırması")
+    print(f"   🟢 Yeni uygun hisseler ({len(diff['new_matches'])}): {', '.join(diff['new_matches']) or '-'}")
+    print(f"   🔴 Listeden çıkanlar ({len(diff['dropped_matches'])}): {', '.join(diff['dropped_matches']) or '-'}")
+    for name, (before, after) in diff['threshold_changes'].items():
+        print(f"   ⚙️  {name}: {before} -> {after} (eşik değişti)")
+    if details and diff['crossings']:
+        print(f"   Kriter geçişleri ({len(diff['crossings'])}):")
+        for crossing in diff['crossings']:
+            state = "geçti ✅" if crossing['passed'] else "kaldı ❌"
+            print(f"     • {crossing['ticker']:<8} {crossing['criterion']:<20} {state}  "
+                  f"{crossing['old_value']:.4g} -> {crossing['new_value']:.4g}")
+
+def export_snapshot(snapshot, path, append=False):
+    """Anlık görüntüyü satır satır .jsonl veya .csv olarak yaz (büyük dosyada bellekte tablo oluşturmadan)"""
+    results = snapshot_results(snapshot)
+    timestamp = snapshot['meta']['timestamp']
+    matrix = snapshot['matrix']
+    active = snapshot['meta']['active']
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    with open(path, 'a' if append else 'w', encoding='utf-8', newline='') as f:
+        writer = None
+        for row, result in enumerate(results):
+            failed = [name for name in active if not matrix[name].iat[row]]
+            record = {'timestamp': timestamp, **result, 'passed': bool(snapshot['passed'][row]), 'failed': failed}
+            if path.endswith('.csv'):
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=['timestamp', 'ticker', 'passed', *RESULT_SCALAR_FIELDS,
+                                                           'failed'], extrasaction='ignore')
+                    if not (append and exists):
+                        writer.writeheader()
+                writer.writerow({**record, 'failed': "|".join(failed)})
+            else:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(results)
+
+def record_scan_snapshot(all_results, provider=None):
+    """Taramayı anlık görüntü olarak kaydet, önceki taramayla farkı yazdır ve istenirse dışa aktar"""
+    if not SNAPSHOT_ENABLED or not all_results:
+        return None
+    # Her hisse tüm gösterge değerleriyle yazılır (tarama bunu zaten yapar; dışarıdan gelen kısmi sonuçlar tamamlanır)
+    all_results = [ensure_full_diagnostics(result, provider) for result in all_results]
+    previous = list_snapshots()[-1:]
+    path = save_snapshot(all_results)
+    snapshot = load_snapshot(path)
+    if previous:
+        old = load_snapshot(previous[0])
+        print_snapshot_diff(diff_snapshots(old, snapshot), old, snapshot, details=False)
+    if SNAPSHOT_EXPORT:
+        export_snapshot(snapshot, SNAPSHOT_EXPORT, append=True)
+    prune_snapshots()
+    print(f"💾 Tarama anlık görüntüsü: {path}")
+    return path
+
+def run_snapshot_cli(args):
+    """--diff ve --export komutları"""
+    if args.diff is not None:
+        paths = args.diff or list_snapshots()[-2:]
+        if len(paths) != 2:
+            print("❌ Karşılaştırma için iki anlık görüntü gerekir (--diff ESKİ YENİ).")
+            return
+        old, new = (load_snapshot(path) for path in paths)
+        print_snapshot_diff(diff_snapshots(old, new), old, new)
+    if args.export:
+        source = args.snapshot or (list_snapshots()[-1:] or [None])[0]
+        if source is None:
+            print("❌ Dışa aktarılacak anlık görüntü bulunamadı.")
+            return
+        count = export_snapshot(load_snapshot(source), args.export)
+        print(f"💾 {source} -> {args.export} ({count} satır)")
+
+# =============================================================================
+# GÖSTERGE PROFİLİ BENZERLİK ARAMASI
+# =============================================================================
+
+SIMILARITY_ENABLED = True  # Taramada her hissenin özellik vektörü SIMILARITY_INDEX'e eklenir (tüm göstergeler hesaplanır)
+
+# Özellik adı -> sütunlardan (filter_columns/stock_columns) hisse başına değer; uzaklıklar yönlü (işaretli)
+SIMILARITY_FEATURES = {
+    'rsi': lambda c: c['rsi'],
+    'macd_histogram': lambda c: c['histogram'] / c['price'] * 100,
+    'ema20_distance': lambda c: (c['price'] - c['ema_20']) / c['ema_20'],
+    'ema50_distance': lambda c: (c['price'] - c['ema_50']) / c['ema_50'],
+    'atr_percent': lambda c: c['atr_percent'],
+    'volume_increase': lambda c: np.log(c['volume_increase']),
+    'support_distance': lambda c: (c['price'] - c['nearest_support']) / c['price'],
+    'resistance_distance': lambda c: (c['nearest_resistance'] - c['price']) / c['price'],
+}
+
+def similarity_features(columns):
+    """Sütunlardan (hisse x özellik) ham özellik matrisi - hesaplanmamış değerler NaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.column_stack([np.asarray(feature(columns), dtype=float)
+                                for feature in SIMILARITY_FEATURES.values()])
+
+class SimilarityIndex:
+    """Hisse başına özellik vektörlerini tutan, tarama ilerledikçe güncellenen k-en-yakın-komşu indeksi
+    
+    Özellikler sorgu anında evren üzerinden z-skoruna çevrilir (güncellemeden sonraki ilk sorguda bir kez).
+    Eksik özellikler ortalama kabul edilir; sorgu hissesinde eksik olan özellikler uzaklığa katılmaz.
+    """
+
+    def __init__(self, capacity=256):
+        self._capacity = capacity
+        self._vectors = None  # İlk güncellemede ayrılır (modül yüklenirken NumPy gerekmesin)
+        self._tickers = []
+        self._rows = {}
+        self._scaled = None
+        self._lock = threading.Lock()
+
+    def update(self, result):
+        """Tek hisse sonucunu ekle veya güncelle (kısmi sonuçlar atlanır: hesaplanmamış göstergeler uzaklığı bozar)"""
+        if not result or result.get('partial'):
+            return
+        vector = similarity_features(stock_columns(result))[0]
+        with self._lock:
+            row = self._rows.get(result['ticker'])
+            if row is None:
+                row = len(self._tickers)
+                if self._vectors is None:
+                    self._vectors = np.full((self._capacity, len(SIMILARITY_FEATURES)), np.nan)
+                if row == len(self._vectors):
+                    self._vectors = np.vstack([self._vectors, np.full_like(self._vectors, np.nan)])
+                self._rows[result['ticker']] = row
+                self._tickers.append(result['ticker'])
+            self._vectors[row] = vector
+            self._scaled = None
+
+    def __contains__(self, ticker):
+        return ticker.upper() in self._rows
+
+    def _scaled_vectors(self):
+        with self._lock:
+            if self._scaled is None:
+                vectors = self._vectors[:len(self._tickers)]
+                mean = np.nanmean(vectors, axis=0)
+                std = np.nanstd(vectors, axis=0)
+                std = np.where(np.isnan(std) | (std == 0), 1.0, std)
+                self._scaled = np.nan_to_num((vectors - mean) / std, nan=0.0)
+            return self._scaled, self._vectors[:len(self._tickers)]
+
+    def query(self, ticker, k=5):
+        """ticker'a gösterge profili en çok benzeyen k hisse: [(hisse, uzaklık), ...]"""
+        row = self._rows[ticker.upper()]
+        scaled, raw = self._scaled_vectors()
+        weights = ~np.isnan(raw[row])
+        distances = np.sqrt((((scaled - scaled[row]) ** 2) * weights).sum(axis=1))
+        distances[row] = np.inf
+        k = min(k, len(distances) - 1)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(self._tickers[i], float(distances[i])) for i in nearest]
+
+    def features(self, ticker):
+        """Hissenin ham özellikleri {özellik: değer}"""
+        return dict(zip(SIMILARITY_FEATURES, self._vectors[self._rows[ticker.upper()]].tolist()))
+
+SIMILARITY_INDEX = SimilarityIndex()
+
+def display_similar_stocks(ticker, neighbors, index=None):
+    """Sorgu hissesi ve komşularının özelliklerini tablo olarak göster"""
+    index = index or SIMILARITY_INDEX
+    rows = [(ticker.upper(), 0.0)] + neighbors
+    table = []
+    for name, distance in rows:
+        features = index.features(name)
+        table.append({
+            "Hisse": name,
+            "Uzaklık": f"{distance:.2f}",
+            "RSI": f"{features['rsi']:.1f}",
+            "MACD Hist. %": f"{features['macd_histogram']:.2f}",
+            "EMA20 Uzaklık": f"%{features['ema20_distance']*100:.1f}",
+            "EMA50 Uzaklık": f"%{features['ema50_distance']*100:.1f}",
+            "ATR": f"%{features['atr_percent']:.1f}",
+            "Hacim Artışı": f"%{(np.exp(features['volume_increase'])-1)*100:.1f}",
+            "Destek": f"%{features['support_distance']*100:.1f}",
+            "Direnç": f"%{features['resistance_distance']*100:.1f}",
+        })
+    print(f"\n{'='*100}")
+    print(f"{ticker.upper()} HİSSESİNE EN ÇOK BENZEYEN {len(neighbors)} HİSSE")
+    print(f"{'='*100}")
+    print(pd.DataFrame(table).to_string(index=False).replace("nan", "-"))
+
+def run_similarity_cli(args):
+    """Evreni tam göstergelerle tara (indeks tarama ilerledikçe dolar) ve benzer hisseleri listele"""
+    selected_stocks = [ticker.strip().upper() for ticker in args.tickers.split(',')] if args.tickers else None
+    query = args.similar.strip().upper()
+    universe = list(selected_stocks or default_universe())
+    if query not in universe:
+        universe.append(query)
+    _, all_results = scan_and_filter_stocks(universe, full_diagnostics=True)
+    if not SIMILARITY_ENABLED:
+        for result in all_results:
+            SIMILARITY_INDEX.update(result)
+    if query not in SIMILARITY_INDEX:
+        print(f"❌ {query} için veri alınamadı.")
+        return
+    start = time.perf_counter()
+    neighbors = SIMILARITY_INDEX.query(query, args.neighbors)
+    elapsed = (time.perf_counter() - start) * 1000
+    display_similar_stocks(query, neighbors)
+    print(f"\n⚡ Sorgu süresi: {elapsed:.3f} ms")
+    if RESULT_CACHE:
+        RESULT_CACHE.save()
+
+# =============================================================================
+# GETİRİ KORELASYONU (BİRLİKTE HAREKET EDEN EŞLEŞMELER)
+# =============================================================================
+
+CORRELATION_ENABLED = True
+CORRELATION_WINDOW = 60           # Korelasyonda kullanılan son günlük getiri sayısı
+CORRELATION_THRESHOLD = 0.80      # Bu korelasyonun üstündeki uygun hisseler aynı grupta gösterilir
+CORRELATION_DEDUPLICATE = False   # True ise tabloda her gruptan sadece ilk hisse kalır
+CORRELATION_REBUILD_EVERY = 500   # Bu kadar artımlı güncellemeden sonra birikmiş yuvarlama hatası için tam hesap
+
+class RollingCorrelation:
+    """Tüm evrenin kayan pencereli getiri korelasyon matrisi
+    
+    Getiri toplamları ve çapraz çarpım matrisi (R^T R) tutulur; yeni bar pencereye girip en eski bar
+    çıkarken matris O(N²) ile güncellenir. Tam O(N²·T) hesap sadece evren değiştiğinde, veri
+    kesintisinde veya CORRELATION_REBUILD_EVERY güncellemede bir yapılır. Eksik getiriler 0 sayılır.
+    """
+
+    def __init__(self, window=CORRELATION_WINDOW, rebuild_every=CORRELATION_REBUILD_EVERY):
+        self.window = window
+        self.rebuild_every = rebuild_every
+        self.tickers = []
+        self.last_date = None
+        self.stats = {'rebuilds': 0, 'updates': 0}
+        self._updates_since_rebuild = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def observe(self, ticker, close):
+        """Taramada çekilen kapanış serisini sıradaki sync için kaydet (iş parçacığı güvenli)"""
+        if close is not None and len(close):
+            with self._lock:
+                self._pending[ticker.upper()] = close.iloc[-(self.window + 1):]
+
+    def sync(self, closes=None):
+        """Kapanış tablosuna (tarih x hisse) göre matrisi güncelle; verilmezse observe edilen seriler kullanılır"""
+        if closes is None:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            closes = pd.DataFrame(pending).sort_index().sort_index(axis=1)
+        closes = closes.astype(float).ffill()  # Bar olmayan günde getiri 0, sonraki bar iki günlük getiriyi taşır
+        if list(closes.columns) != self.tickers or self.last_date not in closes.index or \
+                self._updates_since_rebuild >= self.rebuild_every:
+            self.rebuild(closes)
+            return
+        # Son bar gün içinde değişmiş olabilir: son getiri geri alınıp yeniden eklenir
+        position = closes.index.get_loc(self.last_date)
+        current = closes.iloc[position].to_numpy()
+        if not np.array_equal(current, self._last_close, equal_nan=True):
+            self.push(self.last_date, current, replace=True)
+        for date, row in zip(closes.index[position + 1:], closes.to_numpy()[position + 1:]):
+            self.push(date, row)
+
+    def rebuild(self, closes):
+        """Kapanış tablosundan tam hesap (son window getirisi)"""
+        closes = closes.ffill().tail(self.window + 1)
+        returns = np.nan_to_num(closes.pct_change(fill_method=None).to_numpy()[1:], nan=0.0, posinf=0.0, neginf=0.0)
+        self.tickers = list(closes.columns)
+        self._returns = np.zeros((self.window, len(self.tickers)))
+        self._returns[:len(returns)] = returns
+        self._position = len(returns) % self.window
+        self._count = len(returns)
+        self._sums = returns.sum(axis=0)
+        self._cross = returns.T @ returns
+        self._last_close = closes.iloc[-1].to_numpy()
+        self._prev_close = closes.iloc[-2].to_numpy() if len(closes) > 1 else self._last_close.copy()
+        self.last_date = closes.index[-1]
+        self._updates_since_rebuild = 0
+        self._matrix = None
+        self.stats['rebuilds'] += 1
+
+    def push(self, date, close, replace=False):
+        """Yeni barın getirisini pencereye ekle (replace=True ise son barın getirisini güncelle) - O(N²)"""
+        close = np.asarray(close, dtype=float)
+        if replace:
+            slot = (self._position - 1) % self.window
+            base = self._prev_close
+        else:
+            slot = self._position
+            base = self._last_close
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new = np.nan_to_num(close / base - 1, nan=0.0, posinf=0.0, neginf=0.0)
+        old = self._returns[slot]
+        self._cross += np.outer(new, new) - np.outer(old, old)
+        self._sums += new - old
+        self._returns[slot] = new
+        if not replace:
+            self._position = (self._position + 1) % self.window
+            self._count = min(self._count + 1, self.window)
+            self._prev_close = self._last_close
+        self._last_close = np.where(np.isnan(close), self._last_close, close)
+        self.last_date = date
+        self._updates_since_rebuild += 1
+        self._matrix = None
+        self.stats['updates'] += 1
+
+    def matrix(self):
+        """Korelasyon matrisi (N x N, varyansı sıfır olan hissede NaN)"""
+        if self._matrix is None:
+            n = max(self._count, 1)
+            mean = self._sums / n
+            covariance = self._cross / n - np.outer(mean, mean)
+            std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._matrix = np.clip(covariance / np.outer(std, std), -1.0, 1.0)
+        return self._matrix
+
+    def correlation(self, a, b):
+        rows = {ticker: row for row, ticker in enumerate(self.tickers)}
+        return float(self.matrix()[rows[a.upper()], rows[b.upper()]])
+
+    def groups(self, tickers, threshold=None):
+        """tickers içinde korelasyonu eşik üstündeki hisseleri bağlantılı gruplara ayır (sıra korunur)"""
+        threshold = CORRELATION_THRESHOLD if threshold is None else threshold
+        rows = {ticker: row for row, ticker in enumerate(self.tickers)}
+        known = [ticker for ticker in tickers if ticker in rows]
+        index = np.array([rows[ticker] for ticker in known], dtype=np.int64)
+        linked = self.matrix()[np.ix_(index, index)] >= threshold if len(index) else np.zeros((0, 0), bool)
+        
+        group_of = {}
+        groups = []
+        for start in range(len(known)):
+            if start in group_of:
+                continue
+            members, queue = [], [start]
+            group_of[start] = len(groups)
+            while queue:
+                current = queue.pop()
+                members.append(current)
+                for other in np.flatnonzero(linked[current]):
+                    if other not in group_of:
+                        group_of[other] = len(groups)
+                        queue.append(other)
+            groups.append([known[i] for i in sorted(members)])
+        return groups + [[ticker] for ticker in tickers if ticker not in rows]
+
+CORRELATION_ENGINE = RollingCorrelation()
+
+def correlated_groups(stocks):
+    """Uygun hisselerin birden çok üyeli korelasyon grupları [(hisseler, ortalama korelasyon), ...]"""
+    if not CORRELATION_ENABLED or len(stocks) < 2 or not CORRELATION_ENGINE.tickers:
+        return []
+    result = []
+    for group in CORRELATION_ENGINE.groups([stock['ticker'] for stock in stocks]):
+        if len(group) > 1:
+            pairs = [CORRELATION_ENGINE.correlation(a, b) for a, b in itertools.combinations(group, 2)]
+            result.append((group, float(np.mean(pairs))))
+    return result
+
+def print_correlated_groups(groups):
+    """Birlikte hareket eden uygun hisseleri yazdır"""
+    if not groups:
+        return
+    print(f"\n🔗 Birlikte hareket eden eşleşmeler (korelasyon ≥ {CORRELATION_THRESHOLD:.2f}, "
+          f"son {CORRELATION_ENGINE.window} getiri):")
+    for group, average in groups:
+        print(f"   • {', '.join(group)} (ort. {average:.2f}) - temsilci: {group[0]}")
+
+# =============================================================================
+# ÇOKLU ZAMAN DİLİMİ ANALİZİ
+# =============================================================================
+
+BASE_INTERVAL = "1d"           # Tek indirilen/saklanan taban serinin bar aralığı (saatlik görünüm için "1h")
+MTF_PERIOD = "2y"              # Taban seri için çekilen geçmiş (haftalık EMA50 için en az ~1 yıl gerekir)
+MTF_TIMEFRAMES = ("1d", "1W")  # Analiz edilen zaman dilimleri; ilki sinyal zaman dilimidir
+
+# Zaman dilimi -> pandas yeniden örnekleme kuralı, yaklaşık bar süresi (dk) ve analizde kullanılan son dönem
+TIMEFRAMES = {
+    '1h': {'rule': '1h', 'minutes': 60, 'window': '1mo'},
+    '4h': {'rule': '4h', 'minutes': 240, 'window': '3mo'},
+    '1d': {'rule': '1D', 'minutes': 1440, 'window': None},  # None -> HISTORY_PERIOD (normal tarama ile aynı)
+    '1W': {'rule': 'W-FRI', 'minutes': 10080, 'window': '2y'},
+}
+
+# Onay zaman dilimi -> sinyale ek olarak orada da geçmesi gereken kriterler (günlük sinyal + haftalık EMA20 > EMA50)
+MTF_CONFIRMATION = {'1W': ('ema_trend',)}
+
+OHLCV_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+def resample_ohlcv(base, timeframe):
+    """Taban seriyi zaman dilimine yeniden örnekle (taban aralığından ince zaman dilimi türetilemez)"""
+    spec = TIMEFRAMES[timeframe]
+    if spec['minutes'] < TIMEFRAMES[BASE_INTERVAL]['minutes']:
+        raise ValueError(f"{timeframe} zaman dilimi {BASE_INTERVAL} taban serisinden türetilemez")
+    if timeframe == BASE_INTERVAL:
+        return base
+    resampled = base[list(OHLCV_AGGREGATION)].resample(spec['rule']).agg(OHLCV_AGGREGATION)
+    return resampled.dropna(subset=['Close'])  # İşlem olmayan aralıklar (hafta sonu, gece) atlanır
+
+class TimeframeViews:
+    """Hisse başına taban seriden türetilmiş görünümleri tutar; sadece yeni taban barı gelince geçersizleşir"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'builds': 0, 'invalidations': 0}
+
+    @staticmethod
+    def fingerprint(base):
+        """Taban serinin uzunluğu, ilk/son bar zamanı ve son barın değerleri (son bar gün içinde güncellenebilir)"""
+        if not len(base):
+            return (0,)
+        return (len(base), base.index[0], base.index[-1]) + \
+            tuple(float(value) for value in base[list(OHLCV_AGGREGATION)].iloc[-1])
+
+    def get(self, ticker, base, timeframe):
+        """Zaman dilimi görünümünü döndür (dönem penceresi her çağrıda uygulanır, yeniden örnekleme önbellekten)"""
+        fingerprint = self.fingerprint(base)
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None or entry['fingerprint'] != fingerprint:
+                if entry is not None:
+                    self.stats['invalidations'] += 1
+                entry = self._entries[ticker] = {'fingerprint': fingerprint, 'views': {}}
+            view = entry['views'].get(timeframe)
+            if view is not None:
+                self.stats['hits'] += 1
+        if view is None:
+            view = resample_ohlcv(base, timeframe)
+            with self._lock:
+                entry['views'][timeframe] = view
+                self.stats['builds'] += 1
+        start = period_start(TIMEFRAMES[timeframe]['window'] or HISTORY_PERIOD, view.index.tz)
+        return view[view.index >= start] if start is not None else view
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+TIMEFRAME_VIEWS = TimeframeViews()
+
+def criterion_passes(stock, name):
+    """Tek bir kriterin tek hisse sonucu için geçip geçmediği"""
+    if not stock:
+        return False
+    with np.errstate(invalid='ignore'):
+        return bool(FILTER_CRITERIA[name](filter_columns(stock_columns(stock)))[0])
+
+def analyze_multi_timeframe(ticker, provider=None, timeframes=None, cache=None):
+    """Tek taban seriden tüm zaman dilimlerini türetip aynı filtre setini her birinde çalıştır"""
+    timeframes = tuple(timeframes or MTF_TIMEFRAMES)
+    base = fetch_history(ticker, provider, period=MTF_PERIOD, interval=BASE_INTERVAL)
+    if base is None:
+        return None
+    results = {}
+    for timeframe in timeframes:
+        with PROFILER.stage('resample', ticker):
+            view = TIMEFRAME_VIEWS.get(ticker, base, timeframe)
+        results[timeframe] = analyze_cached(ticker, view, True, cache)
+    
+    passed = {timeframe: check_new_filters(result) for timeframe, result in results.items()}
+    confirmations = {timeframe: all(criterion_passes(results[timeframe], name) for name in criteria)
+                     for timeframe, criteria in MTF_CONFIRMATION.items() if timeframe in results}
+    return {
+        'ticker': ticker.upper(),
+        'timeframes': results,
+        'passed': passed,
+        'confirmations': confirmations,
+        'confirmed': passed[timeframes[0]] and all(confirmations.values()),
+    }
+
+def scan_multi_timeframe(selected_stocks=None, timeframes=None, workers=None, provider=None):
+    """Hisseleri tüm zaman dilimlerinde tara (hisse başına tek veri çekme, giriş sırası korunur)"""
+    require(np, pd)
+    stocks_to_scan = selected_stocks if selected_stocks else default_universe()
+    workers = SCAN_WORKERS if workers is None else workers
+    PROFILER.reset()
+    
+    def task(ticker):
+        return analyze_multi_timeframe(ticker, provider, timeframes)
+    
+    if workers <= 1:
+        rows = [task(ticker) for ticker in stocks_to_scan]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(task, stocks_to_scan))
+    return [row for row in rows if row]
+
+def display_multi_timeframe(rows, timeframes=None):
+    """Zaman dilimi bazında geçti/kaldı tablosu ve onaylanmış sinyaller"""
+    timeframes = tuple(timeframes or MTF_TIMEFRAMES)
+    mark = lambda row, timeframe: "-" if row['timeframes'][timeframe] is None else \
+        ("✅" if row['passed'][timeframe] else "❌")
+    table = []
+    for row in rows:
+        line = {"Hisse": row['ticker']}
+        line.update({f"{timeframe} Filtre": mark(row, timeframe) for timeframe in timeframes})
+        line.update({f"{timeframe} Onay": "✅" if ok else "❌" for timeframe, ok in row['confirmations'].items()})
+        line["Sinyal"] = "🎯" if row['confirmed'] else ""
+        table.append(line)
+    
+    print(f"\n{'='*100}")
+    print(f"ÇOKLU ZAMAN DİLİMİ ANALİZİ ({', '.join(timeframes)}; taban {BASE_INTERVAL})")
+    print(f"{'='*100}")
+    if table:
+        print(pd.DataFrame(table).to_string(index=False))
+    
+    confirmed = [row['timeframes'][timeframes[0]] for row in rows if row['confirmed']]
+    print(f"\n🎯 {len(confirmed)} hisse {timeframes[0]} sinyali verip tüm onayları geçti.")
+    if confirmed:
+        print(pd.DataFrame([format_stock_summary(stock) for stock in confirmed]).to_string(index=False))
+
+def run_multi_timeframe_cli(args):
+    """Komut satırından çoklu zaman dilimi taraması"""
+    selected_stocks = load_config(args.config) if args.config else None
+    if args.tickers:
+        selected_stocks = [ticker.strip().upper() for ticker in args.tickers.split(',') if ticker.strip()]
+    timeframes = tuple(args.timeframes.split(',')) if args.timeframes else MTF_TIMEFRAMES
+    unknown = [timeframe for timeframe in timeframes if timeframe not in TIMEFRAMES]
+    if unknown:
+        print(f"❌ Bilinmeyen zaman dilimi: {', '.join(unknown)} (seçenekler: {', '.join(TIMEFRAMES)})")
+        return
+    rows = scan_multi_timeframe(selected_stocks, timeframes)
+    with PROFILER.stage('display'):
+        display_multi_timeframe(rows, timeframes)
+    report_scan_profile()
+    if RESULT_CACHE:
+        RESULT_CACHE.save()
+
+# =============================================================================
+# ETKİLEŞİMLİ YENİDEN FİLTRELEME OTURUMU
+# =============================================================================
+
+class FilterSession:
+    """Bir kez taranmış sonuçları bellekte tutar; eşik değişince sadece etkilenen kriterler yeniden değerlendirilir"""
+
+    def __init__(self, all_results, is_specific_search=False):
+        self.all_results = all_results
+        self.is_specific_search = is_specific_search
+        self.frame = results_to_frame(all_results)
+        self.columns = filter_columns(self.frame)
+        self.matrix = evaluate_filter_matrix(self.frame, self.columns)
+
+    def set(self, name, value):
+        """Eşiği veya kriter anahtarını değiştir ve etkilenen kriter sütunlarını yeniden hesapla"""
+        if name not in FILTER_THRESHOLDS and name not in FILTER_TOGGLES.values():
+            raise ValueError(f"{name} bir filtre eşiği değil (oturumda sadece filtre eşikleri değiştirilebilir)")
+        globals()[name] = validate_setting(name, value)
+        # Anahtarlar sadece etkin kriter kümesini değiştirir; matris aynı kalır
+        affected = FILTER_THRESHOLDS.get(name, ())
+        with np.errstate(invalid='ignore'):
+            for criterion in affected:
+                self.matrix[criterion] = FILTER_CRITERIA[criterion](self.columns)
+        return affected
+
+    def filtered_results(self):
+        passed = filter_pass_mask(self.matrix)
+        return [stock for stock, ok in zip(self.all_results, passed) if ok]
+
+    def display(self):
+        display_results(self.filtered_results(), self.all_results, self.is_specific_search,
+                        frame=self.frame, columns=self.columns, matrix=self.matrix)
+
+    def run(self):
+        """Komut isteminde eşik değişikliklerini uygula (örn: MIN_RSI=45, NEAR_SUPPORT=False)"""
+        print("\n🎛️  Yeniden filtreleme oturumu: 'AD=DEĞER' eşiği değiştirir, 'g' sonuçları, 'f' filtreleri "
+              "gösterir, boş satır çıkar.")
+        while True:
+            try:
+                command = input("\nfiltre> ").strip()
+            except EOFError:
+                break
+            if not command:
+                break
+            if command == 'g':
+                self.display()
+                continue
+            if command == 'f':
+                show_current_filters()
+                continue
+            name, _, text = command.replace(' ', '').partition('=')
+            try:
+                value = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                print(f"❌ Geçersiz komut: {command} (örn: MIN_RSI=45, NEAR_SUPPORT=False)")
+                continue
+            try:
+                start = time.perf_counter()
+                affected = self.set(name.upper(), value)
+                filtered_results = self.filtered_results()
+                elapsed = (time.perf_counter() - start) * 1000
+            except ValueError as e:
+                print(f"❌ {e}")
+                continue
+            criteria = ", ".join(affected) if affected else "etkin kriter kümesi"
+            print(f"✅ {name.upper()} = {value!r} - yeniden değerlendirilen: {criteria} ({elapsed:.2f} ms)")
+            print(f"🎯 {len(filtered_results)} hisse kriterlere uygun.")
+            self.display()
+
+def run_session_cli(args):
+    """Taramayı bir kez yap, ardından eşikleri veri çekmeden/yeniden hesaplamadan değiştirme oturumu aç"""
+    selected_stocks = load_config(args.config) if args.config else None
+    if args.tickers:
+        selected_stocks = [ticker.strip().upper() for ticker in args.tickers.split(',') if ticker.strip()]
+    show_current_filters()
+    # Elenen hisseler de eşik değişince geçebileceği için tüm göstergeler hesaplanır
+    _, all_results = scan_and_filter_stocks(selected_stocks, full_diagnostics=True)
+    session = FilterSession(all_results, is_specific_search=bool(selected_stocks))
+    session.display()
+    session.run()
+
+# =============================================================================
+# HTTP / JSON API SERVİSİ
+# =============================================================================
+
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_SNAPSHOT_TTL_SECONDS = 300  # Hisse sonucu ve tarama görüntüsü bu süre boyunca yeniden hesaplanmaz
+API_MAX_SCAN_TICKERS = 500      # Tek istekte taranabilecek en fazla hisse
+API_CACHE_MAX_ENTRIES = 2048    # Önbellekte tutulan en fazla sonuç (süresi dolanlar her yazmada atılır)
+API_MAX_BODY_BYTES = 1_000_000  # Bundan büyük istek gövdesi okunmaz (400)
+API_TICKER_PATTERN = re.compile(r"[A-Z0-9]{1,10}(\.IS)?")  # Kabul edilen hisse kodu (önbellek dosya adına girer)
+
+def json_ready(value):
+    """Sonuç değerlerini JSON'a uygun hale getir (NumPy sayıları -> Python, NaN -> null, tuple -> liste)"""
+    if isinstance(value, dict):
+        return {key: json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_ready(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+class ScanService:
+    """Tek bir sıcak tarayıcıya sahip asyncio servisi
+    
+    Aynı hisse için eşzamanlı istekler tek hesaplamada birleştirilir. Hisse sonuçları ve tarama
+    görüntüleri API_SNAPSHOT_TTL_SECONDS boyunca önbellekte tutulur.
+    """
+
+    def __init__(self, provider=None, universe=None, ttl=None, workers=None):
+        require(np, pd)
+        self.provider = provider
+        self.universe = list(universe or default_universe())
+        self.ttl = API_SNAPSHOT_TTL_SECONDS if ttl is None else ttl
+        self.executor = ThreadPoolExecutor(max_workers=workers or SCAN_WORKERS)
+        self._cache = {}     # anahtar -> (zaman, değer)
+        self._inflight = {}  # anahtar -> sürmekte olan hesaplamanın Future'ı
+        self.stats = {'computed': 0, 'coalesced': 0, 'cache_hits': 0}
+
+    def _fresh(self, key):
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self.stats['cache_hits'] += 1
+            return entry
+        return None
+
+    def _store(self, key, value):
+        """Sonucu önbelleğe yaz; süresi dolanları at, sınır aşılırsa en eski kayıtları sil"""
+        now = time.monotonic()
+        for stale in [k for k, (stamp, _) in self._cache.items() if now - stamp >= self.ttl]:
+            del self._cache[stale]
+        self._cache.pop(key, None)  # Yeniden eklenen anahtar sıranın sonuna geçer
+        self._cache[key] = (now, value)
+        while len(self._cache) > API_CACHE_MAX_ENTRIES:
+            del self._cache[next(iter(self._cache))]
+
+    async def _coalesce(self, key, compute):
+        """key için TTL önbelleğinden dön, yoksa hesapla; aynı anda gelen istekler aynı hesaplamayı bekler"""
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry[1]
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(compute())
+        self._inflight[key] = future
+        try:
+            value = await asyncio.shield(future)
+            self._store(key, value)
+            self.stats['computed'] += 1
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def analyze(self, ticker):
+        """Hissenin tam analiz sonucu (analyze_stock_comprehensive alanları, veri yoksa None)"""
+        ticker = ticker.upper()
+        loop = asyncio.get_running_loop()
+        return await self._coalesce(('ticker', ticker), lambda: loop.run_in_executor(
+            self.executor, analyze_stock_comprehensive, ticker, self.provider, True))
+
+    async def scan(self, tickers):
+        """Hisse listesini tara: her hisse tekil analizden (birleştirilmiş/önbellekli) gelir, sonra filtre matrisi"""
+        results = await asyncio.gather(*(self.analyze(ticker) for ticker in tickers))
+        all_results = [result for result in results if result]
+        passed = filter_pass_mask(evaluate_filter_matrix(results_to_frame(all_results))) if all_results else []
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'scanned': len(tickers),
+            'analyzed': len(all_results),
+            'missing': [ticker for ticker, result in zip(tickers, results) if not result],
+            'filtered': [result['ticker'] for result, ok in zip(all_results, passed) if ok],
+            'results': all_results,
+        }
+
+    async def snapshot(self):
+        """Varsayılan evrenin son tarama görüntüsü (TTL dolana kadar aynı görüntü döner)"""
+        return await self._coalesce(('snapshot',), lambda: self.scan(self.universe))
+
+    async def handle(self, method, path, query, body):
+        """İsteği yönlendir -> (HTTP durum kodu, JSON gövdesi)"""
+        parts = [part for part in path.split('/') if part]
+        if method == 'GET' and parts == ['health']:
+            return 200, {'status': 'ok', 'stats': self.stats, 'universe': len(self.universe)}
+        if method == 'GET' and parts == ['results']:
+            snapshot = await self.snapshot()
+            filtered = set(snapshot['filtered'])
+            return 200, {**snapshot, 'results': [result for result in snapshot['results']
+                                                 if result['ticker'] in filtered]}
+        if method == 'GET' and len(parts) == 2 and parts[0] in ('ticker', 'explain'):
+            if not API_TICKER_PATTERN.fullmatch(parts[1].upper()):
+                return 400, {'error': f"Geçersiz hisse kodu: {parts[1]!r}"}
+            result = await self.analyze(parts[1])
+            if result is None:
+                return 404, {'error': f"{parts[1].upper()} için veri alınamadı"}
+            if parts[0] == 'ticker':
+                return 200, result
+            reasons = explain_why_not_matching(result)
+            return 200, {'ticker': result['ticker'], 'passed': not reasons, 'reasons': reasons}
+        if parts == ['scan'] and method in ('GET', 'POST'):
+            if method == 'GET':
+                tickers = query.get('tickers', [""])[0].split(',')
+            else:
+                tickers = body.get('tickers') if isinstance(body, dict) else None
+                if not isinstance(tickers, list):
+                    return 400, {'error': "Gövde {\"tickers\": [...]} biçiminde bir JSON nesnesi olmalı"}
+            tickers = list(dict.fromkeys(str(ticker).strip().upper() for ticker in tickers if str(ticker).strip()))
+            if not tickers or len(tickers) > API_MAX_SCAN_TICKERS:
+                return 400, {'error': f"1-{API_MAX_SCAN_TICKERS} arası hisse kodu gerekli (tickers)"}
+            invalid = [ticker for ticker in tickers if not API_TICKER_PATTERN.fullmatch(ticker)]
+            if invalid:
+                return 400, {'error': f"Geçersiz hisse kodu: {', '.join(map(repr, invalid[:5]))}"}
+            return 200, await self.scan(tickers)
+        return 404, {'error': f"Bilinmeyen adres: {method} {path}"}
+
+    async def _serve_connection(self, reader, writer):
+        """Tek HTTP/1.1 isteğini oku, yanıtla ve bağlantıyı kapat"""
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return
+            method, target = request_line[0].upper(), request_line[1]
+            url = urlsplit(target)
+            length = headers.get('content-length', '0') or '0'
+            if not length.isdigit() or int(length) > API_MAX_BODY_BYTES:
+                status, payload = 400, {'error': f"Geçersiz Content-Length: {length}"}
+            else:
+                raw_body = await reader.readexactly(int(length)) if int(length) else b""
+                try:
+                    body = json.loads(raw_body) if raw_body else {}
+                    status, payload = await self.handle(method, url.path, parse_qs(url.query), body)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    status, payload = 400, {'error': "Geçersiz JSON gövdesi"}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+            data = json.dumps(json_ready(payload), ensure_ascii=False).encode('utf-8')
+            reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=None, port=None, ready=None):
+        """Sunucuyu başlat ve kapanana kadar çalıştır (ready verilirse dinlemeye başlanınca çağrılır)"""
+        server = await asyncio.start_server(self._serve_connection, host or API_HOST, port or API_PORT)
+        if ready:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+def run_api_cli(args):
+    """--serve: tarama sonuçlarını HTTP/JSON olarak sunan servisi başlat"""
+    universe = [ticker.strip().upper() for ticker in args.tickers.split(',')] if args.tickers else None
+    if args.synthetic:
+        universe = universe or [f"SYN{i:03d}" for i in range(args.synthetic)]
+        provider = SyntheticDataProvider(latency=0.05)
+    else:
+        provider = None
+    service = ScanService(provider, universe)
+    host, port = API_HOST, args.port or API_PORT
+    print(f"🌐 API http://{host}:{port} adresinde ({len(service.universe)} hisse, TTL {service.ttl} sn)")
+    print("   GET /results | /ticker/THYAO | /explain/THYAO | /scan?tickers=THYAO,AKBNK | POST /scan | /health")
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        print("\n👋 API kapatıldı.")
+
+# =============================================================================
+# ZAMANLANMIŞ TARAMA (DAEMON) VE AYAR DOSYASI
+# =============================================================================
+
+DAEMON_INTERVAL_MINUTES = 15          # İki tarama arasındaki süre (dakika)
+DAEMON_MARKET_HOURS_ONLY = True       # True ise sadece BIST seans saatlerinde tarama yapılır
+BIST_TIMEZONE = "Europe/Istanbul"
+BIST_SESSION = ("10:00", "18:10")     # Sürekli işlem + kapanış seansı (resmi tatiller hesaba katılmaz)
+
+def load_config(path):
+    """JSON ayar dosyasındaki global değerleri uygula; 'tickers' anahtarı varsa listeyi döndür
+    
+    Örnek: {"MIN_RSI": 45, "SCAN_WORKERS": 16, "DAEMON_INTERVAL_MINUTES": 5, "tickers": ["THYAO", "AKBNK"]}
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    tickers = config.pop('tickers', None)
+    for name, value in config.items():
+        globals()[name] = validate_setting(name, value)
+    return [ticker.strip().upper() for ticker in tickers] if tickers else None
+
+def load_filter_config(path=None):
+    """FILTER_CONFIG_FILE varsa filtre değerlerini oradan yükle (sadece FILTER_SETTINGS; yoksa koddaki varsayılanlar)"""
+    path = path or FILTER_CONFIG_FILE
+    if not os.path.exists(path):
+        return False
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    for name, value in config.items():
+        if name not in FILTER_SETTINGS:
+            raise ValueError(f"{path}: filtre ayarı değil: {name}")
+        globals()[name] = validate_setting(name, value)
+    return True
+
+def save_filter_config(path=None):
+    """Güncel filtre değerlerini FILTER_CONFIG_FILE'a yaz"""
+    path = path or FILTER_CONFIG_FILE
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({name: globals()[name] for name in FILTER_SETTINGS}, f, indent=2, ensure_ascii=False)
+    return path
+
+# Ayar olarak değiştirilebilen değer türleri (nesne globalleri - sağlayıcı, önbellek, indeksler - ayar değildir)
+SETTING_TYPES = (bool, int, float, str, tuple)
+# None alabilen ayarlar ve None dışındaki değer türü (yorumlarında "None ->" ile belgelenenler)
+NULLABLE_SETTINGS = {
+    'RESULT_CACHE_FILE': str,
+    'SCAN_DEADLINE_SECONDS': float,
+    'PROFILE_REPORT': str,
+    'COMPACT_ANALYSIS_BARS': int,
+    'SNAPSHOT_EXPORT': str,
+}
+
+def is_setting(name):
+    """--config, filters.json ve süreç havuzu ile değiştirilebilen bir ayar mı"""
+    return name.isupper() and name in globals() and \
+        (name in NULLABLE_SETTINGS or isinstance(globals()[name], SETTING_TYPES))
+
+def settings_snapshot():
+    """Süreç havuzuna aktarılacak güncel ayar globalleri
+    
+    spawn (Windows/macOS varsayılanı) ile başlayan çalışanlar modülü yeniden yükler ve koddaki varsayılanları görür;
+    filters.json, --config ve çalışma anında değişen değerler ancak bu anlık görüntüyle çalışanlara ulaşır.
+    """
+    return {name: value for name, value in globals().items() if is_setting(name)}
+
+def apply_settings(settings):
+    """settings_snapshot ile alınan ayarları bu süreçte uygula (ayar olmayan adlar yok sayılır)"""
+    if settings:
+        globals().update({name: value for name, value in settings.items() if is_setting(name)})
+
+def validate_setting(name, value):
+    """Ayar adını ve değerin türünü mevcut değerle karşılaştırarak doğrula (hata -> ValueError)"""
+    if not is_setting(name):
+        raise ValueError(f"Bilinmeyen ayar: {name}")
+    if value is None and name in NULLABLE_SETTINGS:
+        return None
+    current = globals()[name]
+    kind = NULLABLE_SETTINGS[name] if current is None else type(current)
+    if kind is bool:
+        valid = isinstance(value, bool)
+    elif kind in (int, float):
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif kind is tuple:
+        valid = isinstance(value, (list, tuple))
+    else:
+        valid = isinstance(value, kind)
+    if not valid:
+        raise ValueError(f"{name} için geçersiz değer: {value!r}")
+    return tuple(value) if kind is tuple else value
+
+def _session_bounds(now):
+    """now ile aynı gündeki seans açılış ve kapanış zamanları"""
+    return tuple(now.normalize() + pd.Timedelta(hours=int(hour), minutes=int(minute))
+                 for hour, minute in (bound.split(':') for bound in BIST_SESSION))
+
+def is_bist_open(now=None):
+    """Borsa İstanbul hafta içi seans saatleri içinde mi"""
+    now = now if now is not None else pd.Timestamp.now(tz=BIST_TIMEZONE)
+    session_open, session_close = _session_bounds(now)
+    return now.weekday() < 5 and session_open <= now < session_close
+
+def seconds_until_bist_open(now=None):
+    """Bir sonraki seans açılışına kalan süre (seans açıksa 0)"""
+    now = now if now is not None else pd.Timestamp.now(tz=BIST_TIMEZONE)
+    if is_bist_open(now):
+        return 0.0
+    day = now
+    while True:
+        session_open, _ = _session_bounds(day)
+        if day.weekday() < 5 and session_open > now:
+            return (session_open - now).total_seconds()
+        day = day.normalize() + pd.Timedelta(days=1)
+
+def run_scan_cycle(selected_stocks=None, provider=None):
+    """Tek tarama turu: tara, sonuçları göster, ölçüm raporunu yaz ve sonuç önbelleğini kaydet"""
+    is_specific_search = bool(selected_stocks)
+    filtered_results, all_results = scan_and_filter_stocks(selected_stocks, provider=provider,
+                                                           full_diagnostics=is_specific_search or None)
+    with PROFILER.stage('display'):
+        display_results(filtered_results, all_results, is_specific_search=is_specific_search, provider=provider)
+    report_scan_profile()
+    if RESULT_CACHE:
+        RESULT_CACHE.print_stats()
+        RESULT_CACHE.save()
+    record_scan_snapshot(all_results, provider)
+    return filtered_results, all_results
+
+def run_daemon(selected_stocks=None, interval_minutes=None, market_hours_only=None, max_cycles=None,
+               provider=None, config_path=None):
+    """Uzun ömürlü süreçte taramayı periyodik olarak tekrarla
+    
+    Geçmiş veri bellekte tutulur ve her turda sadece son bardan sonrası çekilir; son barı değişmeyen
+    hisselerin sonucu RESULT_CACHE'ten gelir. Ayar dosyası değişirse bir sonraki turda yeniden okunur.
+    """
+    provider = provider or DATA_PROVIDER
+    if isinstance(provider, CachedDataProvider):
+        provider.keep_in_memory = True
+        provider.max_age_minutes = 0  # Seans içinde son bar sürekli değişir - her tur artımlı güncelleme
+    config_mtime = os.path.getmtime(config_path) if config_path else None
+    cycle = 0
+    try:
+        while max_cycles is None or cycle < max_cycles:
+            if config_path and os.path.getmtime(config_path) != config_mtime:
+                config_mtime = os.path.getmtime(config_path)
+                selected_stocks = load_config(config_path) or selected_stocks
+                print(f"🔄 Ayarlar {config_path} dosyasından yeniden yüklendi.")
+            interval = (interval_minutes or DAEMON_INTERVAL_MINUTES) * 60
+            hours_only = DAEMON_MARKET_HOURS_ONLY if market_hours_only is None else market_hours_only
+            
+            wait = seconds_until_bist_open() if hours_only else 0
+            if wait > 0:
+                print(f"💤 Borsa kapalı, seans açılışına {wait/60:.0f} dk var.")
+                time.sleep(min(wait, interval))
+                continue
+            
+            cycle += 1
+            started = time.perf_counter()
+            print(f"\n{'='*80}\n🕒 Tur {cycle} - {datetime.now():%Y-%m-%d %H:%M:%S}\n{'='*80}")
+            run_scan_cycle(selected_stocks, provider)
+            elapsed = time.perf_counter() - started
+            reused = PROFILER.snapshot()['counters'].get('cache_hits', 0)
+            print(f"✅ Tur {cycle} {elapsed:.1f} sn sürdü ({reused} hisse önceki turdan aynen kullanıldı).")
+            if max_cycles is None or cycle < max_cycles:
+                time.sleep(max(0.0, interval - elapsed))
+    except KeyboardInterrupt:
+        print("\n👋 Zamanlanmış tarama durduruldu.")
+
+def run_daemon_cli(args):
+    """--once / --daemon bayraklarını işle"""
+    selected_stocks = load_config(args.config) if args.config else None
+    if args.tickers:
+        selected_stocks = [ticker.strip().upper() for ticker in args.tickers.split(',') if ticker.strip()]
+    show_current_filters()
+    if args.once:
+        run_scan_cycle(selected_stocks)
+        return
+    hours = "seans saatlerinde" if DAEMON_MARKET_HOURS_ONLY and not args.all_hours else "sürekli"
+    print(f"\n⏰ Zamanlanmış tarama: {args.interval or DAEMON_INTERVAL_MINUTES} dakikada bir, {hours}.")
+    run_daemon(selected_stocks, args.interval, False if args.all_hours else None, args.cycles,
+               config_path=args.config)
+
 def show_current_filters():
     """Mevcut filtreleri göster"""
     print(f"\n{'='*80}")
@@ -645,15 +4414,170 @@ def main():
 
     if choice == 'b':
         selected_stocks = input("Hisse kodlarını virgülle ayırarak girin (örn: THYAO,AKBNK): ").split(',')
-        selected_stocks = [stock.strip().upper() for stock in selected_stocks]
-        filtered_results, all_results = scan_and_filter_stocks(selected_stocks)
-        display_results(filtered_results, all_results, is_specific_search=True)
+        run_scan_cycle([stock.strip().upper() for stock in selected_stocks])
     elif choice == 't':
-        filtered_results, all_results = scan_and_filter_stocks()
-        display_results(filtered_results, all_results, is_specific_search=False)
+        run_scan_cycle()
     else:
         print("Geçersiz seçim! Program sonlandırılıyor.")
+
+def report_scan_profile(report_path=None):
+    """Tarama sonunda aşama özetini yazdır ve istenirse makine tarafından okunabilir raporu kaydet"""
+    if not PROFILING_ENABLED:
         return
+    PROFILER.print_summary()
+    report_path = report_path or PROFILE_REPORT
+    if report_path:
+        PROFILER.write_report(report_path)
+        print(f"💾 Ölçüm raporu {report_path} dosyasına yazıldı.")
+
+def run_with_cprofile(func, output_path, top=20):
+    """func'ı cProfile altında çalıştır, istatistikleri kaydet ve en pahalı fonksiyonları yazdır"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output_path)
+        print(f"\n🔬 cProfile: en yüksek kümülatif süreye sahip {top} fonksiyon ({output_path})")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+
+def parse_args(argv=None):
+    """Komut satırı argümanlarını çözümle"""
+    parser = argparse.ArgumentParser(description="BIST Gelişmiş Filtreli Hisse Tarayıcısı")
+    parser.add_argument('--profile-report', metavar='PATH',
+                        help="Tarama ölçümlerini yaz (.prom -> Prometheus textfile, diğerleri -> JSON satırları)")
+    parser.add_argument('--cprofile', metavar='PATH', help="Programı cProfile altında çalıştırıp istatistikleri kaydet")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Gösterge, destek/direnç, filtre ve tarama sürelerini yapay veriyle ölç")
+    parser.add_argument('--benchmark-output', default=BENCHMARK_OUTPUT, help="Benchmark JSON çıktı dosyası")
+    parser.add_argument('--compare', metavar='JSON',
+                        help="Önceki benchmark JSON dosyası - gerilemeler işaretlenir ve çıkış kodu 1 olur")
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_REGRESSION_TOLERANCE,
+                        help="Gerileme eşiği (0.20 = en iyi süre %%20'den fazla artarsa)")
+    parser.add_argument('--bench-tickers', type=int, default=50, help="Benchmark evrenindeki hisse sayısı")
+    parser.add_argument('--bench-bars', type=int, default=126, help="Benchmark serilerindeki bar sayısı")
+    parser.add_argument('--repeats', type=int, default=5, help="Her ölçümün tekrar sayısı")
+    parser.add_argument('--benchmark-startup', action='store_true',
+                        help="Kısa komutların başlangıç/import süresini ölç (ağır modül yüklenirse çıkış kodu 1)")
+    parser.add_argument('--eager-imports', action='store_true',
+                        help="pandas/numpy/yfinance'ı başlangıçta yükle (karşılaştırma için)")
+    parser.add_argument('--benchmark-sr', action='store_true',
+                        help="Destek/direnç aramasının döngü ve vektörel sürümlerini karşılaştır")
+    parser.add_argument('--backtest', action='store_true',
+                        help="Mevcut filtre setini yerel geçmiş veride test et")
+    parser.add_argument('--data-dir', default=CACHE_DIR,
+                        help="Backtest için yerel veri klasörü (.pkl önbellek veya .csv dosyaları)")
+    parser.add_argument('--synthetic', type=int, metavar='N',
+                        help="Yerel veri yerine N hisselik yapay evren kullan")
+    parser.add_argument('--bars', type=int, default=2520, help="Yapay evrendeki bar sayısı")
+    parser.add_argument('--horizons', default=",".join(str(h) for h in BACKTEST_HORIZONS),
+                        help="Virgülle ayrılmış ileriye dönük getiri vadeleri (bar)")
+    parser.add_argument('--sweep', action='store_true',
+                        help="SWEEP_SPACE içindeki eşik kombinasyonlarını backtest ile sırala")
+    parser.add_argument('--samples', type=int, help="Tam ızgara yerine bu kadar rastgele aday dene")
+    parser.add_argument('--horizon', type=int, default=SWEEP_HORIZON, help="Parametre taraması vadesi (bar)")
+    parser.add_argument('--workers', type=int,
+                        help="Süreç sayısı (parametre taraması: çekirdek sayısı, --compact-scan: COMPUTE_PROCESSES)")
+    parser.add_argument('--chunk', type=int, help="Süreç havuzunda bir göreve düşen hisse sayısı")
+    parser.add_argument('--benchmark-compute', action='store_true',
+                        help="Hesaplama aşamasının süreç sayısına göre ölçeklenmesini yapay evrende ölç")
+    parser.add_argument('--processes', help="--benchmark-compute süreç sayıları (örn: 1,2,4,8)")
+    parser.add_argument('--fetch-test', action='store_true',
+                        help="Hata/gecikme enjekte eden yapay sağlayıcıyla veri çekme zamanlayıcısını test et")
+    parser.add_argument('--fail-rate', type=float, default=0.1, help="--fetch-test geçici hata olasılığı")
+    parser.add_argument('--serve', action='store_true',
+                        help="Tarama sonuçlarını HTTP/JSON API olarak sun (--synthetic N ile yapay veri)")
+    parser.add_argument('--port', type=int, help=f"API portu (varsayılan: {API_PORT})")
+    parser.add_argument('--universe', action='store_true',
+                        help="Hisse evrenini toplu fiyat/hacimle yenile ve likidite kademeleriyle listele")
+    parser.add_argument('--universe-add', metavar='HISSELER', help="--universe: evrene eklenecek hisseler (virgülle)")
+    parser.add_argument('--universe-remove', metavar='HISSELER', help="--universe: evrenden çıkarılacak hisseler")
+    parser.add_argument('--top', type=int, default=20, help="Gösterilecek en iyi parametre seti sayısı")
+    parser.add_argument('--replay', metavar='PATH', nargs='?', const=True,
+                        help="CSV/Parquet dosyası veya klasöründeki barları artımlı göstergelerle oynat "
+                             "(yol verilmezse --data-dir, --synthetic N ile yapay evren)")
+    parser.add_argument('--compact-build', metavar='DIR',
+                        help="--data-dir veya --synthetic verisinden float32/int64 kompakt depo oluştur")
+    parser.add_argument('--compact-scan', metavar='DIR', help="Kompakt depo üzerinde (memmap) tarama yap")
+    parser.add_argument('--bar-minutes', type=int,
+                        help="Yapay veride gün içi bar aralığı (dakika, örn: 1); verilmezse günlük")
+    parser.add_argument('--diff', nargs='*', metavar='NPZ',
+                        help="İki tarama anlık görüntüsünü karşılaştır (yol verilmezse son ikisi)")
+    parser.add_argument('--export', metavar='PATH', help="Anlık görüntüyü .jsonl veya .csv olarak dışa aktar")
+    parser.add_argument('--snapshot', metavar='NPZ', help="--export için anlık görüntü (varsayılan: en sonuncusu)")
+    parser.add_argument('--similar', metavar='HISSE', help="Gösterge profili bu hisseye en çok benzeyen hisseleri bul")
+    parser.add_argument('--neighbors', type=int, default=5, help="--similar için komşu sayısı")
+    parser.add_argument('--mtf', action='store_true',
+                        help="Filtreleri MTF_TIMEFRAMES zaman dilimlerinde çalıştır ve çoklu zaman dilimi onayı ara")
+    parser.add_argument('--timeframes', help="Virgülle ayrılmış zaman dilimleri, ilki sinyal (örn: 1d,1W veya 1h,1d)")
+    parser.add_argument('--session', action='store_true',
+                        help="Bir kez tara, sonra eşikleri değiştirip sonuçları anında yeniden filtrele")
+    parser.add_argument('--filters', action='store_true', help="Sadece güncel filtre kriterlerini göster")
+    parser.add_argument('--save-filters', action='store_true',
+                        help=f"Güncel filtre değerlerini {FILTER_CONFIG_FILE} dosyasına yaz (--config ile birlikte kullanılabilir)")
+    parser.add_argument('--once', action='store_true', help="Soru sormadan tek tarama yap (cron vb. için)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Süreci açık tutup taramayı periyodik tekrarla (veri bellekte tutulur)")
+    parser.add_argument('--interval', type=float, help="Taramalar arası süre (dakika)")
+    parser.add_argument('--tickers', help="Virgülle ayrılmış hisse kodları (varsayılan: evren, kademe ≤ UNIVERSE_MAX_TIER)")
+    parser.add_argument('--config', metavar='JSON', help="Filtre/tarama ayarlarını içeren JSON dosyası")
+    parser.add_argument('--all-hours', action='store_true', help="Seans saatleri dışında da tara")
+    parser.add_argument('--cycles', type=int, help="Bu kadar turdan sonra dur")
+    return parser.parse_args(argv)
+
+def run_command(args):
+    """Komut satırı argümanlarına göre ilgili komutu çalıştır (argüman yoksa etkileşimli menü)"""
+    if args.filters:
+        show_current_filters()
+    elif args.save_filters:
+        if args.config:
+            load_config(args.config)
+        print(f"💾 Filtre değerleri {save_filter_config()} dosyasına yazıldı.")
+    elif args.benchmark_startup:
+        run_benchmark_startup_cli(args)
+    elif args.benchmark:
+        run_benchmark_cli(args)
+    elif args.fetch_test:
+        run_fetch_fault_test_cli(args)
+    elif args.benchmark_compute:
+        run_benchmark_compute_cli(args)
+    elif args.benchmark_sr:
+        benchmark_support_resistance()
+    elif args.backtest:
+        run_backtest_cli(args)
+    elif args.sweep:
+        run_sweep_cli(args)
+    elif args.replay:
+        run_replay_cli(args)
+    elif args.compact_build or args.compact_scan:
+        run_compact_cli(args)
+    elif args.diff is not None or args.export:
+        run_snapshot_cli(args)
+    elif args.similar:
+        run_similarity_cli(args)
+    elif args.mtf:
+        run_multi_timeframe_cli(args)
+    elif args.session:
+        run_session_cli(args)
+    elif args.universe:
+        run_universe_cli(args)
+    elif args.serve:
+        run_api_cli(args)
+    elif args.once or args.daemon:
+        run_daemon_cli(args)
+    else:
+        main()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    load_filter_config()
+    if args.eager_imports:
+        require(yf, pd, np)
+    if args.profile_report:
+        PROFILE_REPORT = args.profile_report
+    if args.cprofile:
+        # Hangi komut seçildiyse (tarama, daemon, sweep, benchmark...) o profillenir
+        run_with_cprofile(lambda: run_command(args), args.cprofile)
+    else:
+        run_command(args)
@@ -0,0 +1,40 @@
+"""Test ortak ayarları: betik adında boşluk olduğu için modül dosya yolundan yüklenir"""
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / "Hisse Analiz Programı.py"
+
+
+def load_script(name="hisse"):
+    """Betiği modül olarak (bir kez) yükle; __main__ bloğu çalışmaz"""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module  # Süreç havuzu (fork) fonksiyonları modül adıyla bulur
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+@pytest.fixture(scope="session")
+def hisse():
+    return load_script()
+
+
+@pytest.fixture
+def spawn_context(hisse, tmp_path, monkeypatch):
+    """spawn ile başlayan çalışanların 'hisse' modülünü bulabilmesi için sys.path'e yükleyici ekle"""
+    import multiprocessing
+    (tmp_path / "hisse.py").write_text(
+        "import importlib.util, sys\n"
+        f"spec = importlib.util.spec_from_file_location(__name__, {str(SCRIPT)!r})\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "sys.modules[__name__] = module\n"
+        "spec.loader.exec_module(module)\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    previous = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method('spawn', force=True)
+    yield
+    multiprocessing.set_start_method(previous, force=True)
@@ -0,0 +1,122 @@
+"""HTTP/JSON API: yollar, istek birleştirme ve gerçek soket üzerinden istek"""
+import asyncio
+import json
+
+import pytest
+
+
+@pytest.fixture
+def service(hisse, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    provider = hisse.SyntheticDataProvider(latency=0.01)
+    return hisse.ScanService(provider, universe=["SYN001", "SYN002", "SYN003"], workers=4)
+
+
+def handle(service, method, path, query=None, body=None):
+    return asyncio.run(service.handle(method, path, query or {}, body or {}))
+
+
+def test_health_and_unknown_route(service):
+    status, payload = handle(service, 'GET', '/health')
+    assert status == 200 and payload['universe'] == 3
+    assert handle(service, 'GET', '/nope')[0] == 404
+
+
+def test_ticker_and_explain(service):
+    status, result = handle(service, 'GET', '/ticker/syn001')
+    assert status == 200 and result['ticker'] == 'SYN001'
+    status, payload = handle(service, 'GET', '/explain/SYN001')
+    assert status == 200 and payload['passed'] == (not payload['reasons'])
+
+
+def test_scan_and_results(service):
+    status, payload = handle(service, 'GET', '/scan', query={'tickers': ['SYN001,SYN002']})
+    assert status == 200 and payload['scanned'] == 2 and payload['analyzed'] == 2
+    status, payload = handle(service, 'POST', '/scan', body={'tickers': ['SYN003']})
+    assert status == 200 and payload['scanned'] == 1
+    status, payload = handle(service, 'GET', '/results')
+    assert status == 200 and payload['scanned'] == 3
+    assert handle(service, 'GET', '/scan')[0] == 400
+
+
+def test_concurrent_requests_are_coalesced(service):
+    async def burst():
+        return await asyncio.gather(*(service.handle('GET', '/ticker/SYN002', {}, {}) for _ in range(10)))
+    responses = asyncio.run(burst())
+    assert all(status == 200 for status, _ in responses)
+    assert service.stats['computed'] == 1
+
+
+def request(service, raw):
+    """Servisi rastgele bir portta başlat, ham HTTP isteğini gönder -> (durum kodu, JSON gövdesi)"""
+    async def run():
+        started = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(service.serve('127.0.0.1', 0, started.set_result))
+        server = await started
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        task.cancel()
+        return response
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_http_round_trip(service):
+    status, payload = request(service, b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert status == 200 and payload['status'] == 'ok'
+    body = json.dumps({'tickers': ['SYN001']}).encode()
+    status, payload = request(service, b"POST /scan HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    assert status == 200 and payload['analyzed'] == 1
+
+
+@pytest.mark.parametrize('body', [[], "THYAO", {'tickers': "THYAO"}, {'tickers': None}])
+def test_scan_rejects_malformed_bodies(service, body):
+    status, payload = asyncio.run(service.handle('POST', '/scan', {}, body))
+    assert status == 400 and 'error' in payload
+
+
+@pytest.mark.parametrize('raw', [
+    b"POST /scan HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+    b"POST /scan HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+    b"POST /scan HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n",
+    b"POST /scan HTTP/1.1\r\nContent-Length: 7\r\n\r\n[\"SYN\"]",
+    b"POST /scan HTTP/1.1\r\nContent-Length: 4\r\n\r\n{bad",
+])
+def test_http_bad_requests_get_400(service, raw):
+    status, payload = request(service, raw)
+    assert status == 400 and 'error' in payload
+
+
+def test_cache_is_bounded(hisse, service, monkeypatch):
+    monkeypatch.setattr(hisse, 'API_CACHE_MAX_ENTRIES', 3)
+    for i in range(6):
+        service._store(('ticker', f"X{i}"), i)
+    assert list(service._cache) == [('ticker', "X3"), ('ticker', "X4"), ('ticker', "X5")]
+    service.ttl = 0  # Hepsinin süresi doldu: bir sonraki yazma eskileri temizler
+    service._store(('ticker', "Y"), 0)
+    assert list(service._cache) == [('ticker', "Y")]
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('POST', '/scan', {'tickers': ["../../X"]}),
+    ('POST', '/scan', {'tickers': ["SYN001", "..\\X"]}),
+    ('POST', '/scan', {'tickers': ["THYAO.IS/../X"]}),
+    ('POST', '/scan', {'tickers': ["A" * 11]}),
+    ('GET', '/ticker/..', None),
+    ('GET', '/explain/X.pkl', None),
+])
+def test_invalid_tickers_are_rejected(service, method, path, body):
+    status, payload = handle(service, method, path, body=body)
+    assert status == 400 and 'Geçersiz hisse kodu' in payload['error']
+    assert service.stats['computed'] == 0
+
+
+def test_invalid_ticker_over_http(service):
+    status, payload = request(service, b"GET /scan?tickers=..%2F..%2Fsecret HTTP/1.1\r\n\r\n")
+    assert status == 400 and 'Geçersiz hisse kodu' in payload['error']
+    status, _ = request(service, b"GET /scan?tickers=syn001.is,SYN002 HTTP/1.1\r\n\r\n")
+    assert status == 200
@@ -0,0 +1,99 @@
+"""Backtest: t barındaki özellik ve sinyaller sadece t'ye kadarki veriye, getiriler sadece t+h barına bağlı olmalı"""
+import numpy as np
+import pandas as pd
+import pytest
+
+END = "2024-06-28"
+
+
+@pytest.fixture
+def histories(hisse):
+    """Farklı başlangıçlı ve arada eksik günleri olan evren (tarih hizalamasında NaN barlar oluşur)"""
+    out = {f"BT{i}": hisse.generate_synthetic_ohlcv(f"BT{i}", n_bars, i, end=END)
+           for i, n_bars in enumerate((260, 220, 180, 260, 150))}
+    out["BT1"] = out["BT1"].drop(out["BT1"].index[[100, 101, 150]])
+    return out
+
+
+@pytest.fixture
+def loose_filters(hisse, monkeypatch):
+    """Sinyal üretilebilsin diye eşikleri gevşet (kurallar aynı kalır)"""
+    for name, value in [('MIN_RSI', 0), ('MAX_RSI', 100), ('VOLUME_INCREASE_MIN', 0), ('MIN_VOLUME', 0),
+                        ('MIN_PRICE', 0), ('MAX_PRICE', 1e9), ('MIN_ATR_PERCENT', 0), ('MAX_ATR_PERCENT', 100),
+                        ('MAX_PRICE_EMA20_DISTANCE', 1.0), ('MAX_SUPPORT_DISTANCE', 1.0),
+                        ('MAX_STOP_LOSS_DISTANCE', 1.0), ('MAX_RESISTANCE_DISTANCE', 1.0),
+                        ('MACD_CROSSOVER', False), ('MACD_HISTOGRAM_POSITIVE', False)]:
+        monkeypatch.setattr(hisse, name, value)
+
+
+def features_and_signals(hisse, histories):
+    panel = hisse.build_price_panel(histories, align='dates')
+    features = hisse.compute_backtest_features(panel)
+    return panel, features, hisse.backtest_signals(features)
+
+
+def truncated(histories, cutoff):
+    return {ticker: hist[hist.index <= cutoff] for ticker, hist in histories.items()}
+
+
+@pytest.mark.parametrize('cut', [49, 75, 120, 200, 258])
+def test_features_use_only_past_bars(hisse, histories, loose_filters, cut):
+    panel, features, signals = features_and_signals(hisse, histories)
+    cutoff = panel['index'][cut]
+    short_panel, short_features, short_signals = features_and_signals(hisse, truncated(histories, cutoff))
+    assert len(short_panel['index']) == cut + 1
+    for name, values in short_features.items():
+        np.testing.assert_array_equal(values, features[name][:, :cut + 1], err_msg=name)
+    np.testing.assert_array_equal(short_signals, signals[:, :cut + 1])
+
+
+def test_future_changes_do_not_move_past_signals(hisse, histories, loose_filters):
+    panel, features, signals = features_and_signals(hisse, histories)
+    assert signals.any(), "gevşetilmiş eşiklerle sinyal olmalı"
+    cutoff = panel['index'][150]
+    rng = np.random.default_rng(5)
+    altered = {}
+    for ticker, hist in histories.items():
+        hist = hist.copy()
+        future = hist.index > cutoff
+        shock = rng.uniform(0.5, 1.5, (future.sum(), 1))
+        hist.loc[future, ['Open', 'High', 'Low', 'Close']] *= shock  # Gelecekte sert fiyat/hacim değişimi
+        hist.loc[future, 'Volume'] *= 10
+        altered[ticker] = hist
+    _, altered_features, altered_signals = features_and_signals(hisse, altered)
+    np.testing.assert_array_equal(altered_signals[:, :151], signals[:, :151])
+    for name in ('rsi', 'ema_20', 'macd', 'macd_crossover', 'volume_increase', 'nearest_support',
+                 'nearest_resistance'):
+        np.testing.assert_array_equal(altered_features[name][:, :151], features[name][:, :151], err_msg=name)
+
+
+def test_too_short_history_never_signals(hisse, histories, loose_filters):
+    panel, features, signals = features_and_signals(hisse, histories)
+    history_length = np.cumsum(~np.isnan(panel['Close']), axis=1)
+    assert not signals[history_length < hisse.BACKTEST_MIN_BARS].any()
+    assert not signals[np.isnan(panel['Close'])].any()
+
+
+@pytest.mark.parametrize('horizon', [1, 5, 20])
+def test_forward_returns_use_only_horizon_window(hisse, histories, horizon):
+    panel = hisse.build_price_panel(histories, align='dates')
+    close, low = panel['Close'], panel['Low']
+    returns, drawdowns = hisse.forward_returns(close, low, horizon)
+    n_bars = close.shape[1]
+    assert np.isnan(returns[:, n_bars - horizon:]).all() and np.isnan(drawdowns[:, n_bars - horizon:]).all()
+    with np.errstate(invalid='ignore'):
+        for t in range(n_bars - horizon):
+            np.testing.assert_array_equal(returns[:, t], close[:, t + horizon] / close[:, t] - 1)
+            worst = np.fmin.reduce(low[:, t + 1:t + horizon + 1], axis=1)  # t barının düşüğü dahil değil
+            np.testing.assert_array_equal(drawdowns[:, t], np.minimum(worst / close[:, t] - 1, 0))
+
+
+def test_report_counts_match_signals(hisse, histories, loose_filters):
+    report = hisse.run_backtest(histories, horizons=(1, 10))
+    signals = report.attrs['signals']
+    close = hisse.build_price_panel(histories, align='dates')['Close']
+    for row in report.itertuples(index=False):
+        returns, _ = hisse.forward_returns(close, close, row.Vade)
+        assert row.Sinyal == int((signals & ~np.isnan(returns)).sum())
+    assert list(report.attrs['index']) == sorted(pd.DatetimeIndex(
+        np.concatenate([hist.index.to_numpy() for hist in histories.values()])).unique())
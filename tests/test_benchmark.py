@@ -0,0 +1,15 @@
+"""Benchmark paketi: ölçümler kullanıcının tarama durumunu değiştirmemeli"""
+
+
+def test_benchmark_suite_leaves_scan_state_untouched(hisse, monkeypatch):
+    """Ölçüm taramaları kullanıcının benzerlik indeksine, korelasyon motoruna ve sonuç önbelleğine yazmamalı"""
+    index, engine, cache = hisse.SimilarityIndex(), hisse.RollingCorrelation(), hisse.ResultCache(path=None)
+    monkeypatch.setattr(hisse, 'SIMILARITY_INDEX', index)
+    monkeypatch.setattr(hisse, 'CORRELATION_ENGINE', engine)
+    monkeypatch.setattr(hisse, 'RESULT_CACHE', cache)
+    monkeypatch.setattr(hisse, 'measure_startup', lambda repeats=1: None)  # Yeni süreç başlatma bu testin konusu değil
+    report = hisse.run_benchmark_suite(n_tickers=6, n_bars=80, repeats=1)
+    assert 'scan_and_filter_stocks' in report['results']
+    assert hisse.SIMILARITY_INDEX is index and hisse.CORRELATION_ENGINE is engine and hisse.RESULT_CACHE is cache
+    assert "SYN000" not in index and engine.tickers == []
+    assert cache.stats == {'hits': 0, 'misses': 0, 'evictions': 0}
@@ -0,0 +1,68 @@
+"""CachedDataProvider: soğuk/ılık önbellek ve saat dilimli Yahoo verisi"""
+import pandas as pd
+
+
+class TzAwareProvider:
+    """Yahoo gibi Europe/Istanbul saat dilimli indeks döndüren sahte sağlayıcı"""
+
+    def __init__(self, hisse, n_bars=300):
+        self.hisse = hisse
+        self.n_bars = n_bars
+        self.calls = []
+
+    def get_history(self, ticker, period="6mo", start=None, interval="1d"):
+        self.calls.append(start)
+        hist = self.hisse.generate_synthetic_ohlcv(ticker, self.n_bars)
+        hist.index = pd.date_range(end=pd.Timestamp.now(tz='Europe/Istanbul').normalize(),
+                                   periods=self.n_bars, freq='B')
+        return hist if start is None else hist[hist.index >= start]
+
+
+def test_cold_cache_with_tz_aware_index(hisse, tmp_path):
+    provider = TzAwareProvider(hisse)
+    cache = hisse.CachedDataProvider(provider, cache_dir=str(tmp_path), max_age_minutes=60)
+    hist = cache.get_history("THYAO.IS", period="6mo")
+    assert cache.stats['full'] == 1
+    assert str(hist.index.tz) == 'Europe/Istanbul'
+    assert 0 < len(hist) < provider.n_bars
+    assert hist.index[0] >= hisse.align_timestamp(hisse.period_start("6mo"), hist.index.tz)
+
+
+def test_warm_cache_matches_cold(hisse, tmp_path):
+    provider = TzAwareProvider(hisse)
+    cold = hisse.CachedDataProvider(provider, cache_dir=str(tmp_path), max_age_minutes=60).get_history("AKBNK.IS")
+    warm_cache = hisse.CachedDataProvider(provider, cache_dir=str(tmp_path), max_age_minutes=60)
+    warm = warm_cache.get_history("AKBNK.IS")
+    assert warm_cache.stats['fresh'] == 1
+    pd.testing.assert_frame_equal(cold, warm)
+
+
+def test_incremental_refresh_with_naive_start(hisse, tmp_path):
+    provider = TzAwareProvider(hisse)
+    cache = hisse.CachedDataProvider(provider, cache_dir=str(tmp_path), max_age_minutes=0)
+    cache.get_history("GARAN.IS")
+    start = pd.Timestamp.now().normalize() - pd.DateOffset(months=1)  # tz'siz başlangıç
+    hist = cache.get_history("GARAN.IS", start=start)
+    assert cache.stats['incremental'] == 1
+    assert hist.index[0] >= hisse.align_timestamp(start, hist.index.tz)
+
+
+def test_recent_listing_is_not_refetched(hisse, tmp_path):
+    provider = TzAwareProvider(hisse, n_bars=40)  # 6 aydan kısa geçmiş (yeni halka arz)
+    cache = hisse.CachedDataProvider(provider, cache_dir=str(tmp_path), max_age_minutes=0)
+    for _ in range(3):
+        hist = cache.get_history("YENI.IS", period="6mo")
+    assert cache.stats == {'fresh': 0, 'incremental': 2, 'full': 1}
+    assert provider.calls[0] is None and all(start is not None for start in provider.calls[1:])
+    assert len(hist) == 40
+
+
+def test_wider_request_refetches(hisse, tmp_path):
+    provider = TzAwareProvider(hisse)
+    cache = hisse.CachedDataProvider(provider, cache_dir=str(tmp_path), max_age_minutes=60)
+    cache.get_history("ASELS.IS", period="1mo")
+    cache.get_history("ASELS.IS", period="1mo")
+    cache.get_history("ASELS.IS", period="6mo")
+    assert cache.stats == {'fresh': 1, 'incremental': 0, 'full': 2}
+    cache.get_history("ASELS.IS", period="3mo")
+    assert cache.stats['fresh'] == 2
@@ -0,0 +1,15 @@
+"""Komut satırı: --cprofile seçilen komutu profiller"""
+import pstats
+import subprocess
+import sys
+
+from conftest import SCRIPT
+
+
+def test_cprofile_wraps_dispatched_command(tmp_path):
+    stats_path = tmp_path / "sr.pstats"
+    subprocess.run([sys.executable, str(SCRIPT), '--cprofile', str(stats_path), '--benchmark-sr'],
+                   cwd=tmp_path, capture_output=True, check=True, timeout=300)
+    functions = {name for _, _, name in pstats.Stats(str(stats_path)).stats}
+    assert 'benchmark_support_resistance' in functions
+    assert 'main' not in functions
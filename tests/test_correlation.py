@@ -0,0 +1,105 @@
+"""RollingCorrelation: artımlı çapraz çarpım güncellemesi aynı penceredeki np.corrcoef ile aynı kalmalı"""
+import numpy as np
+import pandas as pd
+import pytest
+
+WINDOW = 30
+
+
+@pytest.fixture
+def closes():
+    """Ortak faktörlü, birbirine korelasyonlu 8 hissenin kapanışları (tarih x hisse)"""
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range("2024-01-01", periods=260)
+    market = rng.normal(0, 0.01, len(dates))
+    returns = market[:, None] * rng.uniform(0.2, 1.5, 8) + rng.normal(0, 0.01, (len(dates), 8))
+    return pd.DataFrame(50 * np.exp(np.cumsum(returns, axis=0)), index=dates,
+                        columns=[f"T{i}" for i in range(8)])
+
+
+def reference(table):
+    """Aynı pencere için doğrudan hesap: eksik bar önceki kapanışla doldurulur, getirisi 0 sayılır"""
+    table = table.ffill().tail(WINDOW + 1)
+    returns = np.nan_to_num(table.pct_change(fill_method=None).to_numpy()[1:])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.corrcoef(returns, rowvar=False)
+
+
+def observe_day(engine, closes, day, tickers):
+    for ticker in tickers:
+        engine.observe(ticker, closes[ticker].iloc[:day + 1].dropna())  # NaN = o gün bar yok
+    engine.sync()
+
+
+def test_incremental_matches_corrcoef(hisse, closes):
+    engine = hisse.RollingCorrelation(window=WINDOW, rebuild_every=10_000)
+    tickers = list(closes.columns)
+    observe_day(engine, closes, 60, tickers)
+    for day in range(61, 200):
+        observe_day(engine, closes, day, tickers)
+        np.testing.assert_allclose(engine.matrix(), reference(closes[tickers].iloc[:day + 1]), atol=1e-10)
+    assert engine.stats['rebuilds'] == 1
+    assert engine.stats['updates'] == 139
+
+
+def test_tickers_entering_and_leaving(hisse, closes):
+    engine = hisse.RollingCorrelation(window=WINDOW, rebuild_every=10_000)
+    universe = list(closes.columns)
+    schedule = {day: universe for day in range(60, 200)}
+    for day in range(100, 130):
+        schedule[day] = universe[:-2]           # İki hisse evrenden çıktı
+    for day in range(160, 200):
+        schedule[day] = universe + ["NEW"]      # Yeni hisse eklendi
+    closes = closes.assign(NEW=closes["T0"] * 1.3 + np.linspace(0, 5, len(closes)))
+    for day, tickers in schedule.items():
+        observe_day(engine, closes, day, tickers)
+        expected = reference(closes[sorted(tickers)].iloc[:day + 1])
+        assert engine.tickers == sorted(tickers)
+        np.testing.assert_allclose(engine.matrix(), expected, atol=1e-10)
+    assert engine.stats['rebuilds'] == 4  # İlk hesap, çıkış, geri dönüş, yeni hisse
+
+
+def test_intraday_last_bar_revision(hisse, closes):
+    engine = hisse.RollingCorrelation(window=WINDOW, rebuild_every=10_000)
+    tickers = list(closes.columns)
+    observe_day(engine, closes, 80, tickers)
+    revised = closes.copy()
+    for step in range(5):
+        # Seans içinde son bar defalarca güncellenir: son getiri geri alınıp yeniden eklenir
+        revised.iloc[81] = closes.iloc[81] * (1 + 0.003 * (step - 2))
+        observe_day(engine, revised, 81, tickers)
+        np.testing.assert_allclose(engine.matrix(), reference(revised.iloc[:82]), atol=1e-10)
+    assert engine.stats['rebuilds'] == 1
+
+
+def test_missing_bar_is_forward_filled(hisse, closes):
+    engine = hisse.RollingCorrelation(window=WINDOW, rebuild_every=10_000)
+    gapped = closes.copy()
+    gapped.loc[closes.index[90], "T3"] = np.nan  # T3 o gün işlem görmedi
+    gapped.loc[closes.index[95:97], "T5"] = np.nan
+    for day in range(70, 140):
+        observe_day(engine, gapped, day, list(closes.columns))
+        np.testing.assert_allclose(engine.matrix(), reference(gapped.iloc[:day + 1]), atol=1e-10)
+    assert engine.stats['rebuilds'] == 1
+
+
+def test_periodic_rebuild_limits_drift(hisse, closes):
+    engine = hisse.RollingCorrelation(window=WINDOW, rebuild_every=25)
+    tickers = list(closes.columns)
+    for day in range(60, 200):
+        observe_day(engine, closes, day, tickers)
+    assert engine.stats['rebuilds'] == 1 + 139 // 26
+    np.testing.assert_allclose(engine.matrix(), reference(closes.iloc[:200]), atol=1e-12)
+
+
+def test_no_drift_over_long_run_without_rebuild(hisse):
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2015-01-01", periods=2000)
+    long = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), 5)), axis=0)), index=dates,
+                        columns=[f"L{i}" for i in range(5)])
+    engine = hisse.RollingCorrelation(window=WINDOW, rebuild_every=10**9)
+    engine.sync(long.iloc[:60])
+    for day in range(61, len(long) + 1):
+        engine.sync(long.iloc[day - WINDOW - 1:day])  # Her gün bir yeni bar
+    assert engine.stats['rebuilds'] == 1 and engine.stats['updates'] == len(long) - 60
+    np.testing.assert_allclose(engine.matrix(), reference(long), atol=1e-9)
@@ -0,0 +1,67 @@
+"""Veri çekme zamanlayıcısı: tekrar, zaman aşımı ve devre kesici"""
+import pytest
+
+
+def scheduler_for(hisse, provider, **kwargs):
+    options = dict(rate=1000, burst=100, retries=2, backoff=0.001, backoff_max=0.01, timeout=0.5,
+                   breaker=hisse.CircuitBreaker(threshold=3, cooldown=60))
+    options.update(kwargs)
+    return hisse.FetchScheduler(provider, **options)
+
+
+def fetch_all(scheduler, tickers):
+    fetched = []
+    for ticker in tickers:
+        try:
+            scheduler.get_history(f"{ticker}.IS")
+            fetched.append(ticker)
+        except Exception:
+            pass
+    return fetched
+
+
+def test_permanent_ticker_failures_do_not_open_breaker(hisse):
+    tickers = [f"SYN{i:03d}" for i in range(12)]
+    provider = hisse.SyntheticDataProvider(failing_tickers=tickers[:6])  # Örn: işlemden kaldırılmış semboller
+    scheduler = scheduler_for(hisse, provider)
+    assert fetch_all(scheduler, tickers) == tickers[6:]
+    assert scheduler.breaker.state == 'closed'
+    assert sorted(scheduler.report()['outcomes']['failed']) == tickers[:6]
+
+
+def test_transport_failures_open_breaker(hisse):
+    tickers = [f"SYN{i:03d}" for i in range(6)]
+    provider = hisse.SyntheticDataProvider(fail_rate=1.0)  # Her istek bağlantı hatası
+    scheduler = scheduler_for(hisse, provider, retries=0)
+    assert fetch_all(scheduler, tickers) == []
+    assert scheduler.breaker.state == 'open'
+    outcomes = scheduler.report()['outcomes']
+    assert len(outcomes['failed']) == 3 and len(outcomes['circuit_open']) == 3
+
+
+def test_retry_and_timeout_outcomes(hisse):
+    provider = hisse.SyntheticDataProvider(slow_tickers={'SYN000': 5}, flaky_tickers={'SYN001': 1})
+    scheduler = scheduler_for(hisse, provider, retries=1, timeout=0.2,
+                              breaker=hisse.CircuitBreaker(threshold=5, cooldown=60))
+    assert fetch_all(scheduler, ['SYN000', 'SYN001', 'SYN002']) == ['SYN001', 'SYN002']
+    outcomes = scheduler.report()['outcomes']
+    assert outcomes == {'timed_out': ['SYN000'], 'retried': ['SYN001'], 'ok': ['SYN002']}
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(status_code)
+        self.response = type('Response', (), {'status_code': status_code})()
+
+
+@pytest.mark.parametrize('error, transport', [
+    (ConnectionError("reset"), True),
+    (TimeoutError(), True),
+    (HTTPError(503), True),
+    (HTTPError(429), True),
+    (HTTPError(404), False),
+    (ValueError("possibly delisted"), False),
+    (KeyError('Close'), False),
+])
+def test_is_transport_error(hisse, error, transport):
+    assert hisse.is_transport_error(error) == transport
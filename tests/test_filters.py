@@ -0,0 +1,180 @@
+"""Kriter matrisi, eski hisse hisse filtre/sebep/yakınlık fonksiyonlarıyla aynı sonucu vermeli"""
+import math
+import random
+
+import pytest
+
+TOGGLES = ('MACD_CROSSOVER', 'MACD_HISTOGRAM_POSITIVE', 'EMA20_ABOVE_EMA50', 'PRICE_NEAR_EMA20',
+           'NEAR_SUPPORT', 'RESISTANCE_POTENTIAL')
+
+
+# Matristen önceki (hisse hisse) uygulama - karşılaştırma için referans
+def legacy_check(h, stock):
+    if not (h.MIN_PRICE <= stock['price'] <= h.MAX_PRICE):
+        return False
+    if stock['volume'] < h.MIN_VOLUME:
+        return False
+    if not (h.MIN_RSI <= stock['rsi'] <= h.MAX_RSI):
+        return False
+    if h.MACD_CROSSOVER and not stock['macd_crossover']:
+        return False
+    if h.MACD_HISTOGRAM_POSITIVE and stock['histogram'] <= 0:
+        return False
+    if stock['volume_increase'] < h.VOLUME_INCREASE_MIN:
+        return False
+    if h.EMA20_ABOVE_EMA50 and stock['ema_50'] and stock['ema_20'] <= stock['ema_50']:
+        return False
+    if h.PRICE_NEAR_EMA20 and abs(stock['price'] - stock['ema_20']) / stock['ema_20'] > h.MAX_PRICE_EMA20_DISTANCE:
+        return False
+    if not (h.MIN_ATR_PERCENT <= stock['atr_percent'] <= h.MAX_ATR_PERCENT):
+        return False
+    support, resistance = stock['nearest_support'], stock['nearest_resistance']
+    if h.NEAR_SUPPORT and support and abs(stock['price'] - support) / support > h.MAX_SUPPORT_DISTANCE:
+        return False
+    if support and (stock['price'] - support) / stock['price'] > h.MAX_STOP_LOSS_DISTANCE:
+        return False
+    if h.RESISTANCE_POTENTIAL and resistance and (resistance - stock['price']) / stock['price'] > h.MAX_RESISTANCE_DISTANCE:
+        return False
+    return True
+
+
+def legacy_score(h, stock):
+    score, max_score = 0, 0
+    max_score += 1
+    if h.MIN_RSI <= stock['rsi'] <= h.MAX_RSI:
+        score += 1
+    elif stock['rsi'] < h.MIN_RSI:
+        score += max(0, 1 - (h.MIN_RSI - stock['rsi'])/20)
+    else:
+        score += max(0, 1 - (stock['rsi'] - h.MAX_RSI)/20)
+    max_score += 1
+    score += 1 if stock['macd_crossover'] else 0.3
+    max_score += 1
+    score += 1 if stock['histogram'] > 0 else 0.3
+    max_score += 1
+    if stock['volume_increase'] >= h.VOLUME_INCREASE_MIN:
+        score += 1
+    else:
+        score += max(0, stock['volume_increase'] / h.VOLUME_INCREASE_MIN)
+    if stock['ema_50']:
+        max_score += 1
+        score += 1 if stock['ema_20'] > stock['ema_50'] else 0.3
+    max_score += 1
+    distance = abs(stock['price'] - stock['ema_20']) / stock['ema_20']
+    score += 1 if distance <= h.MAX_PRICE_EMA20_DISTANCE else max(0, 1 - distance/0.1)
+    max_score += 1
+    score += 1 if h.MIN_ATR_PERCENT <= stock['atr_percent'] <= h.MAX_ATR_PERCENT else 0.3
+    return score / max_score
+
+
+def legacy_reasons(h, stock):
+    reasons = []
+    if not (h.MIN_PRICE <= stock['price'] <= h.MAX_PRICE):
+        reasons.append(f"Fiyat {stock['price']:.2f} TL, aralık dışında ({h.MIN_PRICE}-{h.MAX_PRICE} TL)")
+    if stock['volume'] < h.MIN_VOLUME:
+        reasons.append(f"Günlük hacim yetersiz ({stock['volume']:,.0f} < {h.MIN_VOLUME:,})")
+    if not (h.MIN_RSI <= stock['rsi'] <= h.MAX_RSI):
+        reasons.append(f"RSI {stock['rsi']:.1f}, aralık dışında ({h.MIN_RSI}-{h.MAX_RSI})")
+    if not stock['macd_crossover']:
+        reasons.append("MACD çizgisi sinyal çizgisini aşağıdan yukarı kesmemiş")
+    if stock['histogram'] <= 0:
+        reasons.append("MACD histogram pozitif değil")
+    if stock['volume_increase'] < h.VOLUME_INCREASE_MIN:
+        reasons.append(f"Hacim artışı yetersiz (%{(stock['volume_increase']-1)*100:.1f} < "
+                       f"%{(h.VOLUME_INCREASE_MIN-1)*100:.0f})")
+    if stock['ema_50'] and stock['ema_20'] <= stock['ema_50']:
+        reasons.append("EMA20 EMA50'nin üstünde değil")
+    distance = abs(stock['price'] - stock['ema_20']) / stock['ema_20']
+    if distance > h.MAX_PRICE_EMA20_DISTANCE:
+        reasons.append(f"Fiyat EMA20'den çok uzak (%{distance*100:.1f} > %{h.MAX_PRICE_EMA20_DISTANCE*100:.0f})")
+    if not (h.MIN_ATR_PERCENT <= stock['atr_percent'] <= h.MAX_ATR_PERCENT):
+        reasons.append(f"ATR aralık dışında (%{stock['atr_percent']:.1f})")
+    if stock['nearest_support']:
+        distance = abs(stock['price'] - stock['nearest_support']) / stock['nearest_support']
+        if distance > h.MAX_SUPPORT_DISTANCE:
+            reasons.append(f"En yakın destekten çok uzak (%{distance*100:.1f} > %{h.MAX_SUPPORT_DISTANCE*100:.0f})")
+    return reasons
+
+
+def random_stock(h, rng, i):
+    """Eşik çevresinde, sınır değerleri, None (EMA50/destek/direnç yok) ve NaN içeren yapay sonuç"""
+    price = rng.choice([h.MIN_PRICE, h.MAX_PRICE, rng.uniform(1, 1500)])
+    ema_20 = price * rng.uniform(0.9, 1.1)
+
+    def maybe(value, missing=None):
+        return missing if rng.random() < 0.15 else value
+
+    return {
+        'ticker': f"SYN{i:03d}",
+        'price': price,
+        'volume': rng.choice([h.MIN_VOLUME, rng.uniform(0, 3 * h.MIN_VOLUME), math.nan]),
+        'volume_increase': rng.choice([h.VOLUME_INCREASE_MIN, rng.uniform(0.5, 2.5), math.nan]),
+        'rsi': rng.choice([h.MIN_RSI, h.MAX_RSI, rng.uniform(10, 90), math.nan]),
+        'ema_20': ema_20,
+        'ema_50': maybe(ema_20 * rng.uniform(0.9, 1.1)),
+        'macd': rng.uniform(-2, 2),
+        'signal': rng.uniform(-2, 2),
+        'histogram': rng.choice([0.0, rng.uniform(-1, 1), math.nan]),
+        'macd_crossover': rng.random() < 0.5,
+        'atr_percent': rng.choice([h.MIN_ATR_PERCENT, h.MAX_ATR_PERCENT, rng.uniform(0, 10), math.nan]),
+        'nearest_support': maybe(price * rng.uniform(0.85, 1.0)),
+        'nearest_resistance': maybe(price * rng.uniform(1.0, 1.15)),
+    }
+
+
+def passing_stock(h, i):
+    """Tüm kriterlerin ortasında kalan sonuç"""
+    price = (h.MIN_PRICE + h.MAX_PRICE) / 2
+    return {
+        'ticker': f"OK{i:03d}", 'price': price, 'volume': 2 * h.MIN_VOLUME,
+        'volume_increase': h.VOLUME_INCREASE_MIN + 0.5, 'rsi': (h.MIN_RSI + h.MAX_RSI) / 2,
+        'ema_20': price * 0.995, 'ema_50': price * 0.98, 'macd': 0.5, 'signal': 0.2, 'histogram': 0.3,
+        'macd_crossover': True, 'atr_percent': (h.MIN_ATR_PERCENT + h.MAX_ATR_PERCENT) / 2,
+        'nearest_support': price * 0.99, 'nearest_resistance': price * 1.02,
+    }
+
+
+@pytest.fixture
+def universe(hisse):
+    rng = random.Random(5)
+    stocks = [random_stock(hisse, rng, i) for i in range(400)]
+    # Uygun hisseler ve tek alanı bozulmuş (sınırda/eksik) uygun hisseler
+    for i in range(100):
+        stock = passing_stock(hisse, i)
+        if i % 4:
+            field = rng.choice([key for key in stock if key not in ('ticker', 'price', 'ema_20')])
+            stock[field] = random_stock(hisse, rng, i)[field]
+        stocks.append(stock)
+    # Gerçek analiz sonuçları da (yapay veriyle) karşılaştırılır
+    provider = hisse.SyntheticDataProvider()
+    stocks += [hisse.analyze_stock_comprehensive(f"REAL{i:02d}", provider, cache=False) for i in range(20)]
+    return stocks
+
+
+@pytest.mark.parametrize('toggles', [True, False])
+def test_matrix_matches_per_stock_semantics(hisse, universe, monkeypatch, toggles):
+    for name in TOGGLES:
+        monkeypatch.setattr(hisse, name, toggles)
+    frame = hisse.results_to_frame(universe)
+    columns = hisse.filter_columns(frame)
+    matrix = hisse.evaluate_filter_matrix(frame, columns)
+    passed = hisse.filter_pass_mask(matrix)
+    reasons = hisse.explain_from_matrix(frame, matrix, columns)
+    scores = hisse.proximity_scores(frame, columns)
+    assert 0 < passed.sum() < len(universe)
+    for row, stock in enumerate(universe):
+        assert bool(passed[row]) == legacy_check(hisse, stock), stock
+        assert hisse.check_new_filters(stock) == legacy_check(hisse, stock)
+        assert reasons[row] == legacy_reasons(hisse, stock), stock
+        assert hisse.explain_why_not_matching(stock) == legacy_reasons(hisse, stock)
+        assert scores[row] == pytest.approx(legacy_score(hisse, stock)), stock
+        assert hisse.calculate_proximity_score(stock) == pytest.approx(legacy_score(hisse, stock))
+
+
+def test_nan_ema50_and_levels_count_as_missing(hisse, universe):
+    """Panel yolunda eksik değerler None değil NaN gelir; matris ikisini de 'yok' sayar"""
+    stock = next(stock for stock in universe if stock['ema_50'] is None and stock['nearest_support'] is None)
+    nan_stock = dict(stock, ema_50=math.nan, nearest_support=math.nan, nearest_resistance=math.nan)
+    assert hisse.check_new_filters(nan_stock) == legacy_check(hisse, stock)
+    assert hisse.explain_why_not_matching(nan_stock) == legacy_reasons(hisse, stock)
+    assert hisse.calculate_proximity_score(nan_stock) == pytest.approx(legacy_score(hisse, stock))
@@ -0,0 +1,98 @@
+"""Destek/direnç: vektörel arama döngü tabanlı referansla aynı seviye ve güçleri vermeli"""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def series(hisse, kind, n_bars, seed=0):
+    close = hisse.generate_synthetic_ohlcv(f"LVL{seed}", n_bars, seed)['Close'].round(2)
+    rng = np.random.default_rng(seed)
+    if kind in ('flat', 'flat_nan'):
+        # Düz bölgeler: aynı fiyatın tekrarladığı barlar (eşit yerel min/max ve bağlı sıralama)
+        for start in rng.integers(0, n_bars - 15, size=max(1, n_bars // 60)):
+            close.iloc[start:start + 12] = close.iloc[start]
+    if kind in ('nan', 'flat_nan'):
+        close.iloc[rng.integers(0, n_bars, size=max(1, n_bars // 25))] = np.nan
+    if kind == 'step':
+        close[:] = np.repeat([10.0, 12.0, 11.0, 12.0], -(-n_bars // 4))[:n_bars]
+    return close
+
+
+@pytest.fixture
+def all_levels(hisse, monkeypatch):
+    """İlk 3 değil tüm seviyeler karşılaştırılsın"""
+    monkeypatch.setattr(hisse, 'SUPPORT_RESISTANCE_COUNT', 10_000)
+
+
+@pytest.mark.parametrize('kind', ['plain', 'flat', 'nan', 'flat_nan', 'step'])
+@pytest.mark.parametrize('n_bars', [30, 41, 126, 504])
+@pytest.mark.parametrize('window', [5, 20])
+def test_vectorized_levels_match_loop(hisse, all_levels, kind, n_bars, window):
+    for seed in range(3):
+        close = series(hisse, kind, n_bars, seed)
+        expected = hisse._find_support_resistance_levels_loop(close, window)
+        actual = hisse.find_support_resistance_levels(close, window)
+        assert actual == expected
+        assert all(isinstance(strength, float) for _, strength in actual[0] + actual[1])
+
+
+@pytest.mark.parametrize('kind', ['plain', 'flat', 'nan', 'step'])
+def test_support_strengths_match_scalar(hisse, kind):
+    close = series(hisse, kind, 126, seed=7)
+    valid = close.dropna()
+    levels = np.concatenate([valid.iloc[-30:].to_numpy(), [valid.min(), valid.max(), 0.5 * valid.min()]])
+    for window in (5, 20, 200):
+        strengths = hisse.calculate_support_strengths(close, levels, window)
+        expected = [hisse.calculate_support_strength(close, level, window) for level in levels]
+        np.testing.assert_array_equal(strengths, np.asarray(expected, dtype=float))
+
+
+def test_top_levels_are_strongest_first(hisse):
+    close = series(hisse, 'flat', 504, seed=3)
+    supports, resistances = hisse.find_support_resistance_levels(close)
+    assert len(supports) == len(resistances) == hisse.SUPPORT_RESISTANCE_COUNT
+    for levels, price_order in ((supports, -1), (resistances, 1)):
+        keys = [(-strength, price_order * price) for price, strength in levels]
+        assert keys == sorted(keys)
+    assert hisse.find_support_resistance_levels(pd.Series(dtype=float)) == ([], [])
+
+
+def profile_series():
+    """İki belirgin hacim düğümü (10 ve 20 TL civarı) ve aradaki az hacimli geçiş"""
+    prices = np.concatenate([np.full(40, 10.0), np.linspace(10.5, 19.5, 19), np.full(20, 20.0), [15.0]])
+    volume = np.concatenate([np.full(40, 1000.0), np.full(19, 10.0), np.full(20, 1000.0), [10.0]])
+    return pd.Series(prices), pd.Series(volume)
+
+
+def test_volume_profile_splits_at_current_price(hisse):
+    close, volume = profile_series()
+    supports, resistances = hisse.find_volume_profile_levels(close, volume, bins=20)
+    assert [round(price, 2) for price, _ in supports] == [10.0]
+    assert [round(price, 2) for price, _ in resistances] == [20.0]
+    supports, resistances = hisse.find_volume_profile_levels(close, volume, current_price=25.0, bins=20)
+    assert [round(price, 2) for price, _ in supports] == [10.0, 20.0] and resistances == []  # Güce göre
+    supports, resistances = hisse.find_volume_profile_levels(close, volume, current_price=5.0, bins=20)
+    assert supports == [] and [round(price, 2) for price, _ in resistances] == [10.0, 20.0]
+
+
+def test_volume_profile_strength_is_scaled_to_largest_node(hisse):
+    close, volume = profile_series()  # 20 TL düğümü (20 bar) 10 TL düğümünün (40 bar) yarısı kadar hacimli
+    supports, resistances = hisse.find_volume_profile_levels(close, volume, bins=20)
+    assert supports[0][1] == pytest.approx(5.0)
+    assert resistances[0][1] == pytest.approx(2.5, rel=1e-3)
+    # Ölçek mutlak hacimden bağımsız
+    scaled = hisse.find_volume_profile_levels(close, volume * 1000, bins=20)
+    assert scaled[0][0][1] == pytest.approx(5.0) and scaled[1][0][1] == pytest.approx(resistances[0][1])
+
+
+def test_volume_profile_ignores_trailing_nan_and_zero_volume(hisse):
+    close, volume = profile_series()
+    expected = hisse.find_volume_profile_levels(close, volume, bins=20)
+    nan_tail = hisse.find_volume_profile_levels(pd.concat([close, pd.Series([np.nan])], ignore_index=True),
+                                                pd.concat([volume, pd.Series([np.nan])], ignore_index=True), bins=20)
+    assert nan_tail == expected
+    assert nan_tail[0] and nan_tail[1]
+    zero = hisse.find_volume_profile_levels(pd.concat([close, pd.Series([100.0, 15.0])], ignore_index=True),
+                                            pd.concat([volume, pd.Series([0.0, 10.0])], ignore_index=True), bins=20)
+    assert zero == expected  # Hacimsiz bar fiyat aralığını genişletmez
+    assert hisse.find_volume_profile_levels(pd.Series([np.nan] * 5), pd.Series([1.0] * 5)) == ([], [])
@@ -0,0 +1,55 @@
+"""Panel (hisse x bar) göstergeleri tek hisse hesaplamasıyla bar bar aynı olmalı"""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope="module")
+def histories(hisse):
+    # Farklı uzunlukta seriler: kısa olanlar panelde soldan NaN ile doldurulur
+    return {f"SYN{i}": hisse.generate_synthetic_ohlcv(f"SYN{i}", n_bars)
+            for i, n_bars in enumerate((260, 180, 120, 75, 60))}
+
+
+@pytest.fixture(scope="module")
+def panel(hisse, histories):
+    return hisse.build_price_panel(histories)
+
+
+def _rows(panel, histories):
+    width = panel['Close'].shape[1]
+    for row, (ticker, hist) in enumerate(histories.items()):
+        yield row, width - len(hist), hist
+
+
+def test_rsi_panel_matches_calculate_rsi(hisse, panel, histories):
+    rsi = hisse.rsi_panel(panel['Close'])
+    for row, start, hist in _rows(panel, histories):
+        assert np.isnan(rsi[row, :start]).all()
+        np.testing.assert_allclose(rsi[row, start:], hisse.calculate_rsi(hist['Close']).to_numpy(),
+                                   rtol=1e-9, equal_nan=True)
+
+
+def test_ema_macd_atr_panels_match(hisse, panel, histories):
+    ema = hisse.ema_panel(panel['Close'], 20)
+    macd_line, signal_line, histogram = hisse.macd_panel(panel['Close'])
+    atr = hisse.atr_panel(panel['High'], panel['Low'], panel['Close'])
+    for row, start, hist in _rows(panel, histories):
+        close = hist['Close']
+        np.testing.assert_allclose(ema[row, start:], hisse.calculate_ema(close, 20).to_numpy(), rtol=1e-9)
+        expected = hisse.calculate_macd(close)
+        for values, reference in zip((macd_line, signal_line, histogram), expected):
+            np.testing.assert_allclose(values[row, start:], reference.to_numpy(), rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(atr[row, start:], hisse.calculate_atr(hist['High'], hist['Low'], close).to_numpy(),
+                                   rtol=1e-9, equal_nan=True)
+
+
+def test_analyze_panel_matches_analyze_history(hisse, panel, histories):
+    by_ticker = {result['ticker']: result for result in hisse.analyze_panel(panel)}
+    for ticker, hist in histories.items():
+        expected = hisse.analyze_history(ticker, hist)
+        actual = by_ticker[ticker]
+        for field in hisse.RESULT_SCALAR_FIELDS:
+            assert actual[field] == pytest.approx(expected[field], rel=1e-9, nan_ok=True), field
+        assert actual['supports_with_strength'] == pytest.approx(expected['supports_with_strength'])
+        assert actual['resistances_with_strength'] == pytest.approx(expected['resistances_with_strength'])
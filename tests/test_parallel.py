@@ -0,0 +1,17 @@
+"""Süreç havuzu: paralel sonuçlar sıralı hesapla aynı ve çalışanlar ana süreçteki ayarları görür"""
+
+
+def test_parallel_store_matches_serial(hisse):
+    store = hisse.OHLCVStore.from_histories(hisse.generate_synthetic_universe(12, 300))
+    serial = hisse.analyze_store(store)
+    parallel = hisse.analyze_store_parallel(store, processes=2, chunk=4)
+    assert hisse.records_equal(serial, parallel)
+
+
+def test_spawn_workers_use_runtime_settings(hisse, spawn_context, monkeypatch):
+    monkeypatch.setattr(hisse, 'SR_ENGINE', 'volume_profile')  # Koddaki varsayılan "pivot"
+    monkeypatch.setattr(hisse, 'SUPPORT_RESISTANCE_COUNT', 2)
+    store = hisse.OHLCVStore.from_histories(hisse.generate_synthetic_universe(6, 300))
+    serial = hisse.analyze_store(store)
+    parallel = hisse.analyze_store_parallel(store, processes=2, chunk=3)
+    assert hisse.records_equal(serial, parallel)
@@ -0,0 +1,82 @@
+"""Erken elenmiş (kısmi) sonuçlar: anlık görüntüler tüm hisseleri tam göstergelerle saklamalı"""
+import pytest
+
+TICKERS = [f"SYN{i:03d}" for i in range(30)]
+
+
+def run_scan(hisse):
+    _, all_results = hisse.scan_and_filter_stocks(TICKERS, workers=1, provider=hisse.SyntheticDataProvider(),
+                                                  full_diagnostics=False, cache=False, prescreen=False)
+    return all_results
+
+
+@pytest.fixture
+def isolated(hisse, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(hisse, 'SIMILARITY_INDEX', hisse.SimilarityIndex())
+    monkeypatch.setattr(hisse, 'SNAPSHOT_EXPORT', None)
+
+
+@pytest.fixture
+def scan(hisse, isolated, monkeypatch):
+    """Anlık görüntü ve benzerlik indeksi kapalıyken erken eleme devrede: kısmi sonuçlar oluşur"""
+    monkeypatch.setattr(hisse, 'SNAPSHOT_ENABLED', False)
+    monkeypatch.setattr(hisse, 'SIMILARITY_ENABLED', False)
+    all_results = run_scan(hisse)
+    partial = {result['ticker'] for result in all_results if result.get('partial')}
+    assert partial, "yapay evrende erken elenen hisse olmalı"
+    return all_results, partial
+
+
+def test_similarity_index_skips_partial_results(hisse, scan):
+    all_results, partial = scan
+    for result in all_results:
+        hisse.SIMILARITY_INDEX.update(result)
+        assert (result['ticker'] in hisse.SIMILARITY_INDEX) == (result['ticker'] not in partial)
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_similarity_index_covers_whole_universe(hisse, isolated, monkeypatch, workers):
+    monkeypatch.setattr(hisse, 'SNAPSHOT_ENABLED', False)
+    filtered, all_results = hisse.scan_and_filter_stocks(
+        TICKERS, workers=workers, provider=hisse.SyntheticDataProvider(), full_diagnostics=False,
+        cache=False, prescreen=False, panel=False)
+    assert len(filtered) < len(all_results)
+    for result in all_results:
+        assert result['ticker'] in hisse.SIMILARITY_INDEX
+        features = hisse.SIMILARITY_INDEX.features(result['ticker'])
+        assert not any(value != value for name, value in features.items()
+                       if name not in ('support_distance', 'resistance_distance'))
+
+
+def test_snapshot_scan_computes_every_row(hisse, isolated):
+    all_results = run_scan(hisse)
+    assert not any(result.get('partial') for result in all_results)
+    snapshot = hisse.load_snapshot(hisse.record_scan_snapshot(all_results))
+    assert list(snapshot['frame']['ticker']) == [result['ticker'] for result in all_results]
+    assert not snapshot['frame']['rsi'].isna().any()
+    assert not snapshot['passed'].all(), "uymayan hisseler de saklanmalı"
+    for result in hisse.snapshot_results(snapshot):
+        assert isinstance(result['supports_with_strength'], list)
+
+
+def test_partial_results_are_completed_before_snapshot(hisse, isolated, monkeypatch):
+    monkeypatch.setattr(hisse, 'SNAPSHOT_ENABLED', False)
+    all_results = run_scan(hisse)
+    monkeypatch.setattr(hisse, 'SNAPSHOT_ENABLED', True)
+    path = hisse.record_scan_snapshot(all_results, provider=hisse.SyntheticDataProvider())
+    frame = hisse.load_snapshot(path)['frame']
+    assert len(frame) == len(all_results)
+    assert not frame['rsi'].isna().any()
+
+
+def test_diff_reports_crossings_of_non_matching_tickers(hisse, isolated):
+    all_results = run_scan(hisse)
+    old = hisse.load_snapshot(hisse.save_snapshot(all_results, "old.npz"))
+    failing = next(result for result, ok in zip(all_results, old['passed']) if not ok)
+    moved = dict(failing, rsi=75.0 if hisse.MIN_RSI <= failing['rsi'] <= hisse.MAX_RSI else 50.0)
+    new = hisse.load_snapshot(hisse.save_snapshot(
+        [moved if result is failing else result for result in all_results], "new.npz"))
+    crossings = hisse.diff_snapshots(old, new)['crossings']
+    assert [(c['ticker'], c['criterion']) for c in crossings] == [(failing['ticker'], 'rsi')]
+    assert crossings[0]['new_value'] == moved['rsi']
@@ -0,0 +1,69 @@
+"""Hisse evreni dosyası önbellek klasöründe durmalı ve sadece kademe değişince yazılmalı"""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def universe(hisse, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    index = hisse.UniverseIndex(seed=[f"SYN{i:03d}" for i in range(20)])
+    monkeypatch.setattr(hisse, 'UNIVERSE_INDEX', index)
+    return index
+
+
+def test_file_lives_under_cache_dir(hisse, universe):
+    assert universe.path == os.path.join(hisse.CACHE_DIR, hisse.UNIVERSE_FILE)
+    hisse.prescreen_universe(universe.tickers(), provider=hisse.SyntheticDataProvider())
+    assert os.path.exists(universe.path)
+    assert not os.path.exists(hisse.UNIVERSE_FILE)
+
+
+def test_repeated_scans_do_not_rewrite(hisse, universe):
+    provider = hisse.SyntheticDataProvider()
+    hisse.prescreen_universe(universe.tickers(), provider=provider)
+    mtime = os.stat(universe.path).st_mtime_ns
+    tiers = {ticker: entry['tier'] for ticker, entry in universe.entries.items()}
+    os.utime(universe.path, ns=(0, 0))
+    hisse.prescreen_universe(universe.tickers(), provider=provider)
+    assert os.stat(universe.path).st_mtime_ns == 0 != mtime
+    assert {ticker: entry['tier'] for ticker, entry in universe.entries.items()} == tiers
+
+
+def test_intraday_turnover_does_not_move_tier(universe):
+    assert universe.observe('SYN000', 10.0, 10_000_000) is True  # Yeni hisse: 100 milyon TL -> kademe 1
+    assert universe.observe('SYN000', 10.0, 1_000) is False      # Gün içinde kademe sabit
+    assert universe.entries['SYN000']['tier'] == 1
+
+
+def test_tier_change_is_persisted(hisse, universe):
+    universe.observe('SYN000', 10.0, 10_000_000)
+    universe.save()
+    universe.observe('SYN000', 10.0, 100)
+    universe.entries['SYN000']['turnover'] = 1_000.0  # Önceki günün ortalaması düşük
+    universe.entries['SYN000']['day'] = '2000-01-01'
+    assert universe.observe('SYN000', 10.0, 100) is True
+    assert universe.dirty
+    universe.save()
+    assert not universe.dirty
+    assert hisse.UniverseIndex(path=universe.path).entries['SYN000']['tier'] == 3
+
+
+def test_explicit_save_writes_observations(hisse, universe):
+    universe.observe('SYN000', 10.0, 10_000_000)
+    universe.save()
+    universe.observe('SYN000', 11.0, 10_000_000)
+    universe.save()
+    assert hisse.UniverseIndex(path=universe.path).entries['SYN000']['price'] == 10.0
+    universe.save(force=True)
+    assert hisse.UniverseIndex(path=universe.path).entries['SYN000']['price'] == 11.0
+
+
+def test_scan_header_names_scanned_universe(hisse, universe, monkeypatch, capsys):
+    universe.entries['SYN000'] = {'tier': 3}  # Az likit hisse varsayılan taramaya girmez
+    monkeypatch.setattr(hisse, 'UNIVERSE_MAX_TIER', 2)
+    hisse.scan_and_filter_stocks(provider=hisse.SyntheticDataProvider(), workers=1, cache=False)
+    assert "🔍 Evren, kademe ≤ 2 (19 hisse) taranıyor" in capsys.readouterr().out
+    hisse.scan_and_filter_stocks(['SYN001', 'SYN002'], provider=hisse.SyntheticDataProvider(), workers=1, cache=False)
+    assert "🔍 Seçilen (2 hisse) taranıyor" in capsys.readouterr().out
+    assert hisse.describe_universe(list(reversed(hisse.BIST100_STOCKS))) == f"BIST100 ({len(hisse.BIST100_STOCKS)} hisse)"
@@ -0,0 +1,86 @@
+"""ResultCache: anahtar veri/parametre değişiminde değişmeli, tekrar tarama isabet etmeli, dosya geri yüklenmeli"""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def hist(hisse):
+    return hisse.generate_synthetic_ohlcv("CACHE", 200, 1)
+
+
+@pytest.fixture
+def cache(hisse, tmp_path):
+    return hisse.ResultCache(max_entries=100, path=str(tmp_path / "results.pkl"))
+
+
+def counts(cache):
+    return cache.stats['hits'], cache.stats['misses']
+
+
+def test_repeat_is_hit(hisse, hist, cache):
+    first = hisse.analyze_cached("CACHE", hist, True, cache)
+    second = hisse.analyze_cached("CACHE", hist.copy(), True, cache)
+    assert counts(cache) == (1, 1)
+    assert second == first
+    second['price'] = -1  # Dönen kopya değişse de önbellek bozulmamalı
+    assert hisse.analyze_cached("CACHE", hist, True, cache)['price'] == first['price']
+
+
+def test_new_bar_and_changed_data_miss(hisse, hist, cache):
+    hisse.analyze_cached("CACHE", hist.iloc[:-1], True, cache)
+    hisse.analyze_cached("CACHE", hist, True, cache)  # Yeni bar
+    changed = hist.copy()
+    changed.iloc[-1, changed.columns.get_loc('Close')] *= 1.01  # Son bar gün içinde güncellendi
+    hisse.analyze_cached("CACHE", changed, True, cache)
+    assert counts(cache) == (0, 3)
+    hisse.analyze_cached("cache", hist, True, cache)  # Hisse kodu büyük/küçük harf duyarsız
+    assert counts(cache) == (1, 3)
+
+
+def test_full_diagnostics_flag_changes_key(hisse, hist, cache):
+    hisse.analyze_cached("CACHE", hist, True, cache)
+    hisse.analyze_cached("CACHE", hist, False, cache)
+    assert counts(cache) == (0, 2)
+    assert cache.key("CACHE", hist, True) != cache.key("CACHE", hist, False)
+
+
+def test_thresholds_only_affect_partial_results(hisse, hist, cache, monkeypatch):
+    hisse.analyze_cached("CACHE", hist, True, cache)
+    hisse.analyze_cached("CACHE", hist, False, cache)
+    monkeypatch.setattr(hisse, 'MIN_RSI', hisse.MIN_RSI + 5)
+    monkeypatch.setattr(hisse, 'MACD_CROSSOVER', not hisse.MACD_CROSSOVER)
+    hisse.analyze_cached("CACHE", hist, True, cache)   # Tam sonuç eşiklerden bağımsız: isabet
+    hisse.analyze_cached("CACHE", hist, False, cache)  # Erken eleme eşiğe bağlı: ıskalama
+    assert counts(cache) == (1, 3)
+
+
+@pytest.mark.parametrize('name, value', [('SUPPORT_RESISTANCE_COUNT', 5), ('VOLUME_LOOKBACK_DAYS', 10),
+                                         ('SR_ENGINE', 'volume_profile')])
+def test_result_parameters_change_key(hisse, hist, cache, monkeypatch, name, value):
+    hisse.analyze_cached("CACHE", hist, True, cache)
+    monkeypatch.setattr(hisse, name, value)
+    hisse.analyze_cached("CACHE", hist, True, cache)
+    assert counts(cache) == (0, 2)
+
+
+def test_persisted_cache_round_trips(hisse, hist, cache):
+    result = hisse.analyze_cached("CACHE", hist, True, cache)
+    cache.save()
+    os.utime(cache.path, ns=(0, 0))
+    restored = hisse.ResultCache(max_entries=100, path=cache.path)
+    assert restored.get(cache.key("CACHE", hist, True)) == result
+    assert counts(restored) == (1, 0)
+    restored.save()  # Değişiklik yok: dosya yeniden yazılmaz
+    assert os.stat(cache.path).st_mtime_ns == 0
+    assert hisse.analyze_cached("CACHE", hist, True, restored) == result
+    assert counts(restored) == (2, 0)
+
+
+def test_lru_eviction(hisse, hist):
+    cache = hisse.ResultCache(max_entries=2, path=None)
+    for length in (150, 160, 170):
+        hisse.analyze_cached("CACHE", hist.iloc[:length], True, cache)
+    hisse.analyze_cached("CACHE", hist.iloc[:170], True, cache)
+    hisse.analyze_cached("CACHE", hist.iloc[:150], True, cache)
+    assert cache.stats == {'hits': 1, 'misses': 4, 'evictions': 2}
@@ -0,0 +1,68 @@
+"""FilterSession: eşik değişince sadece etkilenen kriter sütunları yeniden hesaplanmalı, sonuç tam hesapla aynı olmalı"""
+import collections
+
+import pytest
+
+
+@pytest.fixture
+def session(hisse, monkeypatch):
+    for name in tuple(hisse.FILTER_THRESHOLDS) + tuple(hisse.FILTER_TOGGLES.values()):
+        monkeypatch.setattr(hisse, name, getattr(hisse, name))  # set() globalleri değiştirir - test sonunda geri al
+    provider = hisse.SyntheticDataProvider()
+    results = [hisse.analyze_stock_comprehensive(f"SES{i:03d}", provider, cache=False) for i in range(60)]
+    return hisse.FilterSession([result for result in results if result])
+
+
+@pytest.fixture
+def calls(hisse, monkeypatch):
+    """Kriter başına kaç kez değerlendirildiğini say"""
+    counter = collections.Counter()
+    for name, check in list(hisse.FILTER_CRITERIA.items()):
+        def counted(columns, name=name, check=check):
+            counter[name] += 1
+            return check(columns)
+        monkeypatch.setitem(hisse.FILTER_CRITERIA, name, counted)
+    return counter
+
+
+def full_recompute(hisse, session):
+    matrix = hisse.evaluate_filter_matrix(session.frame)
+    return [stock for stock, ok in zip(session.all_results, hisse.filter_pass_mask(matrix)) if ok]
+
+
+@pytest.mark.parametrize('name, value', [('MIN_RSI', 30), ('MAX_RSI', 75), ('MIN_ATR_PERCENT', 0.5),
+                                         ('MAX_SUPPORT_DISTANCE', 0.2), ('MIN_VOLUME', 0)])
+def test_threshold_reevaluates_only_affected_criteria(hisse, session, calls, name, value):
+    before = session.matrix.copy()
+    affected = session.set(name, value)
+    assert affected == hisse.FILTER_THRESHOLDS[name]
+    assert calls == collections.Counter(affected)
+    unaffected = [column for column in before if column not in affected]
+    assert session.matrix[unaffected].equals(before[unaffected])
+    calls.clear()
+    assert session.filtered_results() == full_recompute(hisse, session)
+
+
+def test_toggle_reevaluates_nothing(hisse, session, calls):
+    before = session.matrix.copy()
+    assert session.set('MACD_CROSSOVER', False) == ()
+    assert session.set('NEAR_SUPPORT', False) == ()
+    assert not calls
+    assert session.matrix.equals(before)
+    assert session.filtered_results() == full_recompute(hisse, session)
+
+
+def test_successive_changes_match_fresh_scan(hisse, session):
+    for name, value in [('MACD_CROSSOVER', False), ('MIN_RSI', 20), ('MAX_RSI', 80), ('VOLUME_INCREASE_MIN', 0.5),
+                        ('MAX_PRICE_EMA20_DISTANCE', 0.2), ('MIN_ATR_PERCENT', 0.0)]:
+        session.set(name, value)
+        assert session.filtered_results() == full_recompute(hisse, session)
+    assert session.filtered_results(), "gevşetilmiş eşiklerle uygun hisse olmalı"
+
+
+@pytest.mark.parametrize('name, value', [('SCAN_WORKERS', 4), ('DATA_PROVIDER', None), ('MIN_RSI', 'kırk')])
+def test_rejects_non_filter_settings_and_bad_values(hisse, session, name, value):
+    before = session.matrix.copy()
+    with pytest.raises(ValueError):
+        session.set(name, value)
+    assert session.matrix.equals(before)
@@ -0,0 +1,57 @@
+"""validate_setting / apply_settings: sadece basit türlü ayar globalleri değiştirilebilir"""
+import pytest
+
+
+@pytest.mark.parametrize('name', ['DATA_PROVIDER', 'RESULT_CACHE', 'PROFILER', 'UNIVERSE_INDEX',
+                                  'SIMILARITY_INDEX', 'CORRELATION_ENGINE', 'FILTER_CRITERIA', 'analyze_history',
+                                  'NOT_A_SETTING'])
+def test_object_globals_are_not_settings(hisse, name):
+    with pytest.raises(ValueError, match="Bilinmeyen ayar"):
+        hisse.validate_setting(name, 'x')
+
+
+@pytest.mark.parametrize('name, value', [('MIN_RSI', True), ('MIN_RSI', '40'), ('CACHE_ENABLED', 1),
+                                         ('HISTORY_PERIOD', 6), ('BIST_SESSION', '10:00'), ('MIN_RSI', None),
+                                         ('SCAN_DEADLINE_SECONDS', 'uzun'), ('SNAPSHOT_EXPORT', 5)])
+def test_invalid_values_are_rejected(hisse, name, value):
+    with pytest.raises(ValueError, match="geçersiz değer"):
+        hisse.validate_setting(name, value)
+
+
+@pytest.mark.parametrize('name, value, expected', [
+    ('MIN_RSI', 45, 45), ('MAX_PRICE_EMA20_DISTANCE', 0.05, 0.05), ('CACHE_ENABLED', False, False),
+    ('BIST_SESSION', ['09:55', '18:00'], ('09:55', '18:00')),
+    ('SCAN_DEADLINE_SECONDS', None, None), ('COMPACT_ANALYSIS_BARS', None, None),
+    ('SNAPSHOT_EXPORT', 'scans.jsonl', 'scans.jsonl'), ('PROFILE_REPORT', None, None),
+])
+def test_valid_values(hisse, name, value, expected):
+    assert hisse.validate_setting(name, value) == expected
+
+
+def test_nullable_setting_accepts_value_again_after_none(hisse, monkeypatch):
+    monkeypatch.setattr(hisse, 'SCAN_DEADLINE_SECONDS', None)
+    assert hisse.validate_setting('SCAN_DEADLINE_SECONDS', 120) == 120
+    with pytest.raises(ValueError):
+        hisse.validate_setting('SCAN_DEADLINE_SECONDS', 'yok')
+
+
+def test_load_config_applies_none(hisse, tmp_path, monkeypatch):
+    monkeypatch.setattr(hisse, 'SCAN_DEADLINE_SECONDS', hisse.SCAN_DEADLINE_SECONDS)
+    path = tmp_path / "config.json"
+    path.write_text('{"SCAN_DEADLINE_SECONDS": null}')
+    hisse.load_config(str(path))
+    assert hisse.SCAN_DEADLINE_SECONDS is None
+    path.write_text('{"DATA_PROVIDER": "x"}')
+    with pytest.raises(ValueError):
+        hisse.load_config(str(path))
+
+
+def test_apply_settings_ignores_object_globals(hisse, monkeypatch):
+    provider = hisse.DATA_PROVIDER
+    monkeypatch.setattr(hisse, 'MIN_RSI', hisse.MIN_RSI)
+    monkeypatch.setattr(hisse, 'SNAPSHOT_EXPORT', hisse.SNAPSHOT_EXPORT)
+    hisse.apply_settings({'DATA_PROVIDER': 'x', 'MIN_RSI': 42, 'SNAPSHOT_EXPORT': 'out.csv'})
+    assert hisse.DATA_PROVIDER is provider
+    assert hisse.MIN_RSI == 42 and hisse.SNAPSHOT_EXPORT == 'out.csv'
+    assert 'DATA_PROVIDER' not in hisse.settings_snapshot()
+    assert hisse.settings_snapshot()['SNAPSHOT_EXPORT'] == 'out.csv'
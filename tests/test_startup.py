@@ -0,0 +1,32 @@
+"""Başlangıç süresi: kısa komutlar ağır kütüphaneleri yüklememeli ve bütçe içinde kalmalı"""
+import subprocess
+import sys
+
+from conftest import SCRIPT
+
+
+def test_filters_skips_heavy_imports(hisse):
+    startup = hisse.measure_startup(('--filters',), repeats=3)
+    assert startup['heavy'] == []
+    assert startup['best_ms'] < hisse.STARTUP_BUDGET_MS
+
+
+def test_eager_imports_are_detected(hisse):
+    # Ölçüm gerçekten ağır modül yüklemesini yakalıyor mu
+    startup = hisse.measure_startup(('--filters', '--eager-imports'), repeats=1)
+    assert set(startup['heavy']) == set(hisse.HEAVY_MODULES)
+
+
+def test_filter_config_file(tmp_path):
+    (tmp_path / "filters.json").write_text('{"MIN_RSI": 45, "NEAR_SUPPORT": false}', encoding='utf-8')
+    output = subprocess.run([sys.executable, str(SCRIPT), '--filters'], cwd=tmp_path,
+                            capture_output=True, text=True, encoding='utf-8', check=True).stdout
+    assert "RSI: 45-" in output
+
+
+def test_filter_config_rejects_other_settings(tmp_path):
+    (tmp_path / "filters.json").write_text('{"SCAN_WORKERS": 4}', encoding='utf-8')
+    completed = subprocess.run([sys.executable, str(SCRIPT), '--filters'], cwd=tmp_path,
+                               capture_output=True, text=True, encoding='utf-8')
+    assert completed.returncode != 0
+    assert "SCAN_WORKERS" in completed.stderr
@@ -0,0 +1,75 @@
+"""OHLCVStore: sütun tipleri, disk/memmap gidiş-dönüşü ve panel hizalaması"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def histories(hisse):
+    """Farklı uzunlukta, Yahoo gibi Europe/Istanbul saat dilimli geçmişler"""
+    out = {}
+    for i, n_bars in enumerate((120, 60, 250)):
+        hist = hisse.generate_synthetic_ohlcv(f"STO{i}", n_bars, i)
+        hist.index = pd.date_range(end="2024-06-28", periods=n_bars, freq='B', tz='Europe/Istanbul')
+        out[f"STO{i}"] = hist
+    return out
+
+
+@pytest.fixture
+def written(hisse, histories, tmp_path):
+    items = list(histories.items()) + [("EMPTY", histories["STO0"].iloc[:0]), ("NONE", None)]
+    return hisse.write_ohlcv_store(str(tmp_path / "store"), items)
+
+
+def test_column_dtypes_and_file_sizes(hisse, written, histories):
+    total = sum(len(hist) for hist in histories.values())
+    assert written.tickers == list(histories)  # Boş ve None geçmişler atlanır
+    assert written.offsets.tolist() == [0, 120, 180, 430]
+    for column, dtype in hisse.COMPACT_COLUMNS.items():
+        values = written.columns[column]
+        assert isinstance(values, np.memmap) and values.dtype == np.dtype(dtype) and len(values) == total
+        assert os.path.getsize(os.path.join(written.directory, f"{column.lower()}.bin")) == total * values.itemsize
+    assert written.nbytes == total * (8 + 4 * 4 + 8) + written.offsets.nbytes
+
+
+def test_round_trip_matches_source(hisse, written, histories):
+    for ticker, hist in histories.items():
+        restored = written.history(ticker)
+        pd.testing.assert_index_equal(restored.index, hist.index.tz_convert(None).as_unit('ns'), check_names=False)
+        for column in ('Open', 'High', 'Low', 'Close'):
+            np.testing.assert_array_equal(restored[column].to_numpy(),
+                                          hist[column].to_numpy(dtype=np.float32).astype(float))
+            np.testing.assert_allclose(restored[column], hist[column], rtol=1e-6)
+        np.testing.assert_array_equal(restored['Volume'], hist['Volume'].astype(np.int64))
+        assert written.bar_count(ticker) == len(hist)
+
+
+def test_memmap_and_in_memory_stores_agree(hisse, written, histories):
+    loaded = hisse.OHLCVStore.open(written.directory, mmap=False)
+    built = hisse.OHLCVStore.from_histories(histories)
+    for column in hisse.COMPACT_COLUMNS:
+        assert not isinstance(loaded.columns[column], np.memmap)
+        np.testing.assert_array_equal(loaded.columns[column], written.columns[column])
+        np.testing.assert_array_equal(built.columns[column], written.columns[column])
+        assert built.columns[column].dtype == written.columns[column].dtype
+    assert loaded.offsets.tolist() == built.offsets.tolist() == written.offsets.tolist()
+
+
+def test_series_are_views_and_panel_is_right_aligned(hisse, written, histories):
+    series = written.series("STO1")
+    assert np.shares_memory(series['Close'], written.columns['Close'])
+    panel = written.panel(["STO1", "STO2"], window=100)
+    assert panel['Close'].shape == (2, 100) and panel['lengths'].tolist() == [60, 100]
+    assert np.isnan(panel['Close'][0, :40]).all()
+    np.testing.assert_array_equal(panel['Close'][0, 40:], written.history("STO1")['Close'].to_numpy())
+    np.testing.assert_array_equal(panel['Close'][1], written.history("STO2")['Close'].to_numpy()[-100:])
+
+
+def test_analysis_from_memmap_matches_in_memory(hisse, written, histories):
+    from_disk = hisse.analyze_store(written)
+    in_memory = hisse.analyze_store(hisse.OHLCVStore.from_histories(histories))
+    assert len(from_disk) == len(histories)
+    for name in from_disk.dtype.names:
+        np.testing.assert_array_equal(from_disk[name], in_memory[name])  # NaN'lar eşit sayılır
@@ -0,0 +1,33 @@
+"""Artımlı göstergeler toplu (pandas) hesaplamayla bar bar aynı olmalı"""
+import numpy as np
+import pandas as pd
+
+
+def test_rolling_mean_matches_pandas(hisse):
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1, 5000) * 1e3
+    values[rng.integers(0, len(values), 30)] = np.nan
+    values[1000:1100] = 0.0
+    rolling = hisse.RollingMean(14)
+    streamed = np.array([rolling.update(x) for x in values])
+    expected = pd.Series(values).rolling(14).mean().to_numpy()
+    np.testing.assert_allclose(streamed, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+    assert (streamed[1013:1100] == 0.0).all()
+
+
+def test_rolling_mean_update_is_constant_time(hisse):
+    # O(pencere) güncelleme burada ~5e9 toplama yapardı; kayan toplamla anında biter
+    rolling = hisse.RollingMean(100_000)
+    for x in range(100_000):
+        rolling.update(float(x))
+    assert rolling.value == np.mean(np.arange(100_000.0))
+
+
+def test_incremental_indicators_match_batch(hisse):
+    hist = hisse.generate_synthetic_ohlcv("SYN", 600)
+    rsi, atr = hisse.IncrementalRSI(), hisse.IncrementalATR()
+    streamed_rsi = [rsi.update(close) for close in hist['Close']]
+    streamed_atr = [atr.update(h, l, c) for h, l, c in zip(hist['High'], hist['Low'], hist['Close'])]
+    np.testing.assert_allclose(streamed_rsi, hisse.calculate_rsi(hist['Close']), rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(streamed_atr, hisse.calculate_atr(hist['High'], hist['Low'], hist['Close']),
+                               rtol=1e-9, equal_nan=True)
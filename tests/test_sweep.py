@@ -0,0 +1,36 @@
+"""Parametre taraması: çalışanlar taranmayan kriterlerde ana süreçteki değerleri kullanır"""
+import pandas as pd
+
+
+def _sweep(hisse, workers):
+    histories = hisse.generate_synthetic_universe(8, 400)
+    candidates = hisse.sweep_candidates(samples=4)
+    table = hisse.run_parameter_sweep(histories, candidates, horizon=5, workers=workers)
+    return table.sort_values(list(hisse.SWEEP_SPACE)).reset_index(drop=True)
+
+
+def test_spawn_sweep_uses_current_filters(hisse, spawn_context, monkeypatch):
+    # Taranmayan anahtar ve eşikler koddaki varsayılandan farklı
+    monkeypatch.setattr(hisse, 'MACD_CROSSOVER', False)
+    monkeypatch.setattr(hisse, 'NEAR_SUPPORT', False)
+    monkeypatch.setattr(hisse, 'MIN_VOLUME', 0)
+    serial = _sweep(hisse, workers=1)
+    parallel = _sweep(hisse, workers=2)
+    assert serial['Sinyal'].sum() > 0
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_serial_sweep_reuses_creating_handle(hisse, monkeypatch):
+    """Tek çalışanlı yolda ana süreç ikinci (kapatılmayan) bir SharedMemory tanıtıcısı açmamalı"""
+    opened = []
+
+    class Tracked(hisse.shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    monkeypatch.setattr(hisse.shared_memory, 'SharedMemory', Tracked)
+    monkeypatch.setattr(hisse, 'MACD_CROSSOVER', False)
+    _sweep(hisse, workers=1)
+    assert len(opened) == 1 and opened[0].buf is None  # Sadece oluşturan tanıtıcı, kapatılmış
+    assert hisse._SWEEP_STATE == {}